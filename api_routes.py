@@ -1,10 +1,28 @@
-from flask import jsonify, request, session, flash, redirect, url_for
-from app import app, db
-from models import Player, PlayerBadge, Badge, ASCENDData, GameMode, ASCENDHistory, ShopItem, ShopPurchase, CustomTitle, PlayerTitle
+from flask import Blueprint, current_app, jsonify, request, send_file, session, flash, redirect, url_for
+from app import db
+from change_feed import EVENT_KINDS, wait_for_changes
+from db_routing import replica_safe
+from player_session import get_current_player
+from engine_config import pool_metrics
+from models import Player, PlayerBadge, Badge, ASCENDData, GameMode, ASCENDHistory, ASCENDHistorySummary, ShopItem, ShopPurchase, CustomTitle, PlayerTitle, ChangeEvent, QuestSubmission, BotGuildConfig, calculate_tier_from_score
 import json
+import os
+import hashlib
+import hmac
 from datetime import datetime
 
-@app.route('/api/leaderboard')
+# JSON API; registered by app.register_blueprints() ahead of the page routes
+api = Blueprint('api', __name__)
+
+def bot_or_admin():
+    """Admin session, or the Discord bot's 'Authorization: Bearer <BOT_API_TOKEN>' header"""
+    if session.get('is_admin', False):
+        return True
+    token = current_app.config.get('BOT_API_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+@api.route('/api/leaderboard')
+@replica_safe
 def api_leaderboard():
     """API endpoint for leaderboard data with fallback"""
     try:
@@ -26,7 +44,9 @@ def api_leaderboard():
                 'wins': player.wins,
                 'games_played': player.games_played,
                 'kd_ratio': player.kd_ratio,
-                'win_rate': player.win_rate
+                'win_rate': player.win_rate,
+                'reputation': player.reputation,
+                'karma': player.karma
             })
 
         return jsonify({
@@ -35,7 +55,7 @@ def api_leaderboard():
             'total': len(players_data)
         })
     except Exception as e:
-        app.logger.error(f"Error in API leaderboard: {e}")
+        current_app.logger.error(f"Error in API leaderboard: {e}")
         return jsonify({
             'success': False,
             'players': [],
@@ -43,7 +63,98 @@ def api_leaderboard():
             'error': 'Failed to load leaderboard data'
         }), 200  # Still return 200 with empty data
 
-@app.route('/api/stats')
+@api.route('/api/search')
+@replica_safe
+def api_search_players():
+    """Nickname search for the bot: ?q= (ranked, exact=1 for a whole-name match) or ?nicknames=a,b,c"""
+    try:
+        nicknames = request.args.get('nicknames')
+        if nicknames is not None:
+            names = [name.strip() for name in nicknames.split(',') if name.strip()][:100]
+            found = Player.lookup_compact(names)
+            return jsonify({
+                'success': True,
+                'players': [found[name.lower()] for name in names if name.lower() in found],
+                'missing': [name for name in names if name.lower() not in found]
+            })
+
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'success': False, 'error': 'Query required'}), 400
+        limit = request.args.get('limit', 10, type=int)
+        exact = request.args.get('exact') == '1'
+        return jsonify({
+            'success': True,
+            'players': Player.search_compact(query, limit=limit, exact=exact)
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error searching players via API: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/changes')
+def api_changes():
+    """Change feed for the bot: ?since=<cursor>&wait=<seconds>&kinds=a,b (long-poll)
+
+    Without since, returns the current cursor so a new consumer starts from now.
+    """
+    try:
+        since = request.args.get('since', type=int)
+        if since is None:
+            return jsonify({'success': True, 'events': [], 'cursor': ChangeEvent.latest_id()})
+
+        kinds = [kind for kind in request.args.get('kinds', '').split(',') if kind in EVENT_KINDS]
+        events = wait_for_changes(since, kinds, request.args.get('wait', 0, type=int))
+        return jsonify({
+            'success': True,
+            'events': [change.to_dict() for change in events],
+            'cursor': events[-1].id if events else since
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error reading change feed: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/players/below')
+@replica_safe
+def api_players_below():
+    """Players under a karma/reputation threshold: ?field=karma&lt=20&limit=100&after=<cursor>"""
+    try:
+        field = request.args.get('field', 'reputation')
+        if field not in Player.THRESHOLD_FIELDS:
+            return jsonify({'success': False, 'error': f'field must be one of {", ".join(Player.THRESHOLD_FIELDS)}'}), 400
+        threshold = request.args.get('lt', type=int)
+        if threshold is None:
+            return jsonify({'success': False, 'error': 'lt is required'}), 400
+
+        after = None
+        if request.args.get('after'):
+            try:
+                value, player_id = request.args['after'].split(':')
+                after = (int(value), int(player_id))
+            except ValueError:
+                return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+
+        players, next_cursor = Player.below_threshold(field, threshold, after=after,
+                                                      limit=request.args.get('limit', 100, type=int))
+        return jsonify({
+            'success': True,
+            'players': players,
+            'next_cursor': f'{next_cursor[0]}:{next_cursor[1]}' if next_cursor else None
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error getting players below threshold: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/stats')
+@replica_safe
 def api_stats():
     """API endpoint for statistics data"""
     try:
@@ -67,24 +178,20 @@ def api_stats():
                 serializable_stats[key] = value
         return jsonify(serializable_stats)
     except Exception as e:
-        app.logger.error(f"Error in API stats: {e}")
+        current_app.logger.error(f"Error in API stats: {e}")
         return jsonify({'error': 'Failed to load statistics'}), 500
 
-@app.route('/shop/purchase', methods=['POST'])
+@api.route('/shop/purchase', methods=['POST'])
 def purchase_shop_item():
     """Handle shop item purchases"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         return jsonify({'success': False, 'error': 'Необходимо войти в систему'})
 
     try:
         data = request.get_json()
         item_id = data.get('item_id')
 
-        player = Player.query.filter_by(nickname=player_nickname).first()
-        if not player:
-            return jsonify({'success': False, 'error': 'Игрок не найден'})
-
         shop_item = ShopItem.query.get(item_id)
         if not shop_item or not shop_item.is_active:
             return jsonify({'success': False, 'error': 'Товар не найден'})
@@ -182,14 +289,14 @@ def purchase_shop_item():
 
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Purchase error: {e}")
+        current_app.logger.error(f"Purchase error: {e}")
         return jsonify({'success': False, 'error': 'Ошибка при покупке'})
 
-@app.route('/api/toggle-admin-role', methods=['POST'])
+@api.route('/api/toggle-admin-role', methods=['POST'])
 def toggle_admin_role():
     """Toggle admin role activation"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         return jsonify({'success': False, 'error': 'Необходимо войти в систему'}), 401
 
     try:
@@ -197,10 +304,6 @@ def toggle_admin_role():
         role_id = data.get('role_id')
         is_active = data.get('is_active')
 
-        player = Player.query.filter_by(nickname=player_nickname).first()
-        if not player:
-            return jsonify({'success': False, 'error': 'Игрок не найден'}), 404
-
         # Get the admin role
         from models import PlayerAdminRole
         admin_role = PlayerAdminRole.query.filter_by(
@@ -227,10 +330,11 @@ def toggle_admin_role():
         })
 
     except Exception as e:
-        app.logger.error(f"Toggle admin role error: {e}")
+        current_app.logger.error(f"Toggle admin role error: {e}")
         return jsonify({'success': False, 'error': 'Произошла ошибка'}), 500
 
-@app.route('/api/player/<int:player_id>/badges')
+@api.route('/api/player/<int:player_id>/badges')
+@replica_safe
 def get_player_badges(player_id):
     """Get all badges for a player"""
     try:
@@ -262,13 +366,25 @@ def get_player_badges(player_id):
         })
 
     except Exception as e:
-        app.logger.error(f"Error getting player badges: {e}")
+        current_app.logger.error(f"Error getting player badges: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/admin/assign_badge', methods=['POST'])
+@api.route('/api/admin/db-pool')
+def api_db_pool():
+    """Connection pool metrics for this worker (admin only)"""
+    if not session.get('is_admin', False):
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    return jsonify({
+        'success': True,
+        'pid': os.getpid(),
+        'pools': pool_metrics(db.engines)
+    })
+
+@api.route('/api/admin/assign_badge', methods=['POST'])
 def api_assign_badge():
     """Assign badge to player via API (admin only)"""
     if not session.get('is_admin', False):
@@ -312,96 +428,273 @@ def api_assign_badge():
         })
 
     except Exception as e:
-        app.logger.error(f"Error assigning badge via API: {e}")
+        current_app.logger.error(f"Error assigning badge via API: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/player/<int:player_id>/ascend-data')
+@api.route('/api/quest-submissions', methods=['POST'])
+def api_submit_quest():
+    """Queue a quest screenshot for review (Discord bot or admin)"""
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        data = request.get_json() or {}
+        if not data.get('nickname') or not data.get('quest') or not data.get('discord_user_id'):
+            return jsonify({'success': False, 'error': 'Missing nickname, quest or discord_user_id'}), 400
+
+        try:
+            submission = QuestSubmission.submit(data['nickname'], data['quest'], data['discord_user_id'],
+                                                discord_guild_id=data.get('discord_guild_id'),
+                                                attachment_url=data.get('attachment_url'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
+
+        return jsonify({'success': True, 'submission': submission.to_dict()})
+
+    except Exception as e:
+        current_app.logger.error(f"Error submitting quest: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/quest-submissions')
+def api_quest_submissions():
+    """Review queue, oldest first: ?status=pending&guild_id=<id>&after=<cursor>&limit=25"""
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        status = request.args.get('status', 'pending')
+        if status not in QuestSubmission.STATUSES:
+            return jsonify({'success': False, 'error': f'status must be one of {", ".join(QuestSubmission.STATUSES)}'}), 400
+
+        submissions, next_cursor = QuestSubmission.page(status, guild_id=request.args.get('guild_id'),
+                                                        after=request.args.get('after', type=int),
+                                                        limit=request.args.get('limit', 25, type=int))
+        return jsonify({
+            'success': True,
+            'submissions': [submission.to_dict() for submission in submissions],
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error getting quest submissions: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/quest-submissions/<int:submission_id>/message', methods=['POST'])
+def api_quest_submission_message(submission_id):
+    """Remember the Discord message a submission is reviewed in, so it can be updated later"""
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        data = request.get_json() or {}
+        submission = QuestSubmission.query.get_or_404(submission_id)
+        submission.review_channel_id = str(data.get('channel_id') or '') or None
+        submission.review_message_id = str(data.get('message_id') or '') or None
+        db.session.commit()
+        return jsonify({'success': True})
+    except Exception as e:
+        current_app.logger.error(f"Error saving quest review message: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/quest-submissions/review', methods=['POST'])
+def api_review_quest_submissions():
+    """Approve or reject many submissions at once: {"ids": [...], "action": "approve"|"reject", ...}
+
+    Rewards of every approved submission are applied in one transaction.
+    Submissions that were already reviewed are skipped and left out of the answer.
+    """
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        data = request.get_json() or {}
+        action = data.get('action')
+        if action not in ('approve', 'reject'):
+            return jsonify({'success': False, 'error': 'action must be approve or reject'}), 400
+        try:
+            ids = [int(submission_id) for submission_id in data.get('ids') or []][:100]
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'Invalid ids'}), 400
+        if not ids:
+            return jsonify({'success': False, 'error': 'ids required'}), 400
+
+        reviewed = QuestSubmission.review(ids, action == 'approve',
+                                          reviewed_by=(data.get('reviewed_by') or 'admin')[:100],
+                                          reason=(data.get('reason') or None) and data['reason'][:500])
+        return jsonify({
+            'success': True,
+            'reviewed': [submission.to_dict() for submission in reviewed]
+        })
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error reviewing quest submissions: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/bot/guilds')
+def api_bot_guilds():
+    """Channels every guild chose with /setup_channel (loaded by the bot on startup)"""
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        return jsonify({
+            'success': True,
+            'guilds': [config.to_dict() for config in BotGuildConfig.query.order_by(BotGuildConfig.id)]
+        })
+    except Exception as e:
+        current_app.logger.error(f"Error getting bot guild configs: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/bot/guilds/<int:guild_id>/channels', methods=['POST'])
+def api_set_bot_guild_channel(guild_id):
+    """Set or clear one channel of a guild: {"kind": "announce"|"review", "channel_id": ... or null}"""
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        data = request.get_json() or {}
+        kind = data.get('kind')
+        if kind not in BotGuildConfig.CHANNEL_KINDS:
+            return jsonify({'success': False, 'error': 'kind must be announce or review'}), 400
+        channel_id = data.get('channel_id')
+        if channel_id is not None and not str(channel_id).isdigit():
+            return jsonify({'success': False, 'error': 'Invalid channel_id'}), 400
+
+        config = BotGuildConfig.set_channel(guild_id, kind, channel_id)
+        return jsonify({
+            'success': True,
+            'guild': config.to_dict() if config else None
+        })
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error saving bot guild channel: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/bot/guilds/<int:guild_id>/remove', methods=['POST'])
+def api_remove_bot_guild(guild_id):
+    """Forget the channels of a guild the bot has left"""
+    if not bot_or_admin():
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+
+    try:
+        return jsonify({
+            'success': True,
+            'removed': BotGuildConfig.remove(guild_id)
+        })
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error removing bot guild config: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/player/<int:player_id>/ascend-data')
+@replica_safe
 def api_get_ascend_data(player_id):
-    """Get ASCEND data for player"""
+    """Get ASCEND data for player (read-only, supports conditional requests)"""
     try:
         gamemode = request.args.get('gamemode', 'bedwars')
-        player = Player.query.get_or_404(player_id)
+        skill_names = GameMode.get_skill_names(gamemode)
 
-        # Ensure GameMode skills match expected parameters for supported modes
-        expected_skills = {
-            'kitpvp': ['Aiming', 'Healing (soups; pots)', 'Movement', 'Spacing'],
-            'skywars': ['Looting', 'Potting', 'Pearling', 'Melee'],
-            'bridgefight': ['Block Edits', 'Bridge Fights', 'Gamesense', 'PvP'],
-            'sumo': ['Gamesense', 'KB control', 'Mechanics', 'Movement'],
-            'fireball_fight': ['Attack/Defense', 'Fireball usage', 'Gamesense', 'PvP'],
-            'bridge': ['Bypassing', 'Defense', 'Gamesense', 'PvP']
-        }
+        # Single indexed lookup: player primary key joined to (player_id, gamemode)
+        row = db.session.query(Player.id, ASCENDData).outerjoin(
+            ASCENDData,
+            (ASCENDData.player_id == Player.id) & (ASCENDData.gamemode == gamemode)
+        ).filter(Player.id == player_id).first()
 
-        game_mode = GameMode.query.filter_by(name=gamemode).first()
-        if game_mode and gamemode in expected_skills:
-            skills = expected_skills[gamemode]
-            updated_gm = False
-            if game_mode.skill1_name != skills[0]:
-                game_mode.skill1_name = skills[0]
-                updated_gm = True
-            if game_mode.skill2_name != skills[1]:
-                game_mode.skill2_name = skills[1]
-                updated_gm = True
-            if game_mode.skill3_name != skills[2]:
-                game_mode.skill3_name = skills[2]
-                updated_gm = True
-            if game_mode.skill4_name != skills[3]:
-                game_mode.skill4_name = skills[3]
-                updated_gm = True
-            if updated_gm:
-                db.session.commit()
+        if row is None:
+            return jsonify({'success': False, 'error': 'Player not found'}), 404
 
-        ascend_data = ASCENDData.query.filter_by(player_id=player_id, gamemode=gamemode).first()
-
-        if not ascend_data:
-            # Create default data based on gamemode
-            if game_mode:
-                ascend_data = ASCENDData(
-                    player_id=player_id,
-                    gamemode=gamemode,
-                    skill1_name=game_mode.skill1_name,
-                    skill2_name=game_mode.skill2_name,
-                    skill3_name=game_mode.skill3_name,
-                    skill4_name=game_mode.skill4_name
-                )
-                db.session.add(ascend_data)
-                db.session.commit()
-            else:
-                ascend_data = ASCENDData.get_or_create(player_id)
+        ascend_data = row[1]
+        if ascend_data:
+            payload = ascend_data.to_dict(skill_names=skill_names)
+            version = ascend_data.updated_at.isoformat() if ascend_data.updated_at else ascend_data.id
         else:
-            # Ensure skill names are up-to-date with current GameMode config
-            if game_mode:
-                updated = False
-                if ascend_data.skill1_name != game_mode.skill1_name:
-                    ascend_data.skill1_name = game_mode.skill1_name
-                    updated = True
-                if ascend_data.skill2_name != game_mode.skill2_name:
-                    ascend_data.skill2_name = game_mode.skill2_name
-                    updated = True
-                if ascend_data.skill3_name != game_mode.skill3_name:
-                    ascend_data.skill3_name = game_mode.skill3_name
-                    updated = True
-                if ascend_data.skill4_name != game_mode.skill4_name:
-                    ascend_data.skill4_name = game_mode.skill4_name
-                    updated = True
-                if updated:
-                    db.session.commit()
+            payload = ASCENDData.default_dict(player_id, gamemode, skill_names=skill_names)
+            version = 'default'
 
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'ascend': ascend_data.to_dict()
+            'ascend': payload
         })
+        etag_key = f"{player_id}-{gamemode}-{version}-{'|'.join(skill_names or ())}"
+        response.set_etag(hashlib.sha1(etag_key.encode('utf-8')).hexdigest(), weak=True)
+        if ascend_data and ascend_data.updated_at:
+            response.last_modified = ascend_data.updated_at
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    except Exception as e:
+        current_app.logger.error(f"Error getting ASCEND data: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@api.route('/api/player/<int:player_id>/ascend-card.png')
+@replica_safe
+def api_get_ascend_card(player_id):
+    """ASCEND card as a PNG (rendered once per change, stored on disk, ETag = content hash)"""
+    from ascend_card import card_file, card_fingerprint  # loads PIL, which most workers never need
+
+    try:
+        gamemode = request.args.get('gamemode', 'bedwars')
+        skill_names = GameMode.get_skill_names(gamemode)
+
+        row = db.session.query(Player.nickname, ASCENDData).outerjoin(
+            ASCENDData,
+            (ASCENDData.player_id == Player.id) & (ASCENDData.gamemode == gamemode)
+        ).filter(Player.id == player_id).first()
+
+        if row is None:
+            return jsonify({'success': False, 'error': 'Player not found'}), 404
+
+        nickname, ascend_data = row
+        if ascend_data:
+            payload = ascend_data.to_dict(skill_names=skill_names)
+        else:
+            payload = ASCENDData.default_dict(player_id, gamemode, skill_names=skill_names)
+
+        # Revalidation needs only the hash, not the image
+        digest = card_fingerprint(nickname, payload)
+        if request.if_none_match.contains(digest):
+            response = current_app.response_class(status=304)
+            response.set_etag(digest)
+            response.cache_control.max_age = 300
+        else:
+            digest, path = card_file(nickname, payload)
+            response = send_file(path, mimetype='image/png', etag=digest, max_age=300)
+        response.cache_control.public = True
+        return response
     except Exception as e:
-        app.logger.error(f"Error getting ASCEND data: {e}")
+        current_app.logger.error(f"Error rendering ASCEND card: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/player/<int:player_id>/ascend-history')
+@api.route('/api/player/<int:player_id>/ascend-history')
+@replica_safe
 def api_get_ascend_history(player_id):
     """Get ASCEND evaluation history for player"""
     try:
@@ -413,18 +706,29 @@ def api_get_ascend_history(player_id):
             gamemode=gamemode
         ).order_by(ASCENDHistory.created_at.desc()).limit(limit).all()
 
-        return jsonify({
+        result = {
             'success': True,
             'history': [entry.to_dict() for entry in history]
-        })
+        }
+
+        # Monthly rollups of compacted (archived) history
+        if request.args.get('include_summaries') == '1':
+            summaries = ASCENDHistorySummary.query.filter_by(
+                player_id=player_id,
+                gamemode=gamemode
+            ).order_by(ASCENDHistorySummary.month.desc()).limit(limit).all()
+            result['summaries'] = [summary.to_dict() for summary in summaries]
+
+        return jsonify(result)
     except Exception as e:
-        app.logger.error(f"Error getting ASCEND history: {e}")
+        current_app.logger.error(f"Error getting ASCEND history: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/gamemodes')
+@api.route('/api/gamemodes')
+@replica_safe
 def api_get_gamemodes():
     """Get all available game modes"""
     try:
@@ -434,13 +738,14 @@ def api_get_gamemodes():
             'gamemodes': [mode.to_dict() for mode in gamemodes]
         })
     except Exception as e:
-        app.logger.error(f"Error getting game modes: {e}")
+        current_app.logger.error(f"Error getting game modes: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/global-leaderboard')
+@api.route('/api/global-leaderboard')
+@replica_safe
 def api_global_leaderboard():
     """Get global ASCEND leaderboard"""
     try:
@@ -480,13 +785,13 @@ def api_global_leaderboard():
             'gamemode': gamemode
         })
     except Exception as e:
-        app.logger.error(f"Error getting global leaderboard: {e}")
+        current_app.logger.error(f"Error getting global leaderboard: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/player/<int:player_id>/ascend-data', methods=['POST'])
+@api.route('/api/player/<int:player_id>/ascend-data', methods=['POST'])
 def api_save_ascend_data(player_id):
     """Save ASCEND data for player (admin only)"""
     if not session.get('is_admin', False):
@@ -550,13 +855,13 @@ def api_save_ascend_data(player_id):
         })
 
     except Exception as e:
-        app.logger.error(f"Error saving ASCEND data: {e}")
+        current_app.logger.error(f"Error saving ASCEND data: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/player/<int:player_id>/ascend-import', methods=['POST'])
+@api.route('/api/player/<int:player_id>/ascend-import', methods=['POST'])
 def api_import_ascend_data(player_id):
     """Import ASCEND data from JSON (admin only)"""
     if not session.get('is_admin', False):
@@ -656,29 +961,8 @@ def api_import_ascend_data(player_id):
         })
 
     except Exception as e:
-        app.logger.error(f"Error importing ASCEND data: {e}")
+        current_app.logger.error(f"Error importing ASCEND data: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
-
-def calculate_tier_from_score(score):
-    """Calculate tier based on score"""
-    if score >= 95:
-        return 'S+'
-    elif score >= 90:
-        return 'S'
-    elif score >= 85:
-        return 'A+'
-    elif score >= 80:
-        return 'A'
-    elif score >= 75:
-        return 'B+'
-    elif score >= 70:
-        return 'B'
-    elif score >= 65:
-        return 'C+'
-    elif score >= 60:
-        return 'C'
-    else:
-        return 'D'
\ No newline at end of file
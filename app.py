@@ -1,44 +1,24 @@
 import os
+import time
 import logging
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from engine_config import engine_options
+from db_routing import RoutingSession, replica_binds
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING)
 
+startup_started_at = time.perf_counter()
+
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
-
-# Create the app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-replit-2024")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure the database for Railway
-database_url = os.environ.get('DATABASE_URL')
-if database_url and database_url.startswith('postgres://'):
-    database_url = database_url.replace('postgres://', 'postgresql://', 1)
-
-# Ensure instance directory exists for SQLite
-instance_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
-os.makedirs(instance_dir, exist_ok=True)
-
-app.config['SQLALCHEMY_DATABASE_URI'] = database_url or f'sqlite:///{os.path.join(instance_dir, "bedwars_leaderboard.db")}'
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_size": 3,
-    "max_overflow": 0,
-    "pool_timeout": 10,
-    "pool_recycle": 280,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 
 # Custom Jinja2 filters
-@app.template_filter('unique')
 def unique_filter(lst):
     """Remove duplicates from list while preserving order"""
     seen = set()
@@ -49,7 +29,6 @@ def unique_filter(lst):
             result.append(item)
     return result
 
-@app.template_filter('hex_to_rgb')
 def hex_to_rgb_filter(hex_color):
     """Convert hex color to RGB values"""
     if not hex_color or not hex_color.startswith('#'):
@@ -67,92 +46,81 @@ def hex_to_rgb_filter(hex_color):
     except ValueError:
         return "0, 0, 0"
 
-# Initialize the app with the extension
-db.init_app(app)
+def create_app():
+    """Application factory: configuration, extensions and template filters
 
-# Register translation filter
-from translations import register_translation_filter
-register_translation_filter(app)
+    Nothing here (or in register_blueprints) touches the database, so the app
+    can be imported once by the gunicorn master (preload_app) and forked.
+    """
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-replit-2024")
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Import routes first
-import routes
-try:
-    import api_routes
-except ImportError:
-    pass  # API routes are optional
+    # Configure the database for Railway
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url and database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
 
-with app.app_context():
-    # Import models to ensure tables are created
-    from models import Player, Quest, PlayerQuest, Achievement, PlayerAchievement, CustomTitle, PlayerTitle, GradientTheme, PlayerGradientSetting, SiteTheme, ShopItem, ShopPurchase, CursorTheme, Clan, ClanMember, Tournament, TournamentParticipant, PlayerActiveBooster, AdminCustomRole, PlayerAdminRole, Badge, PlayerBadge
+    # Ensure instance directory exists for SQLite
+    instance_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+    os.makedirs(instance_dir, exist_ok=True)
 
-    try:
-        # Always recreate tables to ensure schema is up to date
-        app.logger.info("Updating database schema...")
-        db.drop_all()
-        db.create_all()
-
-        # Test database connection
-        db.session.execute(db.text('SELECT 1')).fetchone()
-
-        # Initialize default data
-        try:
-            if SiteTheme.query.count() == 0:
-                SiteTheme.create_default_themes()
-        except:
-            pass
-
-        try:
-            if Quest.query.count() == 0:
-                Quest.create_default_quests()
-        except:
-            pass
-
-        try:
-            if Achievement.query.count() == 0:
-                Achievement.create_default_achievements()
-        except:
-            pass
-
-        try:
-            if CustomTitle.query.count() == 0:
-                CustomTitle.create_default_titles()
-        except:
-            pass
-
-        try:
-            if GradientTheme.query.count() == 0:
-                GradientTheme.create_default_themes()
-        except:
-            pass
-
-        try:
-            if CursorTheme.query.count() == 0:
-                CursorTheme.create_default_cursors()
-        except:
-            pass
-
-        try:
-            if ShopItem.query.count() == 0:
-                ShopItem.create_default_items()
-        except:
-            pass
-
-        try:
-            if Badge.query.count() == 0:
-                Badge.create_default_badges()
-        except:
-            pass
-
-        app.logger.info("Database initialized successfully!")
-
-    except Exception as e:
-        app.logger.error(f"Database initialization error: {e}")
-        # Continue anyway - errors will be handled in routes
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url or f'sqlite:///{os.path.join(instance_dir, "bedwars_leaderboard.db")}'
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config["SQLALCHEMY_BINDS"] = replica_binds(os.environ.get('DATABASE_REPLICA_URL'))
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config['BOT_API_TOKEN'] = os.environ.get('BOT_API_TOKEN')  # Discord bot's bearer token for write endpoints
 
-if __name__ == '__main__':
+    app.add_template_filter(unique_filter, 'unique')
+    app.add_template_filter(hex_to_rgb_filter, 'hex_to_rgb')
+
+    # Initialize the app with the extension
+    db.init_app(app)
+
+    # Register translation filter
+    from translations import register_translation_filter
+    register_translation_filter(app)
+
+    from response_cache import register_response_cache
+    register_response_cache(app)
+
+    from assets import register_assets
+    register_assets(app)
+
+    return app
+
+def register_blueprints(app):
+    """Attach the route modules
+
+    The JSON API is a blueprint and goes first: it has always won over the
+    duplicate /shop/purchase rule in routes.py. The page routes still bind to
+    the module-level app (templates use their endpoint names without a
+    blueprint prefix).
+    """
+    from api_routes import api
+    app.register_blueprint(api)
+
+    import routes  # noqa: F401
+
+def dispose_engines(app):
+    """Drop pooled connections inherited from a parent process (gunicorn post_fork)"""
     with app.app_context():
-        db.create_all()
-        print("🏗️ Database initialized successfully!")
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+app = create_app()
+register_blueprints(app)
+
+# Time-to-first-request budget: imports and route registration, no database I/O.
+# `python bench_startup.py` breaks it down per module.
+app.config['STARTUP_SECONDS'] = time.perf_counter() - startup_started_at
+app.logger.info(f"Application ready in {app.config['STARTUP_SECONDS']:.2f}s (pid {os.getpid()})")
+
+if __name__ == '__main__':
+    from migrate import upgrade_database
+    from seeds import seed_database
+    upgrade_database()
+    seed_database()
 
     port = int(os.environ.get('PORT', 5000))
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
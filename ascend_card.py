@@ -0,0 +1,225 @@
+"""
+ASCEND performance card rendering
+
+render_card_png() draws one 800x600 PNG card from the player's nickname and
+an ascend-data dict (the /api/player/<id>/ascend-data payload). Fonts are
+loaded once per process and the static part of the card (background, header,
+empty score bars) is drawn once and copied for each card.
+
+AscendCardRenderer runs that drawing in a worker pool so the Discord event
+loop never blocks on PIL, and keeps the finished PNGs in a small LRU keyed by
+(player_id, gamemode, updated_at): a card is only redrawn after its ASCEND
+data changes. Concurrent requests for the same card share one render.
+
+card_file() is the website's side: it stores each card on disk under the hash
+of what it draws (content-addressed), so /api/player/<id>/ascend-card.png
+renders a card once per change and answers revalidations with a 304. Stored
+cards are pruned least recently used first once there are more than
+ASCEND_CARD_DIR_MAX of them.
+
+    ASCEND_CARD_DIR           on-disk card cache (default instance/ascend_cards)
+    ASCEND_CARD_DIR_MAX       cards kept on disk (default 2000)
+    ASCEND_CARD_WORKERS       render workers (default 2)
+    ASCEND_CARD_PROCESSES     1 to render in a process pool instead of threads
+    ASCEND_CARD_CACHE_SIZE    rendered cards kept in memory (default 256)
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+ASCEND_CARD_WORKERS = int(os.environ.get('ASCEND_CARD_WORKERS', 2))
+ASCEND_CARD_PROCESSES = os.environ.get('ASCEND_CARD_PROCESSES', '0') == '1'
+ASCEND_CARD_CACHE_SIZE = int(os.environ.get('ASCEND_CARD_CACHE_SIZE', 256))
+ASCEND_CARD_DIR = os.environ.get('ASCEND_CARD_DIR', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'instance', 'ascend_cards'))
+ASCEND_CARD_DIR_MAX = int(os.environ.get('ASCEND_CARD_DIR_MAX', 2000))
+# A served card's mtime is refreshed at most this often (it orders pruning)
+CARD_TOUCH_INTERVAL = 3600
+
+# Bump when render_card_png draws differently, so stored cards are not reused
+CARD_VERSION = 1
+
+CARD_SIZE = (800, 600)
+CARD_BACKGROUND = '#1a1a2e'
+FONT_FILES = (
+    ('/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf',
+     '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf'),
+    ('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+     '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'),
+)
+DEFAULT_SKILLS = ('PVP', 'Clutching', 'Block Placement', 'Gamesense')
+
+BAR_X, BAR_WIDTH, BAR_HEIGHT = 250, 300, 20
+SKILLS_TOP, SKILL_STEP = 150, 80
+
+@lru_cache(maxsize=1)
+def load_fonts():
+    """(large, medium, small) fonts, read from disk once per process"""
+    for bold, regular in FONT_FILES:
+        try:
+            return (ImageFont.truetype(bold, 36), ImageFont.truetype(regular, 24),
+                    ImageFont.truetype(regular, 18))
+        except OSError:
+            continue
+    print("Шрифты Liberation не найдены, используется шрифт по умолчанию.")
+    default = ImageFont.load_default()
+    return default, default, default
+
+@lru_cache(maxsize=1)
+def card_background():
+    """Background, title and empty score bars: everything that is the same on every card"""
+    font_large = load_fonts()[0]
+    img = Image.new('RGB', CARD_SIZE, CARD_BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    draw.text((400, 30), "ASCEND Performance Card", fill='#ffd700', font=font_large, anchor='mt')
+    for i in range(4):
+        bar_y = SKILLS_TOP + i * SKILL_STEP + 5
+        draw.rectangle([BAR_X, bar_y, BAR_X + BAR_WIDTH, bar_y + BAR_HEIGHT], fill='#333333')
+    return img
+
+def card_skills(ascend):
+    return [(ascend.get(f'skill{i}_name') or DEFAULT_SKILLS[i - 1], ascend.get(f'skill{i}_score', 25))
+            for i in range(1, 5)]
+
+def render_card_png(nickname, ascend):
+    """Draw one card; returns PNG bytes"""
+    font_large, font_medium, font_small = load_fonts()
+    img = card_background().copy()
+    draw = ImageDraw.Draw(img)
+
+    draw.text((400, 80), f"{nickname}", fill='white', font=font_medium, anchor='mt')
+
+    skills = card_skills(ascend)
+    for i, (skill_name, score) in enumerate(skills):
+        y = SKILLS_TOP + i * SKILL_STEP
+        draw.text((50, y), f"{skill_name}:", fill='white', font=font_medium)
+
+        bar_y = y + 5
+        color = '#ff4757' if score < 40 else '#ffa502' if score < 70 else '#2ed573'
+        draw.rectangle([BAR_X, bar_y, BAR_X + (score / 100) * BAR_WIDTH, bar_y + BAR_HEIGHT], fill=color)
+        draw.text((BAR_X + BAR_WIDTH + 20, y), f"{score}/100", fill='white', font=font_small)
+
+    overall_tier = ascend.get('overall_tier', 'D')
+    draw.text((400, 500), f"Overall Tier: {overall_tier}", fill='#ffd700', font=font_large, anchor='mt')
+
+    avg_score = sum(skill[1] for skill in skills) / 4
+    draw.text((400, 550), f"Average Score: {avg_score:.1f}", fill='#48dbfb', font=font_medium, anchor='mt')
+
+    output = io.BytesIO()
+    img.save(output, format='PNG', compress_level=3)
+    return output.getvalue()
+
+def card_key(player_id, nickname, ascend):
+    """Cache key: a card only changes when its ASCEND data (or the player's name) does"""
+    return (player_id, ascend.get('gamemode'), ascend.get('updated_at'), nickname,
+            tuple(name for name, _ in card_skills(ascend)))
+
+def card_fingerprint(nickname, ascend):
+    """Content address of a card: a hash of exactly what render_card_png draws"""
+    material = json.dumps([CARD_VERSION, nickname, card_skills(ascend), ascend.get('overall_tier', 'D')],
+                          ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
+
+def card_file(nickname, ascend, card_dir=None):
+    """(fingerprint, path) of the stored card PNG, rendering it on first use"""
+    card_dir = card_dir or ASCEND_CARD_DIR
+    digest = card_fingerprint(nickname, ascend)
+    path = os.path.join(card_dir, f'{digest}.png')
+    try:
+        modified_at = os.stat(path).st_mtime
+    except FileNotFoundError:
+        os.makedirs(card_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=card_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(render_card_png(nickname, ascend))
+        os.replace(tmp_path, path)  # atomic: concurrent workers never serve half a file
+        prune_card_dir(card_dir, keep=path)
+    else:
+        if modified_at < time.time() - CARD_TOUCH_INTERVAL:
+            try:
+                os.utime(path)  # still in use: keep it out of the next prune
+            except FileNotFoundError:
+                pass
+    return digest, path
+
+def prune_card_dir(card_dir, max_files=None, keep=None):
+    """Delete the least recently used stored cards beyond max_files; returns how many were deleted"""
+    max_files = max_files or ASCEND_CARD_DIR_MAX
+    cards = []
+    with os.scandir(card_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.png') and entry.path != keep:
+                try:
+                    cards.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+    excess = len(cards) + (keep is not None) - max_files
+    if excess <= 0:
+        return 0
+
+    cards.sort()
+    deleted = 0
+    for _, path in cards[:excess]:
+        try:
+            os.remove(path)  # another worker may be pruning too
+            deleted += 1
+        except FileNotFoundError:
+            continue
+    return deleted
+
+class AscendCardRenderer:
+    """Renders cards off the event loop and caches the PNG bytes"""
+
+    def __init__(self, workers=ASCEND_CARD_WORKERS, processes=ASCEND_CARD_PROCESSES,
+                 cache_size=ASCEND_CARD_CACHE_SIZE):
+        self.workers = workers
+        self.processes = processes
+        self.cache_size = cache_size
+        self._executor = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+
+    def _get_executor(self):
+        if self._executor is None:
+            pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.workers)
+        return self._executor
+
+    async def render(self, player_id, nickname, ascend):
+        """PNG bytes of the player's card, from the cache when the data hasn't changed"""
+        key = card_key(player_id, nickname, ascend)
+        png = self._cache.get(key)
+        if png is not None:
+            self._cache.move_to_end(key)
+            return png
+
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), render_card_png, nickname, dict(ascend))
+            self._inflight[key] = future
+        try:
+            png = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+
+        self._cache[key] = png
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return png
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._cache.clear()
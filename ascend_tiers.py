@@ -0,0 +1,40 @@
+"""
+ASCEND tier thresholds and colours
+
+Shared by the models (tiers derived from scores), the card renderer and the
+Discord bot. Kept apart from ascend_card so that importing them does not load
+PIL.
+"""
+
+def calculate_tier_from_score(score):
+    """Calculate tier based on score"""
+    if score >= 95:
+        return 'S+'
+    elif score >= 90:
+        return 'S'
+    elif score >= 85:
+        return 'A+'
+    elif score >= 80:
+        return 'A'
+    elif score >= 75:
+        return 'B+'
+    elif score >= 70:
+        return 'B'
+    elif score >= 65:
+        return 'C+'
+    elif score >= 60:
+        return 'C'
+    else:
+        return 'D'
+
+TIER_COLORS = {
+    'S+': 0xff1744, 'S': 0xff5722,
+    'A+': 0xff9800, 'A': 0xffc107,
+    'B+': 0x4caf50, 'B': 0x2196f3,
+    'C+': 0x9c27b0, 'C': 0x607d8b,
+    'D': 0x795548
+}
+
+def tier_color(tier):
+    """Embed colour of a tier"""
+    return TIER_COLORS.get(tier, 0x607d8b)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Static asset pipeline
+
+    python assets.py            # build static/dist and its manifest (release step)
+
+Minifies the CSS/JS bundles, writes them under a content-hashed name with
+.gz/.br siblings, and records the mapping in static/dist/manifest.json.
+Templates link them with asset_url('css/style.css'); /assets/ serves the
+hashed files, precompressed when the client accepts it, with a one-year
+immutable Cache-Control. Without a manifest (development) asset_url falls
+back to the plain /static/ file.
+
+Uploaded role emojis are resized, re-encoded and stored under their content
+hash in static/emojis, so identical uploads share one file.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import sys
+
+from flask import request, send_from_directory, url_for
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(PROJECT_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+EMOJI_DIR = os.path.join(STATIC_DIR, 'emojis')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+ASSET_SOURCES = ('css/style.css', 'js/i18n.js', 'js/main.js')
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+EMOJI_MAX_BYTES = 256 * 1024
+EMOJI_MAX_SIZE = 128  # px, longest side
+EMOJI_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif'}
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+CSS_SPACE_AFTER_COLON = re.compile(r':\s+')
+JS_LINE_COMMENT = re.compile(r'^\s*//.*$')
+
+def minify_css(source):
+    """Strip comments and collapse whitespace (selectors keep their descendant spaces)"""
+    css = CSS_COMMENT.sub('', source)
+    css = re.sub(r'\s+', ' ', css)
+    css = CSS_SPACE_AROUND.sub(r'\1', css)
+    css = CSS_SPACE_AFTER_COLON.sub(':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(source):
+    """Line-preserving minification: drop indentation, blank lines and whole-line comments
+
+    Lines are never joined, so automatic semicolon insertion behaves exactly as
+    in the source; a full minifier would need a JS parser this stack doesn't ship.
+    """
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not JS_LINE_COMMENT.match(line)) + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def _write_compressed(path, data):
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+
+def build_assets(static_dir=STATIC_DIR, dist_dir=DIST_DIR, sources=ASSET_SOURCES):
+    """Minify, fingerprint and precompress every source; returns the manifest"""
+    manifest = {}
+    for source in sources:
+        base, ext = os.path.splitext(source)
+        with open(os.path.join(static_dir, source), encoding='utf-8') as f:
+            content = MINIFIERS[ext](f.read()).encode('utf-8')
+
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        hashed = f'{base}.{digest}{ext}'
+        path = os.path.join(dist_dir, hashed)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(content)
+            _write_compressed(path, content)
+        manifest[source] = hashed
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _send_immutable(directory, filename):
+    """Send a never-changing file, preferring a precompressed sibling"""
+    accepted = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding] and os.path.isfile(os.path.join(directory, filename + suffix)):
+            response = send_from_directory(directory, filename + suffix, max_age=ASSET_MAX_AGE)
+            response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, max_age=ASSET_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def register_assets(app):
+    """asset_url() for templates, /assets/ for the hashed bundles and uploaded emojis"""
+    manifest = load_manifest()
+
+    def asset_url(filename):
+        """URL of the fingerprinted build of a static file (plain /static/ without a build)"""
+        hashed = manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('asset', filename=hashed)
+
+    def asset(filename):
+        return _send_immutable(DIST_DIR, filename)
+
+    def emoji_asset(filename):
+        return _send_immutable(EMOJI_DIR, filename)
+
+    app.add_template_global(asset_url, 'asset_url')
+    app.add_url_rule('/assets/<path:filename>', 'asset', asset)
+    app.add_url_rule('/assets/emojis/<path:filename>', 'emoji_asset', emoji_asset)
+    app.config['ASSET_MANIFEST'] = manifest
+
+def store_emoji(file_storage, emoji_dir=EMOJI_DIR):
+    """Validate, shrink and store an uploaded emoji; returns (filename, is_animated)
+
+    Raises ValueError with a user-facing message when the upload is rejected.
+    Static images become PNGs of at most EMOJI_MAX_SIZE px; animated GIF/WebP
+    keep their frames (resized when Pillow can). The filename is the content
+    hash, so re-uploading the same image reuses the stored file.
+    """
+    name = file_storage.filename or ''
+    ext = name.rsplit('.', 1)[1].lower() if '.' in name else ''
+    if ext not in EMOJI_EXTENSIONS:
+        raise ValueError('Неподдерживаемый формат файла! Разрешены: PNG, JPG, GIF, WEBP, AVIF')
+
+    data = file_storage.read(EMOJI_MAX_BYTES + 1)
+    if len(data) > EMOJI_MAX_BYTES:
+        raise ValueError('Файл слишком большой! Максимум 256KB')
+
+    is_animated = ext == 'gif'
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    if Image is not None:
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except Exception:
+            raise ValueError('Файл не является изображением!')
+
+        is_animated = getattr(image, 'is_animated', False)
+        output = io.BytesIO()
+        if is_animated:
+            ext = 'gif' if image.format == 'GIF' else 'webp'
+            frames, durations = [], []
+            for index in range(image.n_frames):
+                image.seek(index)
+                frame = image.convert('RGBA')
+                frame.thumbnail((EMOJI_MAX_SIZE, EMOJI_MAX_SIZE))
+                frames.append(frame)
+                durations.append(image.info.get('duration', 100))
+            frames[0].save(output, format=ext.upper(), save_all=True, append_images=frames[1:],
+                           duration=durations, loop=image.info.get('loop', 0), disposal=2)
+        else:
+            ext = 'png'
+            image = image.convert('RGBA')
+            image.thumbnail((EMOJI_MAX_SIZE, EMOJI_MAX_SIZE))
+            image.save(output, format='PNG', optimize=True)
+        data = output.getvalue()
+
+    filename = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+    path = os.path.join(emoji_dir, filename)
+    if not os.path.exists(path):
+        os.makedirs(emoji_dir, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    return filename, is_animated
+
+if __name__ == '__main__':
+    print("🎨 Building static assets...")
+    try:
+        manifest = build_assets()
+    except OSError as e:
+        print(f"❌ Asset build failed: {e}")
+        sys.exit(1)
+
+    for source, hashed in sorted(manifest.items()):
+        original = os.path.getsize(os.path.join(STATIC_DIR, source))
+        built = os.path.join(DIST_DIR, hashed)
+        sizes = f"{original / 1024:.1f} KB -> {os.path.getsize(built) / 1024:.1f} KB"
+        for suffix in ('.gz', '.br'):
+            if os.path.exists(built + suffix):
+                sizes += f", {suffix[1:]} {os.path.getsize(built + suffix) / 1024:.1f} KB"
+        print(f"✅ {source} -> dist/{hashed} ({sizes})")
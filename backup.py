@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Streaming, versioned database backup format (NDJSON)
+
+Every line is a JSON object:
+  {"type": "header", "format": ..., "version": ..., "created_at": ..., "tables": [...]}
+  {"type": "table", "name": ..., "columns": [...]}
+  {"type": "rows", "table": ..., "rows": [[...], ...]}   # one line per chunk
+  {"type": "end", "table": ..., "count": ...}
+  {"type": "footer", "counts": {...}}
+
+Tables are written in foreign key dependency order so an import can replay them
+as they come. Rows are read with server-side cursors, so memory use does not
+grow with the size of the database.
+
+Imports read the file as a stream (the legacy version 1 JSON document too, via
+ijson when it is installed) and insert rows in chunks. Existing rows are matched
+on their natural keys, prefetched once per table, and primary keys are remapped
+so foreign keys of the imported rows keep pointing at the right parents.
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+import threading
+import zlib
+from datetime import datetime, date
+
+try:
+    import ijson
+except ImportError:  # Legacy JSON files are then parsed in one go
+    ijson = None
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine_config import use_offline_settings
+
+if __name__ == '__main__':
+    use_offline_settings()  # long batch statements; the request timeout does not apply
+
+from app import app, db
+
+BACKUP_FORMAT = 'bedwars-leaderboard-ndjson'
+BACKUP_VERSION = 2  # Version 1 is the legacy single JSON document
+BACKUP_CHUNK_SIZE = 1000
+BACKUP_EXCLUDED_TABLES = {'database_import_job', 'seed_version', 'change_event'}
+IMPORT_CHUNK_SIZE = 1000
+
+# Natural keys (column tuples) for tables without a unique constraint; unique columns and
+# constraints are used as well. A merge import refuses tables that have none.
+IMPORT_NATURAL_KEYS = {
+    'quest': [('title',)],
+    'achievement': [('title',)],
+    'tournament': [('name', 'start_date')],
+    'ascend_history': [('player_id', 'gamemode', 'created_at')],
+    'reputation_log': [('player_id', 'created_at', 'change_amount')],
+    'shop_purchase': [('player_id', 'item_id', 'purchased_at')],
+    'player_purchase': [('player_id', 'item_id', 'purchased_at')],
+    'player_quest': [('player_id', 'quest_id')],
+    'player_achievement': [('player_id', 'achievement_id')],
+    'player_admin_role': [('player_id', 'role_id')],
+    'player_title': [('player_id', 'title_id')],
+    'player_gradient_setting': [('player_id', 'element_type')],
+    'player_skill_rating': [('player_id',)],
+    'player_active_booster': [('player_id', 'booster_type', 'started_at')],
+    'player_booster': [('player_id', 'booster_type', 'activated_at')],
+    'quest_submission': [('player_id', 'quest_id', 'created_at')],
+    'clan_member': [('clan_id', 'player_id')],
+    'tournament_participant': [('tournament_id', 'player_id')]
+}
+
+# Top-level sections of the legacy (version 1) export and their tables
+LEGACY_SECTIONS = (
+    ('players', 'player'),
+    ('quests', 'quest'),
+    ('achievements', 'achievement'),
+    ('custom_titles', 'custom_title'),
+    ('gradient_themes', 'gradient_theme'),
+    ('shop_items', 'shop_item')
+)
+
+def _encode_value(value):
+    """JSON encoder for column values that json does not handle natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+def _line(record):
+    return (json.dumps(record, ensure_ascii=False, default=_encode_value, separators=(',', ':')) + '\n').encode('utf-8')
+
+def backup_tables():
+    """All model tables in foreign key dependency order"""
+    import models  # noqa: F401 - registers every model on db.metadata
+    return [table for table in db.metadata.sorted_tables if table.name not in BACKUP_EXCLUDED_TABLES]
+
+def generate_backup(chunk_size=BACKUP_CHUNK_SIZE):
+    """Yield the backup as NDJSON byte lines; needs an application context"""
+    tables = backup_tables()
+    yield _line({
+        'type': 'header',
+        'format': BACKUP_FORMAT,
+        'version': BACKUP_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'dialect': db.engine.dialect.name,
+        'tables': [table.name for table in tables]
+    })
+
+    counts = {}
+    for table in tables:
+        columns = [column.name for column in table.columns]
+        yield _line({'type': 'table', 'name': table.name, 'columns': columns})
+
+        count = 0
+        order_by = list(table.primary_key.columns) or list(table.columns)
+        stmt = db.select(table).order_by(*order_by).execution_options(yield_per=chunk_size)
+        for rows in db.session.execute(stmt).partitions():
+            count += len(rows)
+            yield _line({'type': 'rows', 'table': table.name, 'rows': [list(row) for row in rows]})
+
+        counts[table.name] = count
+        yield _line({'type': 'end', 'table': table.name, 'count': count})
+
+    yield _line({'type': 'footer', 'counts': counts})
+
+def gzip_stream(chunks):
+    """Compress an iterable of byte chunks into a gzip stream incrementally"""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_backup(path, compress=None, chunk_size=BACKUP_CHUNK_SIZE):
+    """Write a backup archive to disk (gzip when the path ends with .gz)"""
+    if compress is None:
+        compress = path.endswith('.gz')
+
+    with app.app_context():
+        chunks = generate_backup(chunk_size=chunk_size)
+        if compress:
+            chunks = gzip_stream(chunks)
+        with open(path, 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+
+def _parse_datetime(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+def _parse_date(value):
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return value
+
+class BackupReader:
+    """Iterate a backup file (NDJSON or legacy JSON, optionally gzipped) as (table, rows) chunks"""
+
+    def __init__(self, path, chunk_size=IMPORT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.bytes_total = os.path.getsize(path)
+        self._raw = None
+        self.version, self.tables = self._read_header()
+
+    @property
+    def bytes_read(self):
+        """Position in the (possibly compressed) file, for progress reporting"""
+        if self._raw is None or self._raw.closed:
+            return self.bytes_total if self._raw is not None else 0
+        return self._raw.tell()
+
+    def _open(self):
+        self._raw = open(self.path, 'rb')
+        is_gzip = self._raw.read(2) == b'\x1f\x8b'
+        self._raw.seek(0)
+        return gzip.GzipFile(fileobj=self._raw, mode='rb') if is_gzip else self._raw
+
+    def _read_header(self):
+        stream = self._open()
+        try:
+            first_line = stream.readline()
+        finally:
+            stream.close()
+            self._raw.close()
+            self._raw = None
+
+        try:
+            header = json.loads(first_line)
+        except ValueError:
+            header = None
+
+        if isinstance(header, dict) and header.get('type') == 'header':
+            if header.get('format') != BACKUP_FORMAT or header.get('version', 0) > BACKUP_VERSION:
+                raise ValueError(f"Unsupported backup format: {header.get('format')} v{header.get('version')}")
+            return header['version'], header.get('tables', [])
+
+        return 1, [table_name for _, table_name in LEGACY_SECTIONS]
+
+    def __iter__(self):
+        stream = self._open()
+        try:
+            if self.version >= 2:
+                yield from self._iter_ndjson(stream)
+            else:
+                yield from self._iter_legacy(stream)
+        finally:
+            stream.close()
+            self._raw.close()
+
+    def _iter_ndjson(self, stream):
+        columns = {}
+        for line in io.TextIOWrapper(stream, encoding='utf-8'):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('type') == 'table':
+                columns[record['name']] = record['columns']
+            elif record.get('type') == 'rows':
+                names = columns[record['table']]
+                yield record['table'], [dict(zip(names, values)) for values in record['rows']]
+
+    def _iter_legacy(self, stream):
+        if ijson is None:
+            data = json.load(stream)
+            for section, table_name in LEGACY_SECTIONS:
+                rows = data.get(section) or []
+                for start in range(0, len(rows), self.chunk_size):
+                    yield table_name, rows[start:start + self.chunk_size]
+            return
+
+        # Build one object per array item so only a chunk of rows is ever in memory
+        item_prefixes = {f'{section}.item': table_name for section, table_name in LEGACY_SECTIONS}
+        builder, table_name, rows = None, None, []
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if builder is None:
+                if event == 'start_map' and prefix in item_prefixes:
+                    table_name = item_prefixes[prefix]
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                elif event == 'end_array' and rows and f'{prefix}.item' in item_prefixes:
+                    yield table_name, rows
+                    rows = []
+                continue
+
+            builder.event(event, value)
+            if event == 'end_map' and prefix in item_prefixes:
+                rows.append(builder.value)
+                builder = None
+                if len(rows) >= self.chunk_size:
+                    yield table_name, rows
+                    rows = []
+
+        if rows:
+            yield table_name, rows
+
+class BackupImporter:
+    """Replay a backup into the database chunk by chunk; needs an application context
+
+    With clear_existing the tables in the backup (and everything depending on
+    them) are emptied first and primary keys are kept. Otherwise rows matching
+    an existing natural key are skipped, new rows get fresh primary keys and
+    foreign keys are remapped accordingly.
+    """
+
+    def __init__(self, clear_existing=False, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+        self.tables = {table.name: table for table in backup_tables()}
+        self.clear_existing = clear_existing
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.reader = None
+        self.current_table = None
+        self.processed = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.id_maps = {}
+        self.existing_keys = {}
+        self.referenced = {fk.column.table.name for table in self.tables.values() for fk in table.foreign_keys}
+        self.bulk_returning = db.engine.dialect.insert_executemany_returning_sort_by_parameter_order
+
+    def run(self, path):
+        self.reader = BackupReader(path, chunk_size=self.chunk_size)
+        self.file_tables = {name for name in self.reader.tables if name in self.tables}
+
+        if self.clear_existing:
+            self._clear_tables()
+
+        for table_name, rows in self.reader:
+            table = self.tables.get(table_name)
+            if table is None:
+                continue
+            if table_name != self.current_table:
+                self._finish_table()
+                self.current_table = table_name
+            self._import_chunk(table, rows)
+            if self.progress:
+                self.progress(self)
+            db.session.commit()
+
+        self._finish_table()
+        self.current_table = None
+        if self.progress:
+            self.progress(self)
+        db.session.commit()
+        return self.inserted, self.skipped
+
+    def _clear_tables(self):
+        """Delete the backed up tables and their dependents, children first"""
+        selected = set(self.file_tables)
+        for table in self.tables.values():  # dependency order, parents first
+            if any(fk.column.table.name in selected for fk in table.foreign_keys):
+                selected.add(table.name)
+        for table in reversed(list(self.tables.values())):
+            if table.name in selected:
+                db.session.execute(table.delete())
+        db.session.commit()
+
+    def _finish_table(self):
+        """Move PostgreSQL sequences past primary keys restored verbatim"""
+        if not self.clear_existing or self.current_table is None or db.engine.dialect.name != 'postgresql':
+            return
+        table = self.tables[self.current_table]
+        pk = self._primary_key(table)
+        if pk is not None:
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', '{pk}'), "
+                f"COALESCE((SELECT MAX({pk}) FROM {table.name}), 1))"
+            ))
+
+    @staticmethod
+    def _primary_key(table):
+        columns = list(table.primary_key.columns)
+        return columns[0].name if len(columns) == 1 else None
+
+    @staticmethod
+    def _natural_keys(table):
+        """Column tuples identifying a row: configured keys, unique columns and unique constraints"""
+        keys = list(IMPORT_NATURAL_KEYS.get(table.name, []))
+        keys += [(column.name,) for column in table.columns if column.unique and not column.primary_key]
+        keys += [tuple(column.name for column in constraint.columns) for constraint in table.constraints
+                 if isinstance(constraint, db.UniqueConstraint)]
+        return list(dict.fromkeys(keys))
+
+    @staticmethod
+    def _key_value(row, key):
+        """The row's values for a natural key, or None when one of them is missing"""
+        value = tuple(row.get(column) for column in key)
+        return None if None in value else value
+
+    def _existing(self, table, pk, natural_keys):
+        """Natural key -> {values: primary key} maps, prefetched once per table"""
+        if table.name not in self.existing_keys:
+            maps = {}
+            for key in natural_keys:
+                columns = [table.c[column] for column in key]
+                rows = db.session.execute(db.select(*columns, table.c[pk]) if pk else db.select(*columns))
+                maps[key] = {tuple(row[:len(key)]): (row[-1] if pk else None) for row in rows}
+            self.existing_keys[table.name] = maps
+        return self.existing_keys[table.name]
+
+    def _lookup_id(self, table, pk, key, value):
+        """Primary key of the existing row with this natural key (after an insert conflict)"""
+        condition = db.and_(*(table.c[column] == part for column, part in zip(key, value)))
+        return db.session.execute(db.select(table.c[pk]).where(condition)).scalar()
+
+    def _decode(self, table, row):
+        values = {}
+        for name, value in row.items():
+            column = table.columns.get(name)
+            if column is None:
+                continue  # Column dropped since the backup was taken
+            if isinstance(column.type, db.DateTime):
+                value = _parse_datetime(value)
+            elif isinstance(column.type, db.Date):
+                value = _parse_date(value)
+            values[name] = value
+        return values
+
+    def _remap_foreign_keys(self, table, row):
+        """Point foreign keys at the new primary keys; False if a required parent is missing"""
+        for fk in table.foreign_keys:
+            name, target = fk.parent.name, fk.column.table.name
+            if target not in self.file_tables or row.get(name) is None:
+                continue
+            mapped = self.id_maps.get(target, {}).get(row[name])
+            if mapped is None and not fk.parent.nullable:
+                return False
+            row[name] = mapped
+        return True
+
+    def _import_chunk(self, table, rows):
+        pk = self._primary_key(table)
+        natural_keys = self._natural_keys(table)
+        remap = not self.clear_existing
+        if remap and not natural_keys:
+            raise ValueError(f"Table {table.name} has no natural key and cannot be merged; import with clear_existing")
+        existing = self._existing(table, pk, natural_keys)
+        id_map = self.id_maps.setdefault(table.name, {})
+        needs_ids = remap and pk is not None and table.name in self.referenced
+
+        pending, duplicates = [], []
+        for row in rows:
+            row = self._decode(table, row)
+            self.processed += 1
+
+            if remap:
+                if not self._remap_foreign_keys(table, row):
+                    self.skipped += 1
+                    continue
+                source_id = row.pop(pk, None) if pk else None
+            else:
+                source_id = row.get(pk) if pk else None
+                if pk and source_id is None:
+                    row.pop(pk, None)
+
+            values = {key: self._key_value(row, key) for key in natural_keys}
+            match = next((key for key in natural_keys if values[key] is not None and values[key] in existing[key]), None)
+            if match is not None:
+                if source_id is not None:
+                    duplicates.append((source_id, match, values[match]))
+                self.skipped += 1
+                continue
+
+            for key in natural_keys:
+                if values[key] is not None:
+                    existing[key][values[key]] = source_id if not remap else None
+            pending.append((source_id, row))
+
+        if pending:
+            new_ids = self._insert(table, [row for _, row in pending], returning=needs_ids, natural_keys=natural_keys)
+            for (source_id, row), new_id in zip(pending, new_ids):
+                if needs_ids and new_id is None:
+                    # Inserted concurrently since the prefetch: reuse the row that won
+                    key = next((key for key in natural_keys if self._key_value(row, key) is not None), None)
+                    new_id = key and self._lookup_id(table, pk, key, self._key_value(row, key))
+                if remap and new_id is not None:
+                    for key in natural_keys:
+                        if self._key_value(row, key) is not None:
+                            existing[key][self._key_value(row, key)] = new_id
+                if source_id is not None:
+                    id_map[source_id] = new_id if remap else source_id
+
+        for source_id, key, value in duplicates:
+            id_map[source_id] = existing[key][value]
+
+    def _insert_statement(self, table):
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            return table.insert()
+        return insert(table).on_conflict_do_nothing()
+
+    def _insert(self, table, rows, returning, natural_keys=()):
+        """Insert rows in executemany batches; returns the new primary keys when asked
+
+        Rows that conflict with an existing row are skipped (their key is None).
+        With RETURNING the new keys are matched back to the rows by natural key,
+        since skipped rows return nothing.
+        """
+        # executemany needs the same keys in every parameter set
+        groups = {}
+        for index, row in enumerate(rows):
+            groups.setdefault(tuple(sorted(row)), []).append(index)
+
+        new_ids = [None] * len(rows)
+        for indexes in groups.values():
+            group = [rows[index] for index in indexes]
+            if returning:
+                pk = table.c[self._primary_key(table)]
+                key = next((key for key in natural_keys
+                            if all(self._key_value(row, key) is not None for row in group)), None)
+                if key is None:
+                    stmt = table.insert().returning(pk, sort_by_parameter_order=True)
+                    if self.bulk_returning:
+                        ids = db.session.execute(stmt, group).scalars().all()
+                    else:
+                        ids = [db.session.execute(stmt, row).scalar_one() for row in group]
+                else:
+                    stmt = self._insert_statement(table).returning(pk, *(table.c[column] for column in key))
+                    if self.bulk_returning:
+                        returned = db.session.execute(stmt, group).all()
+                    else:
+                        returned = [result for row in group for result in db.session.execute(stmt, row).all()]
+                    by_key = {tuple(result[1:]): result[0] for result in returned}
+                    ids = [by_key.get(self._key_value(row, key)) for row in group]
+                for index, new_id in zip(indexes, ids):
+                    new_ids[index] = new_id
+                inserted = sum(new_id is not None for new_id in ids)
+                self.inserted += inserted
+                self.skipped += len(group) - inserted
+            else:
+                result = db.session.execute(self._insert_statement(table), group)
+                inserted = result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(group)
+                self.inserted += inserted
+                self.skipped += len(group) - inserted
+        return new_ids
+
+def import_backup(path, clear_existing=False, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Import a backup file; needs an application context. Returns (inserted, skipped)"""
+    return BackupImporter(clear_existing=clear_existing, chunk_size=chunk_size, progress=progress).run(path)
+
+def run_import_job(job_id, path):
+    """Run a DatabaseImportJob to completion, recording progress on the job row"""
+    from models import DatabaseImportJob, Player, GameMode, SiteTheme
+
+    with app.app_context():
+        job = db.session.get(DatabaseImportJob, job_id)
+        job.status = 'running'
+        job.started_at = job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        def report(importer):
+            job.backup_version = importer.reader.version
+            job.current_table = importer.current_table
+            job.bytes_read = importer.reader.bytes_read
+            job.processed_rows = importer.processed
+            job.inserted_rows = importer.inserted
+            job.skipped_rows = importer.skipped
+            job.updated_at = datetime.utcnow()  # heartbeat, committed with the batch
+
+        try:
+            import_backup(path, clear_existing=job.clear_existing, progress=report)
+            job.status = 'completed'
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Error importing database: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = job.updated_at = datetime.utcnow()
+            db.session.commit()
+            Player.clear_statistics_cache()
+            GameMode.invalidate_skill_registry()
+            SiteTheme.invalidate_theme_map()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def start_import_job(job, path):
+    """Run the import in a background thread so the request returns immediately"""
+    thread = threading.Thread(target=run_import_job, args=(job.id, path), name=f'import-db-{job.id}', daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export or import the database as a streaming NDJSON backup')
+    parser.add_argument('-i', '--input', help='import this backup file instead of exporting')
+    parser.add_argument('--clear-existing', action='store_true', help='empty the imported tables first')
+    parser.add_argument('-o', '--output',
+                        default=f'bedwars_database_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.ndjson.gz',
+                        help='output file (.gz is compressed)')
+    parser.add_argument('--chunk-size', type=int, default=BACKUP_CHUNK_SIZE, help='rows per chunk line')
+    args = parser.parse_args()
+
+    if args.input:
+        with app.app_context():
+            inserted, skipped = import_backup(args.input, clear_existing=args.clear_existing)
+        print(f"✅ Imported {inserted} rows from {args.input} ({skipped} skipped)")
+        sys.exit(0)
+
+    export_backup(args.output, chunk_size=args.chunk_size)
+    print(f"✅ Backup written to {args.output}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+ASCEND card rendering benchmark
+
+    python bench_ascend_cards.py                    # 200 cards, 2 workers
+    python bench_ascend_cards.py --cards 500 --workers 4 --processes
+
+Reports cards/sec for the old renderer (fonts and the whole card drawn on every
+call), for render_card_png (cached fonts and background), and for
+AscendCardRenderer with and without its PNG cache. Synthetic data, no network
+or database access.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from ascend_card import FONT_FILES, AscendCardRenderer, card_skills, render_card_png
+
+def legacy_render(nickname, ascend):
+    """The previous create_ascend_image body: fonts loaded and everything drawn per call"""
+    img = Image.new('RGB', (800, 600), '#1a1a2e')
+    draw = ImageDraw.Draw(img)
+    bold, regular = FONT_FILES[0]
+    try:
+        font_large = ImageFont.truetype(bold, 36)
+        font_medium = ImageFont.truetype(regular, 24)
+        font_small = ImageFont.truetype(regular, 18)
+    except OSError:
+        bold, regular = FONT_FILES[1]
+        font_large = ImageFont.truetype(bold, 36)
+        font_medium = ImageFont.truetype(regular, 24)
+        font_small = ImageFont.truetype(regular, 18)
+
+    draw.text((400, 30), "ASCEND Performance Card", fill='#ffd700', font=font_large, anchor='mt')
+    draw.text((400, 80), nickname, fill='white', font=font_medium, anchor='mt')
+    skills = card_skills(ascend)
+    for i, (skill_name, score) in enumerate(skills):
+        y = 150 + i * 80
+        draw.text((50, y), f"{skill_name}:", fill='white', font=font_medium)
+        draw.rectangle([250, y + 5, 550, y + 25], fill='#333333')
+        color = '#ff4757' if score < 40 else '#ffa502' if score < 70 else '#2ed573'
+        draw.rectangle([250, y + 5, 250 + score * 3, y + 25], fill=color)
+        draw.text((570, y), f"{score}/100", fill='white', font=font_small)
+    draw.text((400, 500), f"Overall Tier: {ascend['overall_tier']}", fill='#ffd700', font=font_large, anchor='mt')
+    draw.text((400, 550), f"Average Score: {sum(s for _, s in skills) / 4:.1f}", fill='#48dbfb',
+              font=font_medium, anchor='mt')
+    output = io.BytesIO()
+    img.save(output, format='PNG')
+    return output.getvalue()
+
+def synthetic_cards(count, distinct):
+    cards = []
+    for i in range(count):
+        player_id = i % distinct
+        ascend = {f'skill{n}_score': random.randint(0, 100) for n in range(1, 5)}
+        ascend.update(gamemode='bedwars', overall_tier='A', updated_at=f'2026-01-01T00:00:{player_id % 60:02d}')
+        cards.append((player_id, f'Player{player_id}', ascend))
+    return cards
+
+def time_sync(render, cards):
+    started_at = time.perf_counter()
+    for _, nickname, ascend in cards:
+        render(nickname, ascend)
+    return len(cards) / (time.perf_counter() - started_at)
+
+async def time_renderer(renderer, cards):
+    await renderer.render(*cards[0])  # start the workers
+    started_at = time.perf_counter()
+    await asyncio.gather(*(renderer.render(*card) for card in cards))
+    elapsed = time.perf_counter() - started_at
+    renderer.close()
+    return len(cards) / elapsed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure ASCEND card rendering throughput')
+    parser.add_argument('--cards', type=int, default=200, help='cards per mode')
+    parser.add_argument('--workers', type=int, default=2, help='render workers')
+    parser.add_argument('--processes', action='store_true', help='render in a process pool')
+    parser.add_argument('--distinct', type=int, default=20, help='distinct players in the cached run')
+    args = parser.parse_args()
+
+    unique = synthetic_cards(args.cards, args.cards)
+    repeated = synthetic_cards(args.cards, args.distinct)
+    pool = f"{args.workers} {'processes' if args.processes else 'threads'}"
+
+    print(f"🎨 Rendering {args.cards} ASCEND cards per mode")
+    results = [
+        ('legacy, on the event loop', time_sync(legacy_render, unique)),
+        ('cached fonts/background', time_sync(render_card_png, unique)),
+        (f'renderer, {pool}, all distinct',
+         asyncio.run(time_renderer(AscendCardRenderer(args.workers, args.processes, cache_size=0), unique))),
+        (f'renderer, {pool}, {args.distinct} players',
+         asyncio.run(time_renderer(AscendCardRenderer(args.workers, args.processes), repeated))),
+    ]
+    for name, rate in results:
+        print(f"   {name:>38}: {rate:9.1f} cards/sec")
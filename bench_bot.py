@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Discord bot load test: command callbacks against a stub website
+
+    python bench_bot.py                                  # 500 interactions, 50 at a time
+    python bench_bot.py --interactions 2000 --concurrency 200 --latency 80
+    python bench_bot.py --no-cache --local-cards         # uncached API, cards drawn by the bot
+
+Starts a local aiohttp server that mimics the website API (/api/search,
+/api/leaderboard, ascend-data, ascend-card.png) with configurable latency,
+points discord_bot at it and calls leaderboard_command, player_command,
+ascend_card and ASCENDView.gamemode_select with fake Interaction objects.
+No Discord connection is made. Reports p50/p99 latency per command, how long
+the event loop was blocked, and how many requests reached the website.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aiohttp import web
+
+GAMEMODES = ('bedwars', 'kitpvp', 'skywars', 'sumo')
+LAG_INTERVAL = 0.005
+LAG_BLOCKED = 0.005  # a tick this much late counts as blocked
+
+class StubWebsite:
+    """Just enough of the website API for the bot commands, with artificial latency"""
+
+    def __init__(self, players, latency, jitter, local_cards):
+        self.players = [self._player(i) for i in range(players)]
+        self.by_nickname = {p['nickname'].lower(): p for p in self.players}
+        self.latency = latency
+        self.jitter = jitter
+        self.local_cards = local_cards
+        self.requests = Counter()
+        self.card_png = None
+
+    @staticmethod
+    def _player(i):
+        return {'id': i + 1, 'nickname': f'Player{i + 1}', 'level': 10 + i % 90, 'experience': 100000 - i * 37,
+                'kills': 500 + i, 'deaths': 200 + i % 50, 'kd_ratio': 2.1, 'wins': 120, 'games_played': 300,
+                'beds_broken': 80, 'coins': 1000, 'reputation': 40, 'karma': 40}
+
+    async def _wait(self, route):
+        self.requests[route] += 1
+        await asyncio.sleep(max(0, self.latency + random.uniform(-self.jitter, self.jitter)) / 1000)
+
+    async def search(self, request):
+        await self._wait('/api/search')
+        player = self.by_nickname.get(request.query.get('q', '').lower())
+        return web.json_response({'success': True, 'players': [player] if player else []})
+
+    async def leaderboard(self, request):
+        await self._wait('/api/leaderboard')
+        limit = int(request.query.get('limit', 10))
+        return web.json_response({'success': True, 'players': self.players[:limit]})
+
+    async def ascend_data(self, request):
+        await self._wait('/api/player/<id>/ascend-data')
+        player_id = int(request.match_info['player_id'])
+        gamemode = request.query.get('gamemode', 'bedwars')
+        scores = [(player_id * 7 + slot * 13) % 100 for slot in range(1, 5)]
+        ascend = {'player_id': player_id, 'gamemode': gamemode, 'overall_tier': 'A',
+                  'updated_at': '2026-01-01T00:00:00', 'evaluator_name': 'Bench'}
+        for slot, score in enumerate(scores, 1):
+            ascend.update({f'skill{slot}_name': f'Skill {slot}', f'skill{slot}_score': score,
+                           f'skill{slot}_tier': 'B'})
+        return web.json_response({'success': True, 'ascend': ascend})
+
+    async def ascend_card(self, request):
+        await self._wait('/api/player/<id>/ascend-card.png')
+        if self.local_cards:
+            return web.json_response({'success': False}, status=404)
+        return web.Response(body=self.card_png, content_type='image/png')
+
+    async def stats(self, request):
+        await self._wait('/api/stats')
+        return web.json_response({'success': True, 'total_players': len(self.players)})
+
+    async def start(self):
+        from ascend_card import render_card_png
+        self.card_png = render_card_png('Player1', {'overall_tier': 'A'})
+
+        app = web.Application()
+        app.router.add_get('/api/search', self.search)
+        app.router.add_get('/api/leaderboard', self.leaderboard)
+        app.router.add_get('/api/player/{player_id}/ascend-data', self.ascend_data)
+        app.router.add_get('/api/player/{player_id}/ascend-card.png', self.ascend_card)
+        app.router.add_get('/api/stats', self.stats)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{port}'
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+        self.interaction.answered()
+
+    async def send_modal(self, modal):
+        self._done = True
+        self.interaction.answered()
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, *args, **kwargs):
+        self.interaction.answered(kwargs.get('ephemeral', False))
+
+class FakeInteraction:
+    """The parts of discord.Interaction the bot commands touch; records when it was answered"""
+
+    def __init__(self):
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.user = 'bench#0001'
+        self.guild = None
+        self.guild_id = None
+        self.started_at = time.perf_counter()
+        self.latency = None
+        self.failed = False
+
+    def answered(self, ephemeral=False):
+        if self.latency is None:
+            self.latency = time.perf_counter() - self.started_at
+            self.failed = ephemeral  # the commands answer errors ephemerally
+
+    async def edit_original_response(self, **kwargs):
+        self.answered()
+
+async def monitor_loop(stop, lags):
+    """Sample how late the event loop wakes a short sleep"""
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - started_at - LAG_INTERVAL))
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run(args):
+    stub = StubWebsite(args.players, args.latency, args.jitter, args.local_cards)
+    os.environ['WEBSITE_URL'] = await stub.start()
+    os.environ.setdefault('BOT_TOKEN', 'bench')
+    import discord_bot
+
+    bot = discord_bot.bot
+    await bot.api.start()
+    if args.no_cache:
+        bot.api.cache = None
+
+    nicknames = [player['nickname'] for player in stub.players]
+
+    def scenario():
+        kind = random.choices(('leaderboard', 'player', 'ascend', 'gamemode_select'), weights=(2, 3, 3, 2))[0]
+        nickname = random.choice(nicknames)
+        interaction = FakeInteraction()
+        if kind == 'leaderboard':
+            call = discord_bot.leaderboard_command.callback(interaction, sort_by='experience', limit=10)
+        elif kind == 'player':
+            call = discord_bot.player_command.callback(interaction, nickname=nickname)
+        elif kind == 'ascend':
+            call = discord_bot.ascend_card.callback(interaction, nickname=nickname,
+                                                     gamemode=random.choice(GAMEMODES), visual=True)
+        else:
+            player = stub.by_nickname[nickname.lower()]
+            view = discord_bot.ASCENDView(player['id'], nickname, 'bedwars')
+            view.gamemode_select._values = [random.choice(GAMEMODES)]
+            call = view.gamemode_select.callback(interaction)
+        return kind, interaction, call
+
+    latencies = defaultdict(list)
+    failures = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with semaphore:
+            kind, interaction, call = scenario()
+            interaction.started_at = time.perf_counter()
+            await call
+            interaction.answered()
+            latencies[kind].append(interaction.latency)
+            failures[kind] += interaction.failed
+
+    lags = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop(stop, lags))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.interactions)))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await monitor
+
+    cache_stats = bot.api.cache.stats() if bot.api.cache is not None else None
+    await bot.api.close()
+    bot.cards.close()
+    await stub.stop()
+    return latencies, failures, lags, stub.requests, elapsed, cache_stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test the Discord bot commands against a stub website')
+    parser.add_argument('--interactions', type=int, default=500, help='interactions to run')
+    parser.add_argument('--concurrency', type=int, default=50, help='interactions in flight at once')
+    parser.add_argument('--players', type=int, default=20, help='distinct nicknames looked up')
+    parser.add_argument('--latency', type=float, default=50, help='stub website latency in ms')
+    parser.add_argument('--jitter', type=float, default=10, help='latency jitter in ms')
+    parser.add_argument('--no-cache', action='store_true', help='disable the bot API cache')
+    parser.add_argument('--local-cards', action='store_true', help='stub has no card endpoint: the bot draws cards')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    print(f"🤖 {args.interactions} interactions, {args.concurrency} concurrent, "
+          f"website latency {args.latency:.0f}±{args.jitter:.0f} ms")
+    latencies, failures, lags, requests, elapsed, cache_stats = asyncio.run(run(args))
+
+    print(f"\n⏱️  Latency to first reply ({args.interactions / elapsed:.1f} interactions/sec)")
+    for kind, values in sorted(latencies.items()):
+        print(f"   {kind:>16}: n={len(values):5d}  p50 {statistics.median(values) * 1000:8.1f} ms  "
+              f"p99 {percentile(values, 0.99) * 1000:8.1f} ms  errors {failures[kind]}")
+
+    blocked = [lag for lag in lags if lag > LAG_BLOCKED]
+    print(f"\n🧵 Event loop: max lag {max(lags, default=0) * 1000:.1f} ms, p99 {percentile(lags or [0], 0.99) * 1000:.1f} ms, "
+          f"blocked {sum(blocked) * 1000:.0f} ms over {len(blocked)} ticks")
+
+    print(f"\n🌐 Website requests: {sum(requests.values())} "
+          f"({sum(requests.values()) / args.interactions:.2f} per interaction)")
+    for route, count in requests.most_common():
+        print(f"   {route:>32}: {count}")
+    if cache_stats:
+        print(f"   cache: {cache_stats}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Worker boot benchmark: import cost per module via `python -X importtime`
+
+    python bench_startup.py                   # report for `import app`
+    python bench_startup.py --budget-ms 1500  # exit 1 when the import is slower
+    python bench_startup.py --module discord_bot --top 30
+
+Each run uses a fresh interpreter, so the numbers are what a worker without
+preload_app pays. The budget can also come from STARTUP_BUDGET_MS.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+def measure_imports(module, runs=1):
+    """Import module in fresh interpreters; returns (wall seconds, {module: (self us, cumulative us, depth)})"""
+    best_wall, best_modules = None, None
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=PROJECT_DIR, capture_output=True, text=True
+        )
+        wall = time.perf_counter() - started_at
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+        modules = {}
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+
+        if best_wall is None or wall < best_wall:
+            best_wall, best_modules = wall, modules
+    return best_wall, best_modules
+
+def is_project_module(name):
+    top_level = name.split('.')[0]
+    return os.path.exists(os.path.join(PROJECT_DIR, f'{top_level}.py'))
+
+def print_report(module, wall, modules, top):
+    total_us = sum(cumulative for _, cumulative, depth in modules.values() if depth == 0)
+    project = sorted(((name, data) for name, data in modules.items() if is_project_module(name)),
+                     key=lambda item: item[1][0], reverse=True)
+    heaviest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:top]
+
+    print(f"⏱️ import {module}: {total_us / 1000:.1f} ms imports, {wall * 1000:.1f} ms interpreter wall time")
+    print(f"📦 {len(modules)} modules imported")
+    print()
+    print("Project modules (self time):")
+    for name, (self_us, cumulative_us, _) in project:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+    print()
+    print(f"Top {top} modules by self time:")
+    for name, (self_us, cumulative_us, _) in heaviest:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+    return total_us / 1000
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure import-time cost per module')
+    parser.add_argument('--module', default='app', help='module to import (default: app)')
+    parser.add_argument('--top', type=int, default=15, help='how many of the slowest modules to list')
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters to try; the fastest run is reported')
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('STARTUP_BUDGET_MS', 0)) or None,
+                        help='fail when the total import time exceeds this many milliseconds')
+    args = parser.parse_args()
+
+    wall, modules = measure_imports(args.module, runs=args.runs)
+    total_ms = print_report(args.module, wall, modules, args.top)
+
+    if args.budget_ms is not None:
+        print()
+        if total_ms > args.budget_ms:
+            print(f"❌ Import budget exceeded: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+            sys.exit(1)
+        print(f"✅ Within import budget: {total_ms:.1f} ms <= {args.budget_ms:.1f} ms")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Template render benchmark: cost of the |t translation filter
+
+    python bench_translations.py                      # coins guide + synthetic page
+    python bench_translations.py --template base.html --renders 500
+
+Renders the same templates with the compiled translator, with the previous
+per-call session lookup, and with |t replaced by a no-op, so the difference is
+what translation adds to a render. No database access.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import render_template, session
+from jinja2 import pass_context
+
+from app import app
+from translations import TRANSLATIONS, DEFAULT_LANGUAGE
+
+@pass_context
+def legacy_filter(context, key):
+    """The old filter: session lookup and dict fallbacks on every call"""
+    language = session.get('language', DEFAULT_LANGUAGE)
+    if language not in TRANSLATIONS:
+        language = DEFAULT_LANGUAGE
+    return TRANSLATIONS[language].get(key, key)
+
+def synthetic_keys(calls):
+    keys = list(TRANSLATIONS[DEFAULT_LANGUAGE])
+    return [keys[i % len(keys)] for i in range(calls)]
+
+def render_compiled(template, **context):
+    """render_template for an already compiled template (context processors included)"""
+    app.update_template_context(context)
+    return template.render(context)
+
+def time_renders(render, renders):
+    render()  # compile and warm caches
+    timings = []
+    for _ in range(renders):
+        started_at = time.perf_counter()
+        render()
+        timings.append(time.perf_counter() - started_at)
+    return statistics.median(timings)
+
+def run(template, renders, calls, language):
+    compiled_filter = app.jinja_env.filters['t']
+    # Keys come from a variable so Jinja cannot fold the calls at compile time
+    synthetic = "{% for key in keys %}{{ key|t }} {% endfor %}"
+    keys = synthetic_keys(calls)
+    modes = (('compiled', compiled_filter), ('legacy', legacy_filter), ('no |t', str))
+    results = {}
+
+    for name in (template, f'{calls} x |t'):
+        results[name] = {}
+        for mode, translate_filter in modes:
+            app.jinja_env.filters['t'] = translate_filter
+            app.jinja_env.cache.clear()  # recompile against this filter
+            if name == template:
+                render = lambda: render_template(template, current_player=None)
+            else:
+                render = lambda compiled=app.jinja_env.from_string(synthetic): render_compiled(compiled, keys=keys)
+            try:
+                # A fresh request per render, as in production
+                def one_render():
+                    with app.test_request_context('/'):
+                        session['language'] = language
+                        return render()
+                results[name][mode] = time_renders(one_render, renders)
+            finally:
+                app.jinja_env.filters['t'] = compiled_filter
+                app.jinja_env.cache.clear()
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure what the |t filter adds to template renders')
+    parser.add_argument('--template', default='coins_guide.html', help='template to render')
+    parser.add_argument('--renders', type=int, default=200, help='renders per mode')
+    parser.add_argument('--calls', type=int, default=500, help='|t calls in the synthetic template')
+    parser.add_argument('--language', default='en', choices=sorted(TRANSLATIONS))
+    args = parser.parse_args()
+
+    print(f"🌐 Rendering with language '{args.language}', {args.renders} renders per mode")
+    for name, timings in run(args.template, args.renders, args.calls, args.language).items():
+        baseline = timings['no |t']
+        print(f"\n📄 {name}")
+        for mode, seconds in timings.items():
+            overhead = (seconds - baseline) * 1000
+            print(f"   {mode:>9}: {seconds * 1000:8.3f} ms/render (median)  ({overhead:+.3f} ms vs no |t)")
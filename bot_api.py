@@ -0,0 +1,351 @@
+"""
+HTTP client the Discord bot uses to talk to the website API
+
+One BotAPIClient lives as long as the bot: it is started in setup_hook and
+closed when the bot shuts down, so every command reuses pooled keep-alive
+connections to WEBSITE_URL instead of paying a new TCP/TLS handshake per
+interaction. Each endpoint has its own timeout; idempotent GETs are retried
+on timeouts, connection errors and 429/5xx answers with jittered exponential
+backoff. Failures are printed and returned as None, like the old fetch_json.
+
+GET answers are kept in an in-memory LRU keyed by endpoint and parameters.
+Within an endpoint's TTL they are served without a request; for a while after
+that they are still served while one background request refreshes them
+(stale-while-revalidate). Concurrent identical requests share one in-flight
+fetch, so a burst of /player lookups for the same nickname costs the website
+a single call.
+
+    BOT_HTTP_LIMIT            max open connections to the website (default 20)
+    BOT_HTTP_RETRIES          extra attempts for a failed GET (default 2)
+    BOT_HTTP_KEEPALIVE        seconds an idle connection is kept open (default 60)
+    BOT_CACHE_SIZE            cached GET answers kept (default 1024, 0 disables)
+    BOT_API_TOKEN             bearer token for the quest review endpoints (same value as on the site)
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+BOT_HTTP_LIMIT = int(os.environ.get('BOT_HTTP_LIMIT', 20))
+BOT_HTTP_RETRIES = int(os.environ.get('BOT_HTTP_RETRIES', 2))
+BOT_HTTP_KEEPALIVE = float(os.environ.get('BOT_HTTP_KEEPALIVE', 60))
+DNS_CACHE_TTL = 300
+CONNECT_TIMEOUT = 3
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BOT_CACHE_SIZE = int(os.environ.get('BOT_CACHE_SIZE', 1024))
+BOT_API_TOKEN = os.environ.get('BOT_API_TOKEN')
+
+# Total seconds per request, by endpoint
+TIMEOUTS = {
+    'stats': 5,
+    'leaderboard': 8,
+    'search': 5,
+    'ascend_data': 5,
+    'ascend_history': 8,
+    'ascend_card': 10,
+    'shop': 5,
+    'inventory': 5,
+    'quests': 5,
+    'submit_quest': 10,
+    'quest_submissions': 8,
+    'review_quests': 15,
+    'players_below': 8,
+    'guilds': 5,
+    'changes': 40,  # long-poll: wait + margin
+}
+
+# (fresh seconds, extra seconds a stale answer may be served while refreshing), by endpoint;
+# endpoints missing here are never cached
+CACHE_TTLS = {
+    'stats': (60, 300),
+    'leaderboard': (30, 120),
+    'search': (60, 300),
+    'ascend_data': (30, 120),
+    'ascend_history': (60, 300),
+    'ascend_card': (30, 120),
+    'shop': (60, 300),
+    'players_below': (30, 60),
+    'inventory': (10, 20),
+    'quests': (10, 20),
+}
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff: uniform in [0, min(max, base * 2**attempt)]"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+class AsyncTTLCache:
+    """LRU of fetched values with expiry, stale-while-revalidate and single-flight fetches"""
+
+    def __init__(self, max_entries=BOT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, fresh_until, stale_until)
+        self._inflight = {}  # key -> asyncio.Task
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, key, fetch, ttl, stale_ttl=0):
+        """Cached value for key, calling fetch() (a coroutine function) at most once at a time
+
+        None results are returned but not stored, so failures are retried next time.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            if now < stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._fetch(key, fetch, ttl, stale_ttl)
+                return value
+            del self._entries[key]
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        # shield: a cancelled interaction must not cancel the fetch the others wait on
+        return await asyncio.shield(self._fetch(key, fetch, ttl, stale_ttl))
+
+    def _fetch(self, key, fetch, ttl, stale_ttl):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._store(key, done, ttl, stale_ttl))
+        return task
+
+    def _store(self, key, task, ttl, stale_ttl):
+        if self._inflight.get(key) is not task:
+            return  # invalidated while in flight: the result may predate the change
+        del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            return
+        now = time.monotonic()
+        self._entries[key] = (task.result(), now + ttl, now + ttl + stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """Drop every entry, or those whose key matches predicate(key)
+
+        Fetches in flight for those keys are forgotten too: their callers still get
+        the result, but it is not stored, and the next get() fetches again.
+        """
+        for key in [key for key in self._entries if predicate is None or predicate(key)]:
+            del self._entries[key]
+        for key in [key for key in self._inflight if predicate is None or predicate(key)]:
+            del self._inflight[key]
+
+    async def close(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+        self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'inflight': len(self._inflight), 'hits': self.hits,
+                'stale_hits': self.stale_hits, 'misses': self.misses, 'coalesced': self.coalesced}
+
+class BotAPIClient:
+    """Pooled aiohttp client with one method per website endpoint the bot calls"""
+
+    def __init__(self, base_url, limit=BOT_HTTP_LIMIT, retries=BOT_HTTP_RETRIES, cache_size=BOT_CACHE_SIZE,
+                 token=BOT_API_TOKEN):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.limit = limit
+        self.retries = retries
+        self.cache = AsyncTTLCache(cache_size) if cache_size > 0 else None
+        self._session = None
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=BOT_HTTP_KEEPALIVE
+            )
+            headers = {'User-Agent': 'EliteSquadBot'}
+            if self.token:
+                headers['Authorization'] = f'Bearer {self.token}'
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                raise_for_status=False
+            )
+        return self
+
+    async def close(self):
+        if self.cache is not None:
+            await self.cache.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _timeout(self, endpoint):
+        return aiohttp.ClientTimeout(total=TIMEOUTS.get(endpoint, 10), sock_connect=CONNECT_TIMEOUT)
+
+    async def get_json(self, endpoint, path, description, params=None, binary=False):
+        """Cached GET (see CACHE_TTLS); returns the decoded JSON (bytes with binary=True) or None"""
+        ttls = CACHE_TTLS.get(endpoint)
+        if self.cache is None or ttls is None:
+            return await self.fetch_json(endpoint, path, description, params, binary)
+        key = (path, tuple(sorted((params or {}).items())))
+        return await self.cache.get(key, lambda: self.fetch_json(endpoint, path, description, params, binary),
+                                    *ttls)
+
+    async def fetch_json(self, endpoint, path, description, params=None, binary=False):
+        """GET base_url + path and return the decoded JSON (raw bytes with binary=True),
+        or None after the last failed attempt"""
+        if self._session is None:
+            await self.start()
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.retries + 1):
+            retry = attempt < self.retries
+            try:
+                async with self._session.get(url, params=params, timeout=self._timeout(endpoint)) as resp:
+                    if resp.status == 200:
+                        return await resp.read() if binary else await resp.json()
+                    if not (retry and resp.status in RETRY_STATUSES):
+                        print(f"Ошибка {description}: HTTP {resp.status}")
+                        return None
+            except asyncio.TimeoutError:
+                if not retry:
+                    print(f"Ошибка {description}: таймаут запроса")
+                    return None
+            except aiohttp.ClientError as e:
+                if not retry:
+                    print(f"Ошибка {description}: {e}")
+                    return None
+            await asyncio.sleep(backoff_delay(attempt))
+        return None
+
+    async def post_json(self, endpoint, path, payload):
+        """POST once (not idempotent, never retried); returns (status, decoded JSON or None)"""
+        if self._session is None:
+            await self.start()
+        async with self._session.post(f"{self.base_url}{path}", json=payload,
+                                      timeout=self._timeout(endpoint)) as resp:
+            body = await resp.text()
+        try:
+            return resp.status, json.loads(body)
+        except ValueError:
+            return resp.status, None
+
+    # Endpoints
+
+    async def stats(self):
+        return await self.get_json('stats', '/api/stats', "получения статистики")
+
+    async def leaderboard(self, sort='experience', limit=10, description="получения таблицы лидеров"):
+        return await self.get_json('leaderboard', '/api/leaderboard', description,
+                                   params={'sort': sort, 'limit': limit})
+
+    async def search(self, query, limit=5):
+        return await self.get_json('search', '/api/search', "поиска игрока", params={'q': query, 'limit': limit})
+
+    async def lookup(self, nicknames):
+        """Exact lookup of many nicknames in one request"""
+        return await self.get_json('search', '/api/search', "поиска игроков",
+                                   params={'nicknames': ','.join(nicknames)})
+
+    async def ascend_data(self, player_id, gamemode='bedwars'):
+        return await self.get_json('ascend_data', f'/api/player/{player_id}/ascend-data',
+                                   "получения ASCEND данных", params={'gamemode': gamemode})
+
+    async def ascend_history(self, player_id, gamemode='bedwars', limit=10):
+        return await self.get_json('ascend_history', f'/api/player/{player_id}/ascend-history',
+                                   "получения истории", params={'gamemode': gamemode, 'limit': limit})
+
+    async def ascend_card(self, player_id, gamemode='bedwars'):
+        """PNG bytes of the website-rendered ASCEND card"""
+        return await self.get_json('ascend_card', f'/api/player/{player_id}/ascend-card.png',
+                                   "получения ASCEND карточки", params={'gamemode': gamemode}, binary=True)
+
+    async def shop(self):
+        return await self.get_json('shop', '/api/shop', "получения товаров магазина")
+
+    async def inventory(self, player_id):
+        return await self.get_json('inventory', f'/api/player/{player_id}/inventory', "получения инвентаря")
+
+    async def quests(self, player_id):
+        return await self.get_json('quests', f'/api/player/{player_id}/quests', "получения квестов")
+
+    async def players_below(self, field, threshold, after=None, limit=100):
+        """One keyset page of players with field < threshold (pass next_cursor as after)"""
+        params = {'field': field, 'lt': threshold, 'limit': limit}
+        if after:
+            params['after'] = after
+        return await self.get_json('players_below', '/api/players/below', "получения игроков", params=params)
+
+    async def changes(self, since=None, wait=0):
+        """Change feed after a cursor (long-poll up to `wait` s); without since, just the current cursor"""
+        params = {} if since is None else {'since': since, 'wait': wait}
+        return await self.get_json('changes', '/api/changes', "получения ленты изменений", params=params)
+
+    async def submit_quest(self, nickname, quest, user_id, guild_id=None, attachment_url=None):
+        return await self.post_json('submit_quest', '/api/quest-submissions', {
+            'nickname': nickname,
+            'quest': quest,
+            'discord_user_id': user_id,
+            'discord_guild_id': guild_id,
+            'attachment_url': attachment_url
+        })
+
+    async def save_review_message(self, submission_id, channel_id, message_id):
+        return await self.post_json('submit_quest', f'/api/quest-submissions/{submission_id}/message',
+                                    {'channel_id': channel_id, 'message_id': message_id})
+
+    async def quest_submissions(self, guild_id=None, after=None, limit=25):
+        """One page of the pending review queue (never cached: it changes with every review)"""
+        params = {'limit': limit}
+        if guild_id:
+            params['guild_id'] = guild_id
+        if after:
+            params['after'] = after
+        return await self.fetch_json('quest_submissions', '/api/quest-submissions', "получения заявок",
+                                     params=params)
+
+    async def review_quests(self, ids, action, reviewed_by, reason=None):
+        """Approve or reject submissions in one request; action is 'approve' or 'reject'"""
+        status, data = await self.post_json('review_quests', '/api/quest-submissions/review', {
+            'ids': list(ids),
+            'action': action,
+            'reviewed_by': reviewed_by,
+            'reason': reason
+        })
+        if status == 200 and self.cache is not None:
+            self.cache.invalidate(lambda key: key[0].endswith('/quests'))
+        return status, data
+
+    async def guild_configs(self):
+        """Channels every guild chose with /setup_channel"""
+        return await self.fetch_json('guilds', '/api/bot/guilds', "получения настроек серверов")
+
+    async def set_guild_channel(self, guild_id, kind, channel_id):
+        return await self.post_json('guilds', f'/api/bot/guilds/{guild_id}/channels',
+                                    {'kind': kind, 'channel_id': str(channel_id) if channel_id else None})
+
+    async def remove_guild(self, guild_id):
+        return await self.post_json('guilds', f'/api/bot/guilds/{guild_id}/remove', {})
@@ -0,0 +1,123 @@
+"""
+Per-guild settings of the Discord bot
+
+Each guild chooses its own channels with /setup_channel: where change-feed
+announcements go ('announce') and where quest submissions are reviewed
+('review'). The website stores them (/api/bot/guilds, the bot_guild_config
+table), because the bot's disk is wiped on every deploy by hosts such as
+Railway and Render. The bot loads them once on startup and keeps them in
+memory, so it never searches channels by name on a timer and its state grows
+with the number of guilds, not members.
+
+A copy is written to a small JSON file (BOT_GUILD_CONFIG, default
+instance/bot_guilds.json) and used when the website cannot be reached at
+startup. Settings found only in that file (from before they were stored on the
+website) are uploaded the first time the website has none.
+"""
+
+import json
+import os
+import tempfile
+
+BOT_GUILD_CONFIG = os.environ.get('BOT_GUILD_CONFIG', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'instance', 'bot_guilds.json'))
+
+CHANNEL_KINDS = ('announce', 'review')
+
+class GuildConfigStore:
+    """guild id -> {'announce_channel_id': ..., 'review_channel_id': ...}"""
+
+    def __init__(self, api=None, path=BOT_GUILD_CONFIG):
+        self.api = api
+        self.path = path
+        self._guilds = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return {int(guild_id): config for guild_id, config in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({str(guild_id): config for guild_id, config in self._guilds.items()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Не удалось сохранить локальную копию настроек серверов: {e}")
+
+    @staticmethod
+    def _from_website(guild):
+        config = {}
+        for kind in CHANNEL_KINDS:
+            channel_id = guild.get(f'{kind}_channel_id')
+            if channel_id:
+                config[f'{kind}_channel_id'] = int(channel_id)
+        return config
+
+    async def load(self):
+        """Replace the local copy with the website's settings; keeps the local copy if the site is down"""
+        data = await self.api.guild_configs() if self.api is not None else None
+        if data and data.get('success'):
+            guilds = {int(guild['guild_id']): self._from_website(guild) for guild in data['guilds']}
+            if not guilds and self._guilds:
+                try:
+                    await self._upload()
+                except Exception as e:
+                    print(f"Ошибка переноса настроек серверов на сайт: {e}")
+            else:
+                self._guilds = {guild_id: config for guild_id, config in guilds.items() if config}
+                self._save()
+        elif self.api is not None:
+            print(f"Настройки серверов не загружены с сайта, используется локальная копия ({len(self)} серверов)")
+
+        if not self.channel_ids('announce'):
+            print("⚠️ Канал уведомлений не настроен ни на одном сервере: выполните /setup_channel announce")
+        return self
+
+    async def _upload(self):
+        """Copy settings saved by an older bot version (local file only) to the website"""
+        print(f"Перенос настроек {len(self)} серверов на сайт")
+        for guild_id, config in self._guilds.items():
+            for kind in CHANNEL_KINDS:
+                if config.get(f'{kind}_channel_id'):
+                    await self.api.set_guild_channel(guild_id, kind, config[f'{kind}_channel_id'])
+
+    def channel_id(self, guild_id, kind):
+        return self._guilds.get(guild_id, {}).get(f'{kind}_channel_id')
+
+    def channel_ids(self, kind):
+        """Configured channel id of every guild for one kind"""
+        key = f'{kind}_channel_id'
+        return [config[key] for config in self._guilds.values() if config.get(key)]
+
+    async def set_channel(self, guild_id, kind, channel_id):
+        """Save on the website first: raises RuntimeError when it refuses, leaving the setting unchanged"""
+        if kind not in CHANNEL_KINDS:
+            raise ValueError(f'Unknown channel kind {kind}')
+        if self.api is not None:
+            status, data = await self.api.set_guild_channel(guild_id, kind, channel_id)
+            if status != 200:
+                raise RuntimeError(f"HTTP {status}: {(data or {}).get('error')}")
+
+        config = self._guilds.setdefault(guild_id, {})
+        if channel_id is None:
+            config.pop(f'{kind}_channel_id', None)
+        else:
+            config[f'{kind}_channel_id'] = channel_id
+        if not config:
+            del self._guilds[guild_id]
+        self._save()
+
+    async def remove_guild(self, guild_id):
+        if self.api is not None:
+            await self.api.remove_guild(guild_id)
+        if self._guilds.pop(guild_id, None) is not None:
+            self._save()
+
+    def __len__(self):
+        return len(self._guilds)
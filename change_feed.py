@@ -0,0 +1,183 @@
+"""
+Change feed (outbox) for the Discord bot
+
+Flushes that change something the bot announces also write ChangeEvent rows
+in the same transaction:
+
+    player_count   a player was created or deleted ({'delta': +1/-1})
+    low_karma      reputation dropped below LOW_KARMA_THRESHOLD
+    rank_change    a player moved within the top RANK_NOTIFY_TOP by experience
+    tier_change    an ASCEND overall tier changed (also written by bulk_update)
+
+/api/changes?since=<cursor>&wait=<seconds> returns the events after the
+cursor, holding the request open until one arrives (long-poll). Commits in
+this process wake waiting requests at once; commits in other workers are
+picked up within CHANGE_FEED_POLL_INTERVAL. Each waiting request holds a
+worker thread, so gunicorn.conf.py sets CHANGE_FEED_MAX_WAIT=0 (the bot then
+polls) unless the workers are threaded.
+
+The cursor is the event id, so ids must become visible in id order. SQLite
+holds its write lock from the first write to the commit. On PostgreSQL ids
+are taken at flush time and transactions could commit out of order (a reader
+would then move its cursor past an event that is not committed yet), so a
+transaction writing events first takes a transaction-level advisory lock:
+event-writing transactions commit one at a time, in id order.
+
+    LOW_KARMA_THRESHOLD          reputation below which a player is announced (default 20)
+    RANK_NOTIFY_TOP              leaderboard places that produce rank_change (default 10)
+    CHANGE_FEED_MAX_WAIT         longest long-poll in seconds (default 25)
+    CHANGE_FEED_RETENTION_DAYS   events kept before pruning (default 7)
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+LOW_KARMA_THRESHOLD = int(os.environ.get('LOW_KARMA_THRESHOLD', 20))
+RANK_NOTIFY_TOP = int(os.environ.get('RANK_NOTIFY_TOP', 10))
+CHANGE_FEED_MAX_WAIT = int(os.environ.get('CHANGE_FEED_MAX_WAIT', 25))
+CHANGE_FEED_POLL_INTERVAL = 2
+CHANGE_FEED_RETENTION_DAYS = int(os.environ.get('CHANGE_FEED_RETENTION_DAYS', 7))
+CHANGE_FEED_BATCH = 100
+CHANGE_FEED_LOCK_KEY = 0x63686e67  # pg_advisory_xact_lock key serialising event writers
+
+EVENT_KINDS = ('player_count', 'low_karma', 'rank_change', 'tier_change')
+
+_committed = threading.Condition()
+_last_prune = 0.0
+
+def _changed(instance, attribute):
+    """(old, new) for a modified attribute, or None"""
+    history = inspect(instance).attrs[attribute].history
+    if not history.has_changes() or not history.deleted:
+        return None
+    return history.deleted[0], history.added[0] if history.added else None
+
+def tier_change_event(player_id, nickname, gamemode, old_tier, new_tier):
+    from models import ASCENDHistory, ChangeEvent
+    return ChangeEvent.make('tier_change', player_id, nickname=nickname, gamemode=gamemode, old_tier=old_tier,
+                            new_tier=new_tier, change_type=ASCENDHistory.get_change_type(old_tier, new_tier))
+
+def _nickname(db_session, player_id):
+    from models import Player
+    player = db_session.get(Player, player_id) if player_id else None
+    return player.nickname if player else None
+
+def _rank(db_session, player, experience):
+    from models import Player
+    higher = db_session.query(Player).filter(Player.id != player.id, Player.experience > experience).count()
+    return higher + 1
+
+def _top_threshold(db_session):
+    """Experience of the last player in the notified top (0 when there are fewer players)"""
+    from models import Player
+    value = db_session.query(Player.experience).order_by(Player.experience.desc()) \
+        .offset(RANK_NOTIFY_TOP - 1).limit(1).scalar()
+    return value or 0
+
+def collect_changes(db_session):
+    """ChangeEvents for the pending ORM changes of a session"""
+    from models import ASCENDData, ChangeEvent, Player
+
+    events = []
+    threshold = None
+    for instance in db_session.new:
+        if isinstance(instance, Player):
+            events.append(ChangeEvent.make('player_count', delta=1))
+        elif isinstance(instance, ASCENDData) and instance.overall_tier:
+            events.append(tier_change_event(instance.player_id, _nickname(db_session, instance.player_id),
+                                            instance.gamemode, None, instance.overall_tier))
+    for instance in db_session.deleted:
+        if isinstance(instance, Player):
+            events.append(ChangeEvent.make('player_count', delta=-1))
+
+    for instance in db_session.dirty:
+        if isinstance(instance, Player):
+            reputation = _changed(instance, 'reputation')
+            if reputation and reputation[0] >= LOW_KARMA_THRESHOLD > reputation[1]:
+                events.append(ChangeEvent.make('low_karma', instance.id, nickname=instance.nickname,
+                                               reputation=reputation[1]))
+
+            experience = _changed(instance, 'experience')
+            if experience and experience[0] != experience[1]:
+                if threshold is None:
+                    threshold = _top_threshold(db_session)
+                if max(experience) < threshold:
+                    continue  # outside the top before and after: no rank queries
+                old_rank = _rank(db_session, instance, experience[0])
+                new_rank = _rank(db_session, instance, experience[1])
+                if old_rank != new_rank and min(old_rank, new_rank) <= RANK_NOTIFY_TOP:
+                    events.append(ChangeEvent.make('rank_change', instance.id, nickname=instance.nickname,
+                                                   old_rank=old_rank, new_rank=new_rank,
+                                                   experience=experience[1]))
+        elif isinstance(instance, ASCENDData):
+            tier = _changed(instance, 'overall_tier')
+            if tier and tier[0] != tier[1]:
+                events.append(tier_change_event(instance.player_id, _nickname(db_session, instance.player_id),
+                                                instance.gamemode, *tier))
+    return events
+
+@event.listens_for(Session, 'before_flush')
+def _write_change_events(db_session, flush_context, instances):
+    if not (db_session.new or db_session.dirty or db_session.deleted):
+        return
+    with db_session.no_autoflush:
+        events = collect_changes(db_session)
+    record_events(db_session, events)
+
+@event.listens_for(Session, 'after_commit')
+def _wake_waiters(db_session):
+    db_session.info.pop('change_feed_locked', None)
+    if db_session.info.pop('change_events', False):
+        with _committed:
+            _committed.notify_all()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_change_events(db_session):
+    db_session.info.pop('change_events', None)
+    db_session.info.pop('change_feed_locked', None)
+
+def _lock_event_order(db_session):
+    """Take the event writers' advisory lock before this transaction gets event ids (PostgreSQL)"""
+    if db_session.info.get('change_feed_locked'):
+        return
+    from models import ChangeEvent
+    connection = db_session.connection(bind_arguments={'mapper': inspect(ChangeEvent)})
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f'SELECT pg_advisory_xact_lock({CHANGE_FEED_LOCK_KEY})')
+    db_session.info['change_feed_locked'] = True
+
+def record_events(db_session, events):
+    """Add events written outside the ORM change tracking (bulk paths) to the transaction"""
+    if events:
+        _lock_event_order(db_session)
+        db_session.add_all(events)
+        db_session.info['change_events'] = True
+
+def wait_for_changes(cursor, kinds=None, wait=0):
+    """Events after the cursor, waiting up to `wait` seconds for the first one"""
+    from app import db
+    from models import ChangeEvent
+
+    _maybe_prune()
+    deadline = time.monotonic() + min(max(wait, 0), CHANGE_FEED_MAX_WAIT)
+    while True:
+        events = ChangeEvent.since(cursor, kinds, limit=CHANGE_FEED_BATCH)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        db.session.rollback()  # end the read transaction so the next query sees new commits
+        with _committed:
+            _committed.wait(min(remaining, CHANGE_FEED_POLL_INTERVAL))
+
+def _maybe_prune():
+    """Drop old events at most once an hour per process"""
+    global _last_prune
+    if time.monotonic() - _last_prune < 3600:
+        return
+    _last_prune = time.monotonic()
+    from models import ChangeEvent
+    ChangeEvent.prune(CHANGE_FEED_RETENTION_DAYS)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compact old ASCEND evaluation history into monthly summaries
+"""
+
+import argparse
+import os
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine_config import use_offline_settings
+
+if __name__ == '__main__':
+    use_offline_settings()  # long batch statements; the request timeout does not apply
+
+from app import app
+from models import ASCENDHistory
+
+def compact_ascend_history(months, batch_size=1000):
+    """Roll up history older than `months` full months and delete the raw rows"""
+
+    with app.app_context():
+        compacted, written = ASCENDHistory.compact_older_than(months, batch_size=batch_size)
+        print(f"✅ ASCEND history compaction completed!")
+        print(f"🗜️ Compacted history rows: {compacted}")
+        print(f"📅 Monthly summaries written: {written}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--months', type=int, default=6, help='keep this many recent months of raw history')
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows streamed per batch')
+    args = parser.parse_args()
+    compact_ascend_history(args.months, batch_size=args.batch_size)
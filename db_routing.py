@@ -0,0 +1,79 @@
+"""
+Read-replica routing
+
+When DATABASE_REPLICA_URL is set the replica is registered as the 'replica'
+bind. Views decorated with @replica_safe send their plain SELECTs there;
+everything else (writes, SELECT ... FOR UPDATE, reads after a write in the
+same transaction, and every undecorated view) stays on the primary.
+
+A client that just committed a write reads from the primary for
+REPLICA_STICKY_SECONDS, so it sees its own change even while the replica lags.
+"""
+
+import os
+import time
+from functools import wraps
+
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+from engine_config import engine_options
+
+REPLICA_BIND = 'replica'
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 15))
+
+def replica_binds(replica_url):
+    """SQLALCHEMY_BINDS entry for the replica (empty without a replica URL)"""
+    if not replica_url:
+        return {}
+    if replica_url.startswith('postgres://'):
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+    return {REPLICA_BIND: dict(engine_options(replica_url), url=replica_url)}
+
+def replica_safe(f):
+    """Mark a read-only view: its SELECTs may be served by the replica"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_replica = session.get('read_primary_until', 0) < time.time()
+        return f(*args, **kwargs)
+    return decorated_function
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends replica-safe reads to the replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if self._flushing or self.info.get('wrote') or not isinstance(clause, Select):
+            return False
+        if clause._for_update_arg is not None:
+            return False
+        if not has_request_context() or not g.get('db_replica'):
+            return False
+        return REPLICA_BIND in self._db.engines
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush_write(db_session, flush_context):
+    db_session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(db_session):
+    if not db_session.info.pop('wrote', False) or not has_request_context():
+        return
+    # Read-your-writes: this client reads from the primary until the replica caught up
+    g.db_replica = False
+    session['read_primary_until'] = time.time() + REPLICA_STICKY_SECONDS
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(db_session):
+    db_session.info.pop('wrote', None)
@@ -1,113 +1,77 @@
 import discord
+from discord import app_commands
 from discord.ext import commands, tasks
 import asyncio
-import aiohttp
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 import json
 import io
 import base64
-from PIL import Image, ImageDraw, ImageFont
+
+from ascend_card import AscendCardRenderer
+from ascend_tiers import tier_color
+from bot_api import BotAPIClient
+from bot_guilds import CHANNEL_KINDS, GuildConfigStore
 
 # Load environment variables
 load_dotenv()
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 WEBSITE_URL = os.getenv("WEBSITE_URL", "http://localhost:5000")
+CHANGE_FEED_WAIT = 25  # long-poll seconds; the website caps it with CHANGE_FEED_MAX_WAIT
+CHANGE_FEED_BATCH = 100
+LOW_KARMA_PAGE = 25
+REVIEW_QUEUE_PAGE = 25  # one select menu holds at most 25 options
 
 if not BOT_TOKEN:
     raise ValueError("❌ BOT_TOKEN не задан в .env файле")
 
-# Bot setup
-intents = discord.Intents.default()
-intents.message_content = True
+BOT_SHARD_COUNT = int(os.getenv("BOT_SHARD_COUNT", 0)) or None  # None: Discord's recommendation
+
+# Bot setup: slash commands only need guild events; no member, presence or message caches
+intents = discord.Intents.none()
 intents.guilds = True
-intents.members = True
 
-bot = commands.Bot(command_prefix=['!', '/'], intents=intents, help_command=None)
-
-async def fetch_json(session, url, description):
-    try:
-        async with session.get(url, timeout=10) as resp:
-            if resp.status != 200:
-                print(f"Ошибка {description}: HTTP {resp.status}")
-                return None
-            return await resp.json()
-    except asyncio.TimeoutError:
-        print(f"Ошибка {description}: таймаут запроса")
-    except aiohttp.ClientError as e:
-        print(f"Ошибка {description}: {e}")
-    return None
+class EliteSquadBot(commands.AutoShardedBot):
+    """Bot with one pooled website API client, card renderer and guild config store for its whole lifetime"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.api = BotAPIClient(WEBSITE_URL)
+        self.cards = AscendCardRenderer()
+        self.guild_config = GuildConfigStore(self.api)
+        self.review_channel_guess = {}  # guild id -> channel id found by name, not persisted
+        self.feed_cursor = None
+        self.player_count = None
+
+    async def setup_hook(self):
+        await self.api.start()
+        await self.guild_config.load()
+        # Review buttons are matched by custom_id, so messages sent before a restart keep working
+        self.add_dynamic_items(QuestReviewButton)
+
+    async def close(self):
+        await super().close()
+        await self.api.close()
+        self.cards.close()
+
+bot = EliteSquadBot(
+    command_prefix=commands.when_mentioned,
+    intents=intents,
+    help_command=None,
+    shard_count=BOT_SHARD_COUNT,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    chunk_guilds_at_startup=False,
+    max_messages=None
+)
 
 async def create_ascend_image(player_data, ascend_data):
-    """Generate ASCEND card image using PIL"""
+    """ASCEND card image: the website's rendered PNG, drawn locally if the site can't serve it"""
     try:
-        # Create image
-        width, height = 800, 600
-        img = Image.new('RGB', (width, height), '#1a1a2e')
-        draw = ImageDraw.Draw(img)
-
-        try:
-            # Attempt to use specific fonts, fallback to default if not found
-            font_large = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", 36)
-            font_medium = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", 24)
-            font_small = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", 18)
-        except IOError:
-            print("Шрифты Liberation не найдены, используется шрифт по умолчанию.")
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-
-        # Header
-        draw.text((400, 30), "ASCEND Performance Card", fill='#ffd700', font=font_large, anchor='mt')
-        draw.text((400, 80), f"{player_data['nickname']}", fill='white', font=font_medium, anchor='mt')
-
-        # Skills
-        skills = [
-            (ascend_data.get('skill1_name', 'PVP'), ascend_data.get('skill1_score', 25)),
-            (ascend_data.get('skill2_name', 'Clutching'), ascend_data.get('skill2_score', 25)),
-            (ascend_data.get('skill3_name', 'Block Placement'), ascend_data.get('skill3_score', 25)),
-            (ascend_data.get('skill4_name', 'Gamesense'), ascend_data.get('skill4_score', 25))
-        ]
-
-        y_start = 150
-        for i, (skill_name, score) in enumerate(skills):
-            y = y_start + (i * 80)
-
-            # Skill name
-            draw.text((50, y), f"{skill_name}:", fill='white', font=font_medium)
-
-            # Score bar
-            bar_width = 300
-            bar_height = 20
-            bar_x = 250
-            bar_y = y + 5
-
-            # Background bar
-            draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height], fill='#333333')
-
-            # Score bar
-            score_width = (score / 100) * bar_width
-            color = '#ff4757' if score < 40 else '#ffa502' if score < 70 else '#2ed573'
-            draw.rectangle([bar_x, bar_y, bar_x + score_width, bar_y + bar_height], fill=color)
-
-            # Score text
-            draw.text((bar_x + bar_width + 20, y), f"{score}/100", fill='white', font=font_small)
-
-        # Overall tier
-        overall_tier = ascend_data.get('overall_tier', 'D')
-        draw.text((400, 500), f"Overall Tier: {overall_tier}", fill='#ffd700', font=font_large, anchor='mt')
-
-        # Average score
-        avg_score = sum(skill[1] for skill in skills) / 4
-        draw.text((400, 550), f"Average Score: {avg_score:.1f}", fill='#48dbfb', font=font_medium, anchor='mt')
-
-        # Convert to bytes
-        img_bytes = io.BytesIO()
-        img.save(img_bytes, format='PNG')
-        img_bytes.seek(0)
-
-        return img_bytes
+        png = await bot.api.ascend_card(player_data['id'], ascend_data.get('gamemode', 'bedwars'))
+        if png is None:
+            png = await bot.cards.render(player_data['id'], player_data['nickname'], ascend_data)
+        return io.BytesIO(png)
     except Exception as e:
         print(f"Error creating ASCEND image: {e}")
         return None
@@ -119,8 +83,8 @@ async def on_ready():
     await bot.change_presence(activity=discord.Game(name="Elite Squad ASCEND | /help"))
 
     # Start background tasks
-    leaderboard_update.start()
-    karma_monitor.start()
+    if not change_feed.is_running():
+        change_feed.start()
 
     # Sync slash commands
     try:
@@ -129,89 +93,160 @@ async def on_ready():
     except Exception as e:
         print(f"Ошибка синхронизации команд: {e}")
 
-@tasks.loop(hours=1)
-async def leaderboard_update():
-    """Update bot status with current leaderboard info"""
-    try:
-        async with aiohttp.ClientSession() as session:
-            stats = await fetch_json(session, f"{WEBSITE_URL}/api/stats", "получения статистики")
-            if stats and stats.get('total_players'):
-                activity = discord.Game(name=f"Elite Squad | {stats['total_players']} игроков")
-                await bot.change_presence(activity=activity)
-    except Exception as e:
-        print(f"Ошибка обновления статуса: {e}")
+def announcement_channels():
+    """Announcement channels configured with /setup_channel, one per guild"""
+    channels = (bot.get_channel(channel_id) for channel_id in bot.guild_config.channel_ids('announce'))
+    return [channel for channel in channels if channel is not None]
+
+def review_channel(guild):
+    """Quest review channel of a guild: configured, else found by name once and remembered"""
+    channel_id = bot.guild_config.channel_id(guild.id, 'review') or bot.review_channel_guess.get(guild.id)
+    if channel_id:
+        return guild.get_channel(channel_id)
+    channel = discord.utils.get(guild.text_channels, name='quest-submissions') or \
+              discord.utils.get(guild.text_channels, name='admin') or \
+              discord.utils.get(guild.text_channels, name='модерация')
+    if channel:
+        bot.review_channel_guess[guild.id] = channel.id
+    return channel
+
+async def update_player_count(total):
+    bot.player_count = total
+    await bot.change_presence(activity=discord.Game(name=f"Elite Squad | {total} игроков"))
+
+def low_karma_embed(events):
+    embed = discord.Embed(
+        title="⚠️ Мониторинг кармы",
+        description=f"Новых игроков с низкой кармой: {len(events)}",
+        color=0xff6b6b,
+        timestamp=datetime.utcnow()
+    )
+    karma_list = [f"**{e['data']['nickname']}** - Карма: {e['data']['reputation']}" for e in events[:5]]
+    embed.add_field(name="Игроки с низкой кармой:", value="\n".join(karma_list), inline=False)
+    embed.add_field(name="Последствия низкой кармы:",
+                  value="• Ограничения в чате\n• Снижение дропа ресурсов\n• Ограничение участия в турнирах",
+                  inline=False)
+    return embed
+
+def rank_change_embed(events):
+    lines = []
+    for e in events[-10:]:
+        arrow = "⬆️" if e['data']['new_rank'] < e['data']['old_rank'] else "⬇️"
+        lines.append(f"{arrow} **{e['data']['nickname']}** #{e['data']['old_rank']} → #{e['data']['new_rank']}")
+    return discord.Embed(title="🏆 Изменения в топе", description="\n".join(lines),
+                         color=0xffd700, timestamp=datetime.utcnow())
+
+def tier_upgrade_embed(events):
+    lines = [f"**{e['data']['nickname']}** ({e['data']['gamemode'].title()}): "
+             f"{e['data']['old_tier'] or '—'} → **{e['data']['new_tier']}**" for e in events[:10]]
+    return discord.Embed(title="🎉 Повышение ASCEND тира", description="\n".join(lines),
+                         color=tier_color(events[-1]['data']['new_tier']), timestamp=datetime.utcnow())
+
+async def apply_changes(events):
+    """Post what changed since the last batch of the website's change feed"""
+    delta = sum(e['data']['delta'] for e in events if e['kind'] == 'player_count')
+    if delta and bot.player_count is not None:
+        await update_player_count(bot.player_count + delta)
+
+    low_karma = [e for e in events if e['kind'] == 'low_karma']
+    ranks = [e for e in events if e['kind'] == 'rank_change']
+    upgrades = [e for e in events if e['kind'] == 'tier_change' and e['data']['change_type'] != 'downgrade'
+                and e['data']['old_tier'] != e['data']['new_tier']]
+    embeds = []
+    if low_karma:
+        embeds.append(low_karma_embed(low_karma))
+    if ranks:
+        embeds.append(rank_change_embed(ranks))
+    if upgrades:
+        embeds.append(tier_upgrade_embed(upgrades))
+
+    if not embeds:
+        return
+    for channel in announcement_channels():
+        try:
+            await channel.send(embeds=embeds)
+        except discord.HTTPException as e:
+            print(f"Не удалось отправить уведомление в канал {channel.id}: {e}")
 
-@tasks.loop(minutes=30)
-async def karma_monitor():
-    """Monitor players with low karma and send warnings"""
+@tasks.loop(seconds=5)
+async def change_feed():
+    """Follow the website's change feed (long-poll) instead of re-fetching full lists"""
     try:
-        async with aiohttp.ClientSession() as session:
-            # Get players with low karma (< 20)
-            players = await fetch_json(session, f"{WEBSITE_URL}/api/leaderboard?sort=reputation&limit=100", "получения игроков")
-            if players and players.get('players'):
-                low_karma_players = [p for p in players['players'] if p.get('reputation', 0) < 20]
-
-                if low_karma_players:
-                    # Find main guild and general channel
-                    for guild in bot.guilds:
-                        # Heuristic to find the main server (e.g., most members)
-                        if guild.member_count > 1000: # Assuming a large server is the main one
-                            general = discord.utils.get(guild.channels, name='general') or discord.utils.get(guild.channels, name='main') or discord.utils.get(guild.channels, name='chat') or guild.text_channels[0]
-                            if general:
-                                embed = discord.Embed(
-                                    title="⚠️ Мониторинг кармы",
-                                    description=f"Найдено {len(low_karma_players)} игроков с низкой кармой",
-                                    color=0xff6b6b,
-                                    timestamp=datetime.utcnow()
-                                )
-
-                                karma_list = []
-                                for player in low_karma_players[:5]:
-                                    karma_list.append(f"**{player['nickname']}** - Карма: {player.get('reputation', 0)}")
-
-                                embed.add_field(name="Игроки с низкой кармой:", value="\n".join(karma_list), inline=False)
-                                embed.add_field(name="Последствия низкой кармы:",
-                                              value="• Ограничения в чате\n• Снижение дропа ресурсов\n• Ограничение участия в турнирах",
-                                              inline=False)
-
-                                await general.send(embed=embed)
-                            break # Process only the first likely main server found
+        if bot.feed_cursor is None:
+            # Start from now; the player count is fetched once, then kept up to date from deltas
+            feed = await bot.api.changes()
+            if not feed or not feed.get('success'):
+                return
+            stats = await bot.api.stats()
+            if stats and stats.get('total_players') is not None:
+                await update_player_count(stats['total_players'])
+            bot.feed_cursor = feed['cursor']
+
+        while True:
+            feed = await bot.api.changes(since=bot.feed_cursor, wait=CHANGE_FEED_WAIT)
+            if not feed or not feed.get('success'):
+                return
+            bot.feed_cursor = feed['cursor']
+            if feed['events']:
+                await apply_changes(feed['events'])
+            if len(feed['events']) < CHANGE_FEED_BATCH:
+                return
     except Exception as e:
-        print(f"Ошибка мониторинга кармы: {e}")
+        print(f"Ошибка ленты изменений: {e}")
 
-@leaderboard_update.before_loop
-async def before_leaderboard_update():
+@change_feed.before_loop
+async def before_change_feed():
     await bot.wait_until_ready()
 
-@karma_monitor.before_loop
-async def before_karma_monitor():
-    await bot.wait_until_ready()
+@bot.event
+async def on_guild_remove(guild):
+    bot.review_channel_guess.pop(guild.id, None)
+    try:
+        await bot.guild_config.remove_guild(guild.id)
+    except Exception as e:
+        print(f"Ошибка удаления настроек сервера {guild.id}: {e}")
+
+@bot.tree.command(name="setup_channel", description="Выбрать этот канал для уведомлений или проверки квестов")
+@app_commands.describe(kind="announce - уведомления сайта, review - заявки на квесты", enabled="False - отключить")
+@app_commands.choices(kind=[app_commands.Choice(name=kind, value=kind) for kind in CHANNEL_KINDS])
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.guild_only()
+async def setup_channel(interaction: discord.Interaction, kind: str, enabled: bool = True):
+    await interaction.response.defer(ephemeral=True)
+    try:
+        await bot.guild_config.set_channel(interaction.guild_id, kind, interaction.channel_id if enabled else None)
+        if kind == 'review':
+            bot.review_channel_guess.pop(interaction.guild_id, None)
+        message = f"✅ Канал {interaction.channel.mention} выбран для `{kind}`" if enabled else f"✅ Канал для `{kind}` отключен"
+        await interaction.followup.send(message, ephemeral=True)
+    except Exception as e:
+        print(f"Ошибка в команде setup_channel: {e}")
+        await interaction.followup.send("❌ Не удалось сохранить настройку", ephemeral=True)
 
 @bot.tree.command(name="ascend", description="Показать ASCEND карточку игрока с изображением")
 async def ascend_card(interaction: discord.Interaction, nickname: str, gamemode: str = "bedwars", visual: bool = False):
     try:
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/search?q={nickname}", "поиска игрока")
-            if not data or not data.get('players'):
-                await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
-                return
+        data = await bot.api.search(nickname)
+        if not data or not data.get('players'):
+            await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
+            return
 
-            player = data['players'][0]
-            player_id = player['id']
+        player = data['players'][0]
+        player_id = player['id']
 
-            ascend_data = await fetch_json(session, f"{WEBSITE_URL}/api/player/{player_id}/ascend-data?gamemode={gamemode}", "получения ASCEND данных")
-            if not ascend_data or not ascend_data.get('success'):
-                await interaction.followup.send("❌ ASCEND данные недоступны", ephemeral=True)
-                return
+        ascend_data = await bot.api.ascend_data(player_id, gamemode)
+        if not ascend_data or not ascend_data.get('success'):
+            await interaction.followup.send("❌ ASCEND данные недоступны", ephemeral=True)
+            return
 
-            ascend = ascend_data['ascend']
+        ascend = ascend_data['ascend']
 
         embed = discord.Embed(
             title="🎮 ASCEND Performance Card",
             description=f"**{player['nickname']}** | Уровень {player['level']} | {gamemode.title()}",
-            color=get_tier_color(ascend['overall_tier']),
+            color=tier_color(ascend['overall_tier']),
             timestamp=datetime.utcnow()
         )
 
@@ -292,13 +327,12 @@ async def karma_info(interaction: discord.Interaction, nickname: str = None):
             await interaction.followup.send(embed=embed)
             return
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/search?q={nickname}", "поиска игрока")
-            if not data or not data.get('players'):
-                await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
-                return
+        data = await bot.api.search(nickname)
+        if not data or not data.get('players'):
+            await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
+            return
 
-            player = data['players'][0]
+        player = data['players'][0]
 
         karma = player.get('reputation', 0)
 
@@ -351,12 +385,11 @@ async def shop_command(interaction: discord.Interaction, category: str = "all"):
     try:
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            # Get shop items
-            shop_data = await fetch_json(session, f"{WEBSITE_URL}/api/shop", "получения товаров магазина")
-            if not shop_data or not shop_data.get('items'):
-                await interaction.followup.send("❌ Магазин временно недоступен", ephemeral=True)
-                return
+        # Get shop items
+        shop_data = await bot.api.shop()
+        if not shop_data or not shop_data.get('items'):
+            await interaction.followup.send("❌ Магазин временно недоступен", ephemeral=True)
+            return
 
         items = shop_data['items']
         if category != "all":
@@ -408,17 +441,16 @@ async def inventory_command(interaction: discord.Interaction, nickname: str):
     try:
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/search?q={nickname}", "поиска игрока")
-            if not data or not data.get('players'):
-                await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
-                return
+        data = await bot.api.search(nickname)
+        if not data or not data.get('players'):
+            await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
+            return
 
-            player = data['players'][0]
-            player_id = player['id']
+        player = data['players'][0]
+        player_id = player['id']
 
-            # Get inventory data
-            inventory_data = await fetch_json(session, f"{WEBSITE_URL}/api/player/{player_id}/inventory", "получения инвентаря")
+        # Get inventory data
+        inventory_data = await bot.api.inventory(player_id)
 
         embed = discord.Embed(
             title=f"🎒 Инвентарь {player['nickname']}",
@@ -460,17 +492,16 @@ async def quests_command(interaction: discord.Interaction, nickname: str):
     try:
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/search?q={nickname}", "поиска игрока")
-            if not data or not data.get('players'):
-                await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
-                return
+        data = await bot.api.search(nickname)
+        if not data or not data.get('players'):
+            await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
+            return
 
-            player = data['players'][0]
-            player_id = player['id']
+        player = data['players'][0]
+        player_id = player['id']
 
-            # Get quests data
-            quests_data = await fetch_json(session, f"{WEBSITE_URL}/api/player/{player_id}/quests", "получения квестов")
+        # Get quests data
+        quests_data = await bot.api.quests(player_id)
 
         embed = discord.Embed(
             title=f"📜 Квесты игрока {player['nickname']}",
@@ -511,9 +542,12 @@ async def quests_command(interaction: discord.Interaction, nickname: str):
         await interaction.followup.send("❌ Произошла ошибка при получении квестов", ephemeral=True)
 
 @bot.tree.command(name="submit_quest", description="Отправить скриншот выполнения квеста на проверку")
-async def submit_quest(interaction: discord.Interaction, quest_name: str, attachment: discord.Attachment = None):
+@app_commands.describe(quest_name="Название квеста", nickname="Ваш ник на сайте", attachment="Скриншот выполнения")
+@app_commands.guild_only()
+async def submit_quest(interaction: discord.Interaction, quest_name: str, nickname: str,
+                       attachment: discord.Attachment = None):
     try:
-        await interaction.response.defer()
+        await interaction.response.defer(ephemeral=True)
 
         if not attachment:
             await interaction.followup.send("❌ Необходимо приложить скриншот", ephemeral=True)
@@ -524,105 +558,154 @@ async def submit_quest(interaction: discord.Interaction, quest_name: str, attach
             await interaction.followup.send("❌ Необходимо приложить изображение", ephemeral=True)
             return
 
+        # Send to the review channel of the guild the command was used in
+        admin_channel = review_channel(interaction.guild)
+        if not admin_channel:
+            await interaction.followup.send(
+                "❌ Канал для заявок не найден. Обратитесь к администратору.",
+                ephemeral=True
+            )
+            return
+
+        # The website keeps the submission, so the review survives bot restarts
+        status, data = await bot.api.submit_quest(nickname, quest_name, interaction.user.id,
+                                                  interaction.guild_id, attachment.url)
+        if status != 200 or not data or not data.get('success'):
+            error = (data or {}).get('error') if status == 404 else "Не удалось сохранить заявку"
+            await interaction.followup.send(f"❌ {error}", ephemeral=True)
+            return
+
+        submission = data['submission']
+
         # Create submission embed
         embed = discord.Embed(
             title="📋 Заявка на проверку квеста",
-            description=f"**Игрок:** {interaction.user.mention}\n**Квест:** {quest_name}",
+            description=f"**Игрок:** {interaction.user.mention} ({submission['nickname']})\n"
+                        f"**Квест:** {submission['quest_title']}",
             color=0xffa500,
             timestamp=datetime.utcnow()
         )
 
         embed.add_field(name="📎 Приложение", value=f"[{attachment.filename}]({attachment.url})", inline=False)
         embed.set_image(url=attachment.url)
-        embed.set_footer(text=f"ID пользователя: {interaction.user.id}")
-
-        # Send to admin channel
-        admin_channel = None
-        for guild in bot.guilds:
-            admin_channel = discord.utils.get(guild.channels, name='quest-submissions') or \
-                           discord.utils.get(guild.channels, name='admin') or \
-                           discord.utils.get(guild.channels, name='модерация')
-            if admin_channel:
-                break
+        embed.set_footer(text=f"Заявка #{submission['id']} | ID пользователя: {interaction.user.id}")
 
-        if admin_channel:
-            view = QuestReviewView(interaction.user.id, quest_name)
-            await admin_channel.send(embed=embed, view=view)
+        message = await admin_channel.send(embed=embed, view=QuestReviewView(submission['id']))
+        await bot.api.save_review_message(submission['id'], admin_channel.id, message.id)
 
-            await interaction.followup.send(
-                "✅ Заявка отправлена на проверку! Ожидайте решения администратора.",
-                ephemeral=True
-            )
-        else:
-            await interaction.followup.send(
-                "❌ Канал для заявок не найден. Обратитесь к администратору.",
-                ephemeral=True
-            )
+        await interaction.followup.send(
+            "✅ Заявка отправлена на проверку! Ожидайте решения администратора.",
+            ephemeral=True
+        )
 
     except Exception as e:
         print(f"Ошибка в команде submit_quest: {e}")
         await interaction.followup.send("❌ Произошла ошибка при отправке заявки", ephemeral=True)
 
-class QuestReviewView(discord.ui.View):
-    def __init__(self, user_id, quest_name):
-        super().__init__(timeout=None)
-        self.user_id = user_id
-        self.quest_name = quest_name
-
-    @discord.ui.button(label="✅ Принять", style=discord.ButtonStyle.success)
-    async def accept_quest(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer()
-
-        # Here you would call your API to complete the quest
-        try:
-            async with aiohttp.ClientSession() as session:
-                response = await session.post(
-                    f"{WEBSITE_URL}/api/admin/complete_quest",
-                    json={
-                        'user_id': self.user_id,
-                        'quest_name': self.quest_name,
-                        'approved_by': str(interaction.user.id)
-                    }
-                )
-                # Optionally check response status here
-                if response.status != 200:
-                    print(f"API Error completing quest: {response.status} - {await response.text()}")
-                    await interaction.followup.send("❌ Ошибка при обработке запроса на сервере.", ephemeral=True)
-                    return
+def review_result_embed(submission):
+    approved = submission['status'] == 'approved'
+    embed = discord.Embed(
+        title="✅ Квест принят" if approved else "❌ Квест отклонен",
+        description=f"Квест **{submission['quest_title']}** для пользователя <@{submission['discord_user_id']}> "
+                    f"({submission['nickname']}) " + ("выполнен!" if approved else "отклонен"),
+        color=0x00ff00 if approved else 0xff0000
+    )
+    if approved and not submission['rewarded']:
+        embed.add_field(name="Награда", value="Уже была получена ранее, повторно не начислена", inline=False)
+    if submission.get('reason'):
+        embed.add_field(name="Причина", value=submission['reason'], inline=False)
+    embed.set_footer(text=f"{'Принял' if approved else 'Отклонил'}: {submission['reviewed_by']}")
+    return embed
+
+async def close_review(submission):
+    """Replace the buttons of a reviewed submission's message with the result and notify the player"""
+    if submission.get('review_channel_id') and submission.get('review_message_id'):
+        channel = bot.get_channel(int(submission['review_channel_id']))
+        if channel:
+            try:
+                await channel.get_partial_message(int(submission['review_message_id'])).edit(
+                    embed=review_result_embed(submission), view=None)
+            except discord.HTTPException as e:
+                print(f"Не удалось обновить заявку #{submission['id']}: {e}")
+
+    # Notify user
+    user_id = int(submission['discord_user_id'])
+    try:
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        if submission['status'] == 'approved':
+            await user.send(f"✅ Ваш квест **{submission['quest_title']}** был принят и засчитан!")
+        else:
+            await user.send(f"❌ Ваш квест **{submission['quest_title']}** был отклонен.\n"
+                            f"Причина: {submission.get('reason') or 'не указана'}")
+    except discord.Forbidden:
+        print(f"Не удалось отправить DM пользователю {user_id} (запрет DM).")
+    except Exception as e:
+        print(f"Ошибка при отправке DM пользователю {user_id}: {e}")
 
-        except Exception as e:
-            print(f"Error completing quest: {e}")
-            await interaction.followup.send("❌ Произошла ошибка при связи с сервером.", ephemeral=True)
-            return
+async def review_submissions(interaction, ids, action, reason=None):
+    """Approve or reject submissions with one website request; the interaction must be deferred
 
-        embed = discord.Embed(
-            title="✅ Квест принят",
-            description=f"Квест **{self.quest_name}** для пользователя <@{self.user_id}> выполнен!",
-            color=0x00ff00
-        )
-        embed.set_footer(text=f"Принял: {interaction.user}")
+    Returns the reviewed submissions, or None when the website request failed.
+    """
+    try:
+        status, data = await bot.api.review_quests(ids, action, str(interaction.user), reason)
+    except Exception as e:
+        print(f"Error reviewing quests: {e}")
+        await interaction.followup.send("❌ Произошла ошибка при связи с сервером.", ephemeral=True)
+        return None
 
-        await interaction.edit_original_response(embed=embed, view=None)
+    if status != 200 or not data or not data.get('success'):
+        print(f"API Error reviewing quests: {status} - {data}")
+        await interaction.followup.send("❌ Ошибка при обработке запроса на сервере.", ephemeral=True)
+        return None
 
-        # Notify user
-        try:
-            user = bot.get_user(self.user_id)
-            if user:
-                await user.send(f"✅ Ваш квест **{self.quest_name}** был принят и засчитан!")
-        except discord.Forbidden:
-            print(f"Не удалось отправить DM пользователю {self.user_id} (запрет DM).")
-        except Exception as e:
-            print(f"Ошибка при отправке DM пользователю {self.user_id}: {e}")
+    reviewed = data['reviewed']
+    await asyncio.gather(*(close_review(submission) for submission in reviewed))
+
+    skipped = len(ids) - len(reviewed)
+    if len(ids) > 1:
+        verb = "Принято" if action == 'approve' else "Отклонено"
+        await interaction.followup.send(f"✅ {verb}: {len(reviewed)}" +
+                                        (f", уже проверены: {skipped}" if skipped else ""), ephemeral=True)
+    elif skipped:
+        await interaction.followup.send("ℹ️ Эта заявка уже проверена", ephemeral=True)
+    return reviewed
+
+class QuestReviewButton(discord.ui.DynamicItem[discord.ui.Button],
+                        template=r'quest_review:(?P<action>approve|reject):(?P<id>\d+)'):
+    """Accept/reject button whose state is in its custom_id, so it keeps working after a bot restart"""
+
+    def __init__(self, action, submission_id):
+        approve = action == 'approve'
+        super().__init__(discord.ui.Button(
+            label="✅ Принять" if approve else "❌ Отклонить",
+            style=discord.ButtonStyle.success if approve else discord.ButtonStyle.danger,
+            custom_id=f"quest_review:{action}:{submission_id}"
+        ))
+        self.action = action
+        self.submission_id = submission_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['action'], int(match['id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.action == 'reject':
+            await interaction.response.send_modal(RejectQuestModal([self.submission_id]))
+            return
+        await interaction.response.defer()
+        await review_submissions(interaction, [self.submission_id], 'approve')
 
-    @discord.ui.button(label="❌ Отклонить", style=discord.ButtonStyle.danger)
-    async def reject_quest(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_modal(RejectQuestModal(self.user_id, self.quest_name))
+class QuestReviewView(discord.ui.View):
+    def __init__(self, submission_id):
+        super().__init__(timeout=None)
+        self.add_item(QuestReviewButton('approve', submission_id))
+        self.add_item(QuestReviewButton('reject', submission_id))
 
 class RejectQuestModal(discord.ui.Modal, title="Отклонить квест"):
-    def __init__(self, user_id, quest_name):
+    def __init__(self, submission_ids):
         super().__init__()
-        self.user_id = user_id
-        self.quest_name = quest_name
+        self.submission_ids = submission_ids
 
     reason = discord.ui.TextInput(
         label="Причина отклонения",
@@ -632,25 +715,73 @@ class RejectQuestModal(discord.ui.Modal, title="Отклонить квест"):
     )
 
     async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        await review_submissions(interaction, self.submission_ids, 'reject', self.reason.value)
+
+class ReviewQueueView(discord.ui.View):
+    """One page of pending submissions; the buttons act on the selection, or the whole page without one"""
+
+    def __init__(self, submissions):
+        super().__init__(timeout=300)
+        self.submission_ids = [submission['id'] for submission in submissions]
+        self.selected = []
+        self.queue_select.options = [
+            discord.SelectOption(label=f"#{s['id']} {s['nickname']} — {s['quest_title']}"[:100], value=str(s['id']))
+            for s in submissions
+        ]
+        self.queue_select.max_values = len(submissions)
+
+    def targets(self):
+        return self.selected or self.submission_ids
+
+    @discord.ui.select(placeholder="Выберите заявки (по умолчанию - вся страница)", min_values=0)
+    async def queue_select(self, interaction: discord.Interaction, select: discord.ui.Select):
+        self.selected = [int(value) for value in select.values]
+        await interaction.response.defer()
+
+    @discord.ui.button(label="✅ Принять", style=discord.ButtonStyle.success)
+    async def approve_selected(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer()
+        if await review_submissions(interaction, self.targets(), 'approve') is not None:
+            await interaction.edit_original_response(view=None)
+
+    @discord.ui.button(label="❌ Отклонить", style=discord.ButtonStyle.danger)
+    async def reject_selected(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(RejectQuestModal(self.targets()))
+
+@bot.tree.command(name="review_queue", description="Заявки на квесты, ожидающие проверки")
+@app_commands.default_permissions(manage_messages=True)
+@app_commands.guild_only()
+async def review_queue(interaction: discord.Interaction):
+    try:
+        await interaction.response.defer(ephemeral=True)
+
+        data = await bot.api.quest_submissions(guild_id=interaction.guild_id, limit=REVIEW_QUEUE_PAGE)
+        if not data or not data.get('success'):
+            await interaction.followup.send("❌ Не удалось получить заявки", ephemeral=True)
+            return
+        if not data['submissions']:
+            await interaction.followup.send("✅ Нет заявок, ожидающих проверки", ephemeral=True)
+            return
+
+        submissions = data['submissions']
+        lines = [f"`#{s['id']}` <@{s['discord_user_id']}> **{s['nickname']}** — {s['quest_title']}"
+                 + (f" [скриншот]({s['attachment_url']})" if s.get('attachment_url') else "")
+                 for s in submissions]
         embed = discord.Embed(
-            title="❌ Квест отклонен",
-            description=f"Квест **{self.quest_name}** для пользователя <@{self.user_id}> отклонен",
-            color=0xff0000
+            title="📋 Заявки на проверку",
+            description="\n".join(lines)[:4000],
+            color=0xffa500,
+            timestamp=datetime.utcnow()
         )
-        embed.add_field(name="Причина", value=self.reason.value, inline=False)
-        embed.set_footer(text=f"Отклонил: {interaction.user}")
+        if data.get('next_cursor'):
+            embed.set_footer(text=f"Показаны первые {len(submissions)}; после проверки вызовите команду снова")
 
-        await interaction.response.edit_message(embed=embed, view=None)
+        await interaction.followup.send(embed=embed, view=ReviewQueueView(submissions), ephemeral=True)
 
-        # Notify user
-        try:
-            user = bot.get_user(self.user_id)
-            if user:
-                await user.send(f"❌ Ваш квест **{self.quest_name}** был отклонен.\nПричина: {self.reason.value}")
-        except discord.Forbidden:
-            print(f"Не удалось отправить DM пользователю {self.user_id} (запрет DM).")
-        except Exception as e:
-            print(f"Ошибка при отправке DM пользователю {self.user_id}: {e}")
+    except Exception as e:
+        print(f"Ошибка в команде review_queue: {e}")
+        await interaction.followup.send("❌ Произошла ошибка при получении заявок", ephemeral=True)
 
 # --- Existing ASCENDView class ---
 class ASCENDView(discord.ui.View):
@@ -676,19 +807,18 @@ class ASCENDView(discord.ui.View):
         await interaction.response.defer()
 
         try:
-            async with aiohttp.ClientSession() as session:
-                ascend_data = await fetch_json(session, f"{WEBSITE_URL}/api/player/{self.player_id}/ascend-data?gamemode={select.values[0]}", "получения ASCEND данных")
+            ascend_data = await bot.api.ascend_data(self.player_id, select.values[0])
 
-                if not ascend_data or not ascend_data.get('success'):
-                    await interaction.followup.send("❌ ASCEND данные недоступны", ephemeral=True)
-                    return
+            if not ascend_data or not ascend_data.get('success'):
+                await interaction.followup.send("❌ ASCEND данные недоступны", ephemeral=True)
+                return
 
-                ascend = ascend_data['ascend']
+            ascend = ascend_data['ascend']
 
             embed = discord.Embed(
                 title="🎮 ASCEND Performance Card",
                 description=f"**{self.nickname}** | {select.values[0].title()}",
-                color=get_tier_color(ascend['overall_tier']),
+                color=tier_color(ascend['overall_tier']),
                 timestamp=datetime.utcnow()
             )
 
@@ -724,14 +854,13 @@ class ASCENDView(discord.ui.View):
         await interaction.response.defer()
 
         try:
-            async with aiohttp.ClientSession() as session:
-                history_data = await fetch_json(session, f"{WEBSITE_URL}/api/player/{self.player_id}/ascend-history?gamemode={self.current_gamemode}&limit=10", "получения истории")
+            history_data = await bot.api.ascend_history(self.player_id, self.current_gamemode, limit=10)
 
-                if not history_data or not history_data.get('success'):
-                    await interaction.followup.send("❌ История недоступна", ephemeral=True)
-                    return
+            if not history_data or not history_data.get('success'):
+                await interaction.followup.send("❌ История недоступна", ephemeral=True)
+                return
 
-                history = history_data['history']
+            history = history_data['history']
 
             embed = discord.Embed(
                 title=f"📈 История оценок - {self.nickname}",
@@ -765,14 +894,13 @@ async def leaderboard_command(interaction: discord.Interaction, sort_by: str = "
 
         limit = min(max(limit, 5), 20)
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/leaderboard?sort={sort_by}&limit={limit}", "получения таблицы лидеров")
+        data = await bot.api.leaderboard(sort=sort_by, limit=limit)
 
-            if not data or not data.get('players'):
-                await interaction.followup.send("❌ Не удалось получить таблицу лидеров", ephemeral=True)
-                return
+        if not data or not data.get('players'):
+            await interaction.followup.send("❌ Не удалось получить таблицу лидеров", ephemeral=True)
+            return
 
-            players = data['players']
+        players = data['players']
 
         embed = discord.Embed(
             title="🏆 Таблица лидеров Elite Squad",
@@ -796,19 +924,46 @@ async def leaderboard_command(interaction: discord.Interaction, sort_by: str = "
         print(f"Ошибка в команде leaderboard: {e}")
         await interaction.followup.send("❌ Произошла ошибка при получении таблицы лидеров", ephemeral=True)
 
+@bot.tree.command(name="lowkarma", description="Показать игроков с низкой кармой")
+async def low_karma_command(interaction: discord.Interaction, threshold: int = 20):
+    try:
+        await interaction.response.defer()
+
+        data = await bot.api.players_below('reputation', threshold, limit=LOW_KARMA_PAGE)
+
+        if not data or not data.get('success'):
+            await interaction.followup.send("❌ Не удалось получить список игроков", ephemeral=True)
+            return
+
+        players = data['players']
+        embed = discord.Embed(
+            title="⚠️ Игроки с низкой кармой",
+            description=f"Карма ниже {threshold}" + (f" (первые {len(players)})" if data.get('next_cursor') else ""),
+            color=0xff6b6b,
+            timestamp=datetime.utcnow()
+        )
+        karma_list = [f"**{p['nickname']}** - Карма: {p['reputation']}" for p in players]
+        embed.add_field(name="Игроки:", value="\n".join(karma_list) or "Нет игроков", inline=False)
+        embed.set_footer(text="Elite Squad Karma")
+
+        await interaction.followup.send(embed=embed)
+
+    except Exception as e:
+        print(f"Ошибка в команде lowkarma: {e}")
+        await interaction.followup.send("❌ Произошла ошибка при получении списка", ephemeral=True)
+
 @bot.tree.command(name="player", description="Показать статистику игрока")
 async def player_command(interaction: discord.Interaction, nickname: str):
     try:
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/search?q={nickname}", "поиска игрока")
+        data = await bot.api.search(nickname)
 
-            if not data or not data.get('players'):
-                await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
-                return
+        if not data or not data.get('players'):
+            await interaction.followup.send(f"❌ Игрок `{nickname}` не найден", ephemeral=True)
+            return
 
-            player = data['players'][0]
+        player = data['players'][0]
 
         embed = discord.Embed(
             title=f"👤 Профиль игрока {player['nickname']}",
@@ -840,12 +995,11 @@ async def stats_command(interaction: discord.Interaction):
     try:
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            data = await fetch_json(session, f"{WEBSITE_URL}/api/stats", "получения статистики")
+        data = await bot.api.stats()
 
-            if not data:
-                await interaction.followup.send("❌ Не удалось получить статистику сервера", ephemeral=True)
-                return
+        if not data:
+            await interaction.followup.send("❌ Не удалось получить статистику сервера", ephemeral=True)
+            return
 
         embed = discord.Embed(
             title="📊 Статистика Elite Squad",
@@ -895,6 +1049,15 @@ async def help_command(interaction: discord.Interaction):
         name="💜 Система кармы",
         value="""
         `/karma [nickname]` - Информация о карме
+        `/lowkarma [threshold]` - Игроки с низкой кармой
+        """,
+        inline=False
+    )
+
+    embed.add_field(
+        name="⚙️ Настройка сервера",
+        value="""
+        `/setup_channel <announce|review> [enabled]` - Канал уведомлений или проверки квестов
         """,
         inline=False
     )
@@ -912,7 +1075,8 @@ async def help_command(interaction: discord.Interaction):
         name="📜 Квесты",
         value="""
         `/quests <nickname>` - Квесты игрока
-        `/submit_quest <name> [screenshot]` - Отправить на проверку
+        `/submit_quest <name> <nickname> [screenshot]` - Отправить на проверку
+        `/review_queue` - Заявки на проверку (модераторы)
         """,
         inline=False
     )
@@ -925,16 +1089,6 @@ async def help_command(interaction: discord.Interaction):
 
     await interaction.response.send_message(embed=embed)
 
-def get_tier_color(tier):
-    colors = {
-        'S+': 0xff1744, 'S': 0xff5722,
-        'A+': 0xff9800, 'A': 0xffc107,
-        'B+': 0x4caf50, 'B': 0x2196f3,
-        'C+': 0x9c27b0, 'C': 0x607d8b,
-        'D': 0x795548
-    }
-    return colors.get(tier, 0x607d8b)
-
 def get_skill_emojis(gamemode):
     emoji_maps = {
         'bedwars': ['⚔️', '🔥', '🧱', '🧠'],
@@ -0,0 +1,167 @@
+"""
+Database engine configuration
+
+Pool sizing follows the gunicorn worker class (sync, gthread, gevent/eventlet)
+and can be overridden with DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT /
+DB_POOL_RECYCLE. SQLite connections get WAL and cache pragmas on connect;
+PostgreSQL connections get a statement timeout, meant for web requests:
+offline scripts (seeds, history compaction, backups) call
+use_offline_settings() before importing the app to lift it. Every pool records
+checkout wait times, exposed through pool_metrics().
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 'SQLITE_BUSY_TIMEOUT_MS', 5000),
+    ('mmap_size', 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    ('cache_size', 'SQLITE_CACHE_SIZE', -64000)  # negative = KiB, i.e. 64 MB
+)
+
+def _env_int(environ, name, default):
+    value = environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def pool_settings(environ=os.environ):
+    """Pool size and overflow for one worker process"""
+    worker_class = environ.get('GUNICORN_WORKER_CLASS', 'sync')
+    threads = _env_int(environ, 'GUNICORN_THREADS', 1)
+
+    if worker_class in ('gevent', 'eventlet'):
+        # Many greenlets per process; cap the connections, let them queue
+        pool_size, max_overflow = 10, 10
+    elif worker_class == 'gthread' or threads > 1:
+        pool_size, max_overflow = threads, max(2, threads // 2)
+    else:
+        # One request at a time, plus background work (imports, streams)
+        pool_size, max_overflow = 2, 2
+
+    return {
+        'pool_size': _env_int(environ, 'DB_POOL_SIZE', pool_size),
+        'max_overflow': _env_int(environ, 'DB_MAX_OVERFLOW', max_overflow),
+        'pool_timeout': _env_int(environ, 'DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int(environ, 'DB_POOL_RECYCLE', 280)
+    }
+
+def use_offline_settings(environ=os.environ):
+    """No statement timeout for a command-line job; call before the app (and its engine) is created"""
+    environ['DB_STATEMENT_TIMEOUT_MS'] = '0'
+
+def engine_options(database_url, environ=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given database URL"""
+    options = {
+        # Compiled SQL cache, shared by every statement shape the app uses
+        'query_cache_size': _env_int(environ, 'DB_QUERY_CACHE_SIZE', 1200)
+    }
+
+    if database_url.startswith('sqlite'):
+        if ':memory:' not in database_url and database_url not in ('sqlite://', 'sqlite:///'):
+            options['poolclass'] = MeasuredQueuePool
+        return options
+
+    options.update(pool_settings(environ))
+    options['poolclass'] = MeasuredQueuePool
+    options['pool_pre_ping'] = True
+
+    if database_url.startswith('postgresql'):
+        statement_timeout = _env_int(environ, 'DB_STATEMENT_TIMEOUT_MS', 15000)
+        options['connect_args'] = {
+            'connect_timeout': _env_int(environ, 'DB_CONNECT_TIMEOUT', 10),
+            'application_name': environ.get('DB_APPLICATION_NAME', 'bedwars-leaderboard'),
+            'options': f'-c statement_timeout={statement_timeout}'
+        }
+    return options
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            name, value = pragma[0], pragma[1]
+            if len(pragma) == 3:
+                value = _env_int(os.environ, pragma[1], pragma[2])
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+class PoolMetrics:
+    """Checkout counters and wait times for one pool (per process)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def to_dict(self, pool):
+        with self._lock:
+            return {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3)
+            }
+
+class MeasuredQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    slow_checkout_seconds = _env_int(os.environ, 'DB_POOL_WAIT_WARN_MS', 500) / 1000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics  # keep counting across engine.dispose()
+        return pool
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record(time.perf_counter() - started_at, timed_out=True)
+            raise
+        waited = time.perf_counter() - started_at
+        self.metrics.record(waited)
+        if waited > self.slow_checkout_seconds:
+            logger.warning(f"Waited {waited * 1000:.0f} ms for a database connection "
+                           f"({self.checkedout()} checked out, pool size {self.size()})")
+        return connection
+
+def pool_metrics(engines):
+    """Metrics for every measured engine, keyed by bind name ('default' for the main one)"""
+    metrics = {}
+    for name, engine in engines.items():
+        pool = engine.pool
+        if isinstance(pool, MeasuredQueuePool):
+            metrics[name or 'default'] = dict(pool.metrics.to_dict(pool), dialect=engine.dialect.name)
+    return metrics
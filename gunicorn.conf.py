@@ -0,0 +1,24 @@
+"""
+Gunicorn settings (loaded automatically from the working directory)
+
+The app is imported once in the master and forked into the workers, so worker
+boot costs a fork instead of importing routes/models again. Importing the app
+opens no database connections; post_fork drops any pooled ones anyway.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))  # engine_config sizes the DB pool from these
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+if worker_class == 'sync' and threads == 1:
+    # A long-polled /api/changes would hold one of the few sync workers; the bot polls instead
+    os.environ.setdefault('CHANGE_FEED_MAX_WAIT', '0')
+
+def post_fork(server, worker):
+    from app import app, dispose_engines
+    dispose_engines(app)
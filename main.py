@@ -3,13 +3,14 @@ from app import app, db
 import os
 
 if __name__ == '__main__':
-    with app.app_context():
-        try:
-            # Ensure all tables are created
-            db.create_all()
-            print("🏗️ Database initialized successfully!")
-        except Exception as e:
-            print(f"Database error: {e}")
+    try:
+        # Bring the local database up to date (production runs this as a release step)
+        from migrate import upgrade_database
+        from seeds import seed_database
+        upgrade_database()
+        seed_database()
+    except Exception as e:
+        print(f"Database error: {e}")
     
     # Use environment PORT or default to 5000
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Database migrations (Alembic), run once per deploy as a release step
+
+    python migrate.py             # upgrade to the latest revision
+    python migrate.py current     # show the applied revision
+    python migrate.py history     # list revisions
+
+Databases created before migrations existed (the schema used to be recreated at
+every boot) are upgraded in place: the initial revision only creates the tables
+they are missing and the next one adds missing columns.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from alembic import command
+from alembic.config import Config
+
+from app import app, db
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alembic.ini')
+
+def alembic_config(connection=None):
+    """Alembic config; an open connection makes env.py reuse it"""
+    config = Config(ALEMBIC_INI)
+    if connection is not None:
+        config.attributes['connection'] = connection
+    return config
+
+def upgrade_database(revision='head'):
+    """Apply migrations up to revision"""
+    started_at = time.perf_counter()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            if connection.dialect.name == 'postgresql':
+                # Index builds and data fixes may outlive the request statement timeout
+                connection.exec_driver_sql('SET statement_timeout = 0')
+            command.upgrade(alembic_config(connection), revision)
+
+    print(f"✅ Database migrated to {revision} in {time.perf_counter() - started_at:.2f}s")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply database migrations')
+    parser.add_argument('command', nargs='?', default='upgrade', choices=['upgrade', 'current', 'history'])
+    parser.add_argument('--revision', default='head', help='target revision for upgrade')
+    args = parser.parse_args()
+
+    if args.command == 'upgrade':
+        upgrade_database(args.revision)
+    else:
+        with app.app_context():
+            with db.engine.connect() as connection:
+                getattr(command, args.command)(alembic_config(connection))
@@ -0,0 +1,58 @@
+"""
+Alembic environment: runs migrations against the application's database
+"""
+
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+
+# Add the project root to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+import models  # noqa: F401 - registers every model on db.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = db.metadata
+
+def _configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        compare_type=True,
+        **kwargs
+    )
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of running it (alembic upgrade --sql)"""
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    _configure(url=url, literal_binds=True, dialect_opts={'paramstyle': 'named'},
+               render_as_batch=url.startswith('sqlite'))
+    with context.begin_transaction():
+        context.run_migrations()
+
+def _run_with_connection(connection):
+    # SQLite cannot ALTER most things in place; batch mode rebuilds the table
+    _configure(connection=connection, render_as_batch=connection.dialect.name == 'sqlite')
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    # Callers (tests, migrate.py) may hand over an open connection
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    with app.app_context():
+        with db.engine.connect() as connection:
+            _run_with_connection(connection)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
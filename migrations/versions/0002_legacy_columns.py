@@ -0,0 +1,150 @@
+"""Absorb the ad hoc migration scripts
+
+Replaces migrate_db.py (admin_custom_role emoji columns), migrate_shop_purchase.py
+(price paid columns) and migrate_ascend_history.py (JSON scores to integer
+columns), and adds the (player_id, gamemode) unique constraint that ASCEND
+upserts rely on, dropping duplicate rows first. Every step checks the live schema first, so this is a no-op on
+databases created by 0001 and only upgrades databases that predate migrations.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 04:20:12.381204
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SKILL_SLOTS = ('skill1', 'skill2', 'skill3', 'skill4')
+BATCH_SIZE = 1000
+
+
+def _columns(table_name):
+    inspector = sa.inspect(op.get_bind())
+    if table_name not in inspector.get_table_names():
+        return None
+    return {column['name'] for column in inspector.get_columns(table_name)}
+
+
+def _add_missing(table_name, columns):
+    existing = _columns(table_name)
+    if existing is None:
+        return
+    missing = [column for column in columns if column.name not in existing]
+    if missing:
+        with op.batch_alter_table(table_name) as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+
+
+def _parse_scores(raw):
+    if not raw:
+        return None
+    try:
+        scores = json.loads(raw)
+        return [scores.get(slot) for slot in SKILL_SLOTS]
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def _convert_ascend_history():
+    columns = _columns('ascend_history')
+    if columns is None or 'new_scores' not in columns:
+        return
+
+    _add_missing('ascend_history', [sa.Column(f'old_{slot}_score', sa.Integer(), nullable=True) for slot in SKILL_SLOTS] +
+                 [sa.Column(f'new_{slot}_score', sa.Integer(), nullable=False, server_default='0') for slot in SKILL_SLOTS])
+
+    bind = op.get_bind()
+    history = sa.table('ascend_history', sa.column('id', sa.Integer), sa.column('old_scores', sa.Text),
+                       sa.column('new_scores', sa.Text),
+                       *[sa.column(f'{prefix}_{slot}_score', sa.Integer) for prefix in ('old', 'new') for slot in SKILL_SLOTS])
+    update = history.update().where(history.c.id == sa.bindparam('row_id')).values(
+        {f'{prefix}_{slot}_score': sa.bindparam(f'{prefix}_{slot}') for prefix in ('old', 'new') for slot in SKILL_SLOTS}
+    )
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(history.c.id, history.c.old_scores, history.c.new_scores)
+            .where(history.c.id > last_id).order_by(history.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        params = []
+        for row in rows:
+            old_scores = _parse_scores(row.old_scores) or [None] * 4
+            new_scores = [score or 0 for score in (_parse_scores(row.new_scores) or [0] * 4)]
+            param = {'row_id': row.id}
+            param.update({f'old_{slot}': score for slot, score in zip(SKILL_SLOTS, old_scores)})
+            param.update({f'new_{slot}': score for slot, score in zip(SKILL_SLOTS, new_scores)})
+            params.append(param)
+        bind.execute(update, params)
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('ascend_history') as batch_op:
+        batch_op.drop_column('old_scores')
+        batch_op.drop_column('new_scores')
+
+
+def _create_missing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    if 'ascend_history' not in inspector.get_table_names():
+        return
+    existing = {index['name'] for index in inspector.get_indexes('ascend_history')}
+    if 'ix_ascend_history_player_mode_created' not in existing:
+        op.create_index('ix_ascend_history_player_mode_created', 'ascend_history',
+                        ['player_id', 'gamemode', 'created_at'], unique=False)
+    if 'ix_ascend_history_created' not in existing:
+        op.create_index('ix_ascend_history_created', 'ascend_history', ['created_at'], unique=False)
+
+
+def _ensure_ascend_data_unique():
+    """Old databases have no unique (player_id, gamemode); keep the newest row of each pair and add it"""
+    inspector = sa.inspect(op.get_bind())
+    if 'ascend_data' not in inspector.get_table_names():
+        return
+    unique_keys = [set(constraint['column_names']) for constraint in inspector.get_unique_constraints('ascend_data')]
+    unique_keys += [set(index['column_names']) for index in inspector.get_indexes('ascend_data') if index['unique']]
+    if {'player_id', 'gamemode'} in unique_keys:
+        return
+
+    ascend = sa.table('ascend_data', sa.column('id', sa.Integer), sa.column('player_id', sa.Integer),
+                      sa.column('gamemode', sa.String))
+    newest = sa.select(sa.func.max(ascend.c.id)).group_by(ascend.c.player_id, ascend.c.gamemode)
+    op.get_bind().execute(ascend.delete().where(ascend.c.id.notin_(newest)))
+
+    with op.batch_alter_table('ascend_data') as batch_op:
+        batch_op.create_unique_constraint('uq_ascend_data_player_gamemode', ['player_id', 'gamemode'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _add_missing('admin_custom_role', [
+        sa.Column('emoji_url', sa.String(length=256), nullable=True),
+        sa.Column('emoji_class', sa.String(length=64), nullable=True),
+        sa.Column('emoji_is_animated', sa.Boolean(), nullable=True, server_default=sa.false())
+    ])
+    _add_missing('shop_purchase', [
+        sa.Column('price_paid_coins', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('price_paid_reputation', sa.Integer(), nullable=False, server_default='0')
+    ])
+    _convert_ascend_history()
+    _create_missing_indexes()
+    _ensure_ascend_data_unique()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The legacy shapes were never versioned; 0001 already contains these columns
+    pass
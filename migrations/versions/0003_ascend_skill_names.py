@@ -0,0 +1,62 @@
+"""Sync stored ASCEND skill names with the game mode configuration
+
+Replaces migrate_ascend_skills.py: fixes the skill names of the default game
+modes and rewrites ASCENDData skill names per game mode with one UPDATE per
+skill slot.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 04:20:47.905517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SKILL_FIELDS = ('skill1_name', 'skill2_name', 'skill3_name', 'skill4_name')
+
+# Canonical skill names at the time of this revision
+DEFAULT_SKILL_NAMES = {
+    'bedwars': ('PVP', 'Clutching', 'Block Placement', 'Gamesense'),
+    'kitpvp': ('Aiming', 'Healing (soups; pots)', 'Movement', 'Spacing'),
+    'skywars': ('Looting', 'Potting', 'Pearling', 'Melee'),
+    'bridgefight': ('Block Edits', 'Bridge Fights', 'Gamesense', 'PvP'),
+    'sumo': ('Gamesense', 'KB control', 'Mechanics', 'Movement'),
+    'fireball_fight': ('Attack/Defense', 'Fireball usage', 'Gamesense', 'PvP'),
+    'bridge': ('Bypassing', 'Defense', 'Gamesense', 'PvP')
+}
+
+game_mode = sa.table('game_mode', sa.column('name', sa.String), *[sa.column(field, sa.String) for field in SKILL_FIELDS])
+ascend_data = sa.table('ascend_data', sa.column('gamemode', sa.String), *[sa.column(field, sa.String) for field in SKILL_FIELDS])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    for name, skill_names in DEFAULT_SKILL_NAMES.items():
+        bind.execute(game_mode.update().where(game_mode.c.name == name).values(dict(zip(SKILL_FIELDS, skill_names))))
+
+    # Game modes added by admins keep their own names; copy them over as well
+    for field in SKILL_FIELDS:
+        expected = sa.select(game_mode.c[field]).where(game_mode.c.name == ascend_data.c.gamemode).scalar_subquery()
+        bind.execute(
+            ascend_data.update()
+            .where(ascend_data.c.gamemode.in_(sa.select(game_mode.c.name)))
+            .where(ascend_data.c[field] != expected)
+            .values({field: expected})
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data fix only; the previous names were inconsistent and are not restored
+    pass
@@ -0,0 +1,28 @@
+"""Case-insensitive nickname index for /api/search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:12:31.504218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_player_nickname_lower', 'player', [sa.text('lower(nickname)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_player_nickname_lower', table_name='player')
@@ -0,0 +1,30 @@
+"""Keyset indexes for the low karma / reputation scans
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 11:20:44.630927
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_player_karma_id', 'player', ['karma', 'id'], unique=False)
+    op.create_index('ix_player_reputation_id', 'player', ['reputation', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_player_reputation_id', table_name='player')
+    op.drop_index('ix_player_karma_id', table_name='player')
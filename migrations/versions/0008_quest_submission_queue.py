@@ -0,0 +1,48 @@
+"""Persistent quest review queue for the Discord bot
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 13:42:08.517264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('quest_submission',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('quest_id', sa.Integer(), nullable=False),
+    sa.Column('discord_user_id', sa.String(length=30), nullable=False),
+    sa.Column('discord_guild_id', sa.String(length=30), nullable=True),
+    sa.Column('attachment_url', sa.String(length=500), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('review_channel_id', sa.String(length=30), nullable=True),
+    sa.Column('review_message_id', sa.String(length=30), nullable=True),
+    sa.Column('reviewed_by', sa.String(length=100), nullable=True),
+    sa.Column('reviewed_at', sa.DateTime(), nullable=True),
+    sa.Column('reason', sa.String(length=500), nullable=True),
+    sa.Column('rewarded', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['player_id'], ['player.id'], ),
+    sa.ForeignKeyConstraint(['quest_id'], ['quest.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quest_submission_status_id', 'quest_submission', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_quest_submission_status_id', table_name='quest_submission')
+    op.drop_table('quest_submission')
@@ -0,0 +1,36 @@
+"""Discord bot guild channels stored on the website
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 18:05:41.902318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, Sequence[str], None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bot_guild_config',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('guild_id', sa.String(length=30), nullable=False),
+    sa.Column('announce_channel_id', sa.String(length=30), nullable=True),
+    sa.Column('review_channel_id', sa.String(length=30), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('guild_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bot_guild_config')
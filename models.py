@@ -1,8 +1,32 @@
 from app import db
-from datetime import datetime
-from sqlalchemy import func
+from datetime import datetime, date, timedelta
+from sqlalchemy import func, event
+from sqlalchemy.orm import Session, object_session
 from functools import lru_cache
 import json
+import time
+from types import MappingProxyType
+from bisect import bisect_right
+
+from ascend_tiers import calculate_tier_from_score
+from change_feed import record_events, tier_change_event
+
+# Hypixel level thresholds (experience required for levels 1-100)
+LEVEL_THRESHOLDS = [
+    0, 10000, 22500, 37500, 55000, 75000, 97500, 122500, 150000, 180000,
+    212500, 247500, 285000, 325000, 367500, 412500, 460000, 510000, 562500, 617500,
+    675000, 735000, 797500, 862500, 930000, 1000000, 1072500, 1147500, 1225000, 1305000,
+    1387500, 1472500, 1560000, 1650000, 1742500, 1837500, 1935000, 2035000, 2137500, 2242500,
+    2350000, 2460000, 2572500, 2687500, 2805000, 2925000, 3047500, 3172500, 3300000, 3430000,
+    3562500, 3697500, 3835000, 3975000, 4117500, 4262500, 4410000, 4560000, 4712500, 4867500,
+    5025000, 5185000, 5347500, 5512500, 5680000, 5850000, 6022500, 6197500, 6375000, 6555000,
+    6737500, 6922500, 7110000, 7300000, 7492500, 7687500, 7885000, 8085000, 8287500, 8492500,
+    8700000, 8910000, 9122500, 9337500, 9555000, 9775000, 9997500, 10222500, 10450000, 10680000,
+    10912500, 11147500, 11385000, 11625000, 11867500, 12112500, 12360000, 12610000, 12862500, 13117500
+]
+
+# ASCEND tiers from lowest to highest
+TIER_VALUES = {'D': 1, 'C': 2, 'C+': 3, 'B': 4, 'B+': 5, 'A': 6, 'A+': 7, 'S': 8, 'S+': 9}
 
 class ASCENDHistory(db.Model):
     """Model for storing ASCEND evaluation history"""
@@ -16,8 +40,14 @@ class ASCENDHistory(db.Model):
     new_overall_tier = db.Column(db.String(3), nullable=False)
     
     # Score changes
-    old_scores = db.Column(db.Text, nullable=True)  # JSON
-    new_scores = db.Column(db.Text, nullable=False)  # JSON
+    old_skill1_score = db.Column(db.Integer, nullable=True)
+    old_skill2_score = db.Column(db.Integer, nullable=True)
+    old_skill3_score = db.Column(db.Integer, nullable=True)
+    old_skill4_score = db.Column(db.Integer, nullable=True)
+    new_skill1_score = db.Column(db.Integer, nullable=False, default=0)
+    new_skill2_score = db.Column(db.Integer, nullable=False, default=0)
+    new_skill3_score = db.Column(db.Integer, nullable=False, default=0)
+    new_skill4_score = db.Column(db.Integer, nullable=False, default=0)
     
     # Change details
     change_type = db.Column(db.String(20), default='update', nullable=False)  # update, upgrade, downgrade
@@ -28,24 +58,212 @@ class ASCENDHistory(db.Model):
     
     # Relationships
     player = db.relationship('Player', backref='ascend_history')
+
+    # Matches the per-player history lookup: filter by player and mode, newest first
+    __table_args__ = (
+        db.Index('ix_ascend_history_player_mode_created', 'player_id', 'gamemode', 'created_at'),
+        db.Index('ix_ascend_history_created', 'created_at'),
+    )
+
+    SKILL_SLOTS = ('skill1', 'skill2', 'skill3', 'skill4')
     
+    @staticmethod
+    def get_change_type(old_tier, new_tier):
+        """Classify a tier change as update, upgrade or downgrade"""
+        if not old_tier or old_tier == new_tier:
+            return 'update'
+        if TIER_VALUES.get(new_tier, 1) > TIER_VALUES.get(old_tier, 1):
+            return 'upgrade'
+        return 'downgrade'
+
+    @classmethod
+    def score_columns(cls, prefix, scores):
+        """Map a sequence of four skill scores onto old_/new_ score columns"""
+        if scores is None:
+            return {f'{prefix}_{slot}_score': None for slot in cls.SKILL_SLOTS}
+        return {f'{prefix}_{slot}_score': score for slot, score in zip(cls.SKILL_SLOTS, scores)}
+
+    def _scores(self, prefix):
+        scores = {slot: getattr(self, f'{prefix}_{slot}_score') for slot in self.SKILL_SLOTS}
+        if all(score is None for score in scores.values()):
+            return None
+        return scores
+
     def to_dict(self):
         """Convert to dictionary for API responses"""
-        import json
         return {
             'id': self.id,
             'player_id': self.player_id,
             'gamemode': self.gamemode,
             'old_overall_tier': self.old_overall_tier,
             'new_overall_tier': self.new_overall_tier,
-            'old_scores': json.loads(self.old_scores) if self.old_scores else None,
-            'new_scores': json.loads(self.new_scores) if self.new_scores else None,
+            'old_scores': self._scores('old'),
+            'new_scores': self._scores('new'),
             'change_type': self.change_type,
             'evaluator_name': self.evaluator_name,
             'comment': self.comment,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+    @classmethod
+    def compact_older_than(cls, months, batch_size=1000):
+        """Roll up history older than the given number of months into monthly summaries
+
+        Rows are streamed in (player, gamemode, created_at) order, merged into
+        ASCENDHistorySummary and deleted in the same transaction.
+        Returns (compacted rows, summaries written).
+        """
+        now = datetime.utcnow()
+        month_index = now.year * 12 + now.month - 1 - max(0, int(months))
+        cutoff = datetime(month_index // 12, month_index % 12 + 1, 1)
+
+        max_id = db.session.query(func.max(cls.id)).filter(cls.created_at < cutoff).scalar()
+        if max_id is None:
+            return 0, 0
+
+        pending = []
+        current = None
+        compacted = 0
+        written = 0
+
+        columns = [cls.player_id, cls.gamemode, cls.old_overall_tier, cls.new_overall_tier,
+                   cls.change_type, cls.created_at] + [getattr(cls, f'new_{slot}_score') for slot in cls.SKILL_SLOTS]
+        query = db.session.query(*columns).filter(
+            cls.created_at < cutoff,
+            cls.id <= max_id
+        ).order_by(cls.player_id, cls.gamemode, cls.created_at).execution_options(yield_per=batch_size)
+
+        for entry in query:
+            month = date(entry.created_at.year, entry.created_at.month, 1)
+            key = (entry.player_id, entry.gamemode, month)
+            if current is None or current.key != key:
+                if current is not None:
+                    pending.append(current)
+                current = ASCENDHistorySummary.start(key, entry)
+            current.add(entry)
+            compacted += 1
+
+            if len(pending) >= batch_size:
+                written += ASCENDHistorySummary.merge_pending(pending)
+                pending = []
+
+        if current is not None:
+            pending.append(current)
+        written += ASCENDHistorySummary.merge_pending(pending)
+
+        cls.query.filter(cls.created_at < cutoff, cls.id <= max_id).delete(synchronize_session=False)
+        db.session.commit()
+        return compacted, written
+
+class ASCENDHistorySummary(db.Model):
+    """Monthly rollup of compacted ASCEND evaluation history"""
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
+    gamemode = db.Column(db.String(50), default='bedwars', nullable=False)
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+
+    evaluation_count = db.Column(db.Integer, default=0, nullable=False)
+    upgrade_count = db.Column(db.Integer, default=0, nullable=False)
+    downgrade_count = db.Column(db.Integer, default=0, nullable=False)
+
+    first_overall_tier = db.Column(db.String(3), nullable=True)
+    last_overall_tier = db.Column(db.String(3), nullable=False)
+
+    # Totals of new scores, averages are total / evaluation_count
+    skill1_score_total = db.Column(db.Integer, default=0, nullable=False)
+    skill2_score_total = db.Column(db.Integer, default=0, nullable=False)
+    skill3_score_total = db.Column(db.Integer, default=0, nullable=False)
+    skill4_score_total = db.Column(db.Integer, default=0, nullable=False)
+
+    last_evaluated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('player_id', 'gamemode', 'month', name='uq_ascend_history_summary_month'),
+    )
+
+    SKILL_SLOTS = ('skill1', 'skill2', 'skill3', 'skill4')
+
+    @property
+    def key(self):
+        return (self.player_id, self.gamemode, self.month)
+
+    @classmethod
+    def start(cls, key, entry):
+        """Create an empty summary for the month of a history entry"""
+        player_id, gamemode, month = key
+        summary = cls(player_id=player_id, gamemode=gamemode, month=month,
+                      evaluation_count=0, upgrade_count=0, downgrade_count=0,
+                      first_overall_tier=entry.old_overall_tier or entry.new_overall_tier,
+                      last_overall_tier=entry.new_overall_tier)
+        for slot in cls.SKILL_SLOTS:
+            setattr(summary, f'{slot}_score_total', 0)
+        return summary
+
+    def add(self, entry):
+        """Fold one history entry (in chronological order) into the summary"""
+        self.evaluation_count += 1
+        if entry.change_type == 'upgrade':
+            self.upgrade_count += 1
+        elif entry.change_type == 'downgrade':
+            self.downgrade_count += 1
+        for slot in self.SKILL_SLOTS:
+            total = f'{slot}_score_total'
+            setattr(self, total, getattr(self, total) + (getattr(entry, f'new_{slot}_score') or 0))
+        self.last_overall_tier = entry.new_overall_tier
+        self.last_evaluated_at = entry.created_at
+
+    def merge(self, other):
+        """Merge another summary of the same month into this one"""
+        if other.last_evaluated_at and self.last_evaluated_at and other.last_evaluated_at < self.last_evaluated_at:
+            self.first_overall_tier = other.first_overall_tier
+        else:
+            self.last_overall_tier = other.last_overall_tier
+            self.last_evaluated_at = other.last_evaluated_at
+        for field in ('evaluation_count', 'upgrade_count', 'downgrade_count'):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        for slot in self.SKILL_SLOTS:
+            total = f'{slot}_score_total'
+            setattr(self, total, getattr(self, total) + getattr(other, total))
+
+    @classmethod
+    def merge_pending(cls, pending):
+        """Write new summaries, merging them into summaries already stored for the same month"""
+        if not pending:
+            return 0
+        existing = {
+            summary.key: summary for summary in cls.query.filter(
+                cls.player_id.in_({summary.player_id for summary in pending}),
+                cls.month.in_({summary.month for summary in pending})
+            )
+        }
+        for summary in pending:
+            stored = existing.get(summary.key)
+            if stored:
+                stored.merge(summary)
+            else:
+                db.session.add(summary)
+        db.session.flush()
+        return len(pending)
+
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        count = self.evaluation_count or 1
+        return {
+            'player_id': self.player_id,
+            'gamemode': self.gamemode,
+            'month': self.month.isoformat(),
+            'evaluation_count': self.evaluation_count,
+            'upgrade_count': self.upgrade_count,
+            'downgrade_count': self.downgrade_count,
+            'first_overall_tier': self.first_overall_tier,
+            'last_overall_tier': self.last_overall_tier,
+            'average_scores': {
+                slot: round(getattr(self, f'{slot}_score_total') / count, 1) for slot in self.SKILL_SLOTS
+            },
+            'last_evaluated_at': self.last_evaluated_at.isoformat() if self.last_evaluated_at else None
+        }
+
 class ASCENDData(db.Model):
     """Model for storing ASCEND performance card data"""
 
@@ -75,7 +293,7 @@ class ASCENDData(db.Model):
     clutching_tier = db.Column(db.String(3), default='D', nullable=False)
     block_placement_tier = db.Column(db.String(3), default='D', nullable=False)
     gamesense_tier = db.Column(db.String(3), default='D', nullable=False)
-    overall_tier = db.Column(db.String(3), default='D', nullable=False)
+    overall_tier = db.column_property(db.Column(db.String(3), default='D', nullable=False), active_history=True)  # old value for the change feed
 
     pvp_score = db.Column(db.Integer, default=25, nullable=False)
     clutching_score = db.Column(db.Integer, default=25, nullable=False)
@@ -102,6 +320,15 @@ class ASCENDData(db.Model):
     player = db.relationship('Player', foreign_keys=[player_id], backref='ascend_data')
     evaluator = db.relationship('Player', foreign_keys=[evaluator_id])
 
+    __table_args__ = (db.UniqueConstraint('player_id', 'gamemode', name='uq_ascend_data_player_gamemode'),)
+
+    # Skill slots and the legacy columns mirrored from them
+    SKILL_SLOTS = ('skill1', 'skill2', 'skill3', 'skill4')
+    LEGACY_SKILLS = ('pvp', 'clutching', 'block_placement', 'gamesense')
+
+    # Upper bound for one bulk evaluation request
+    MAX_BULK_ENTRIES = 5000
+
     @classmethod
     def get_or_create(cls, player_id):
         """Get existing ASCEND data or create new with defaults"""
@@ -114,20 +341,12 @@ class ASCENDData(db.Model):
 
     def save_to_history(self):
         """Save current state to history before making changes"""
-        import json
-        
         # Get old data if exists
         old_data = ASCENDData.query.filter_by(player_id=self.player_id, gamemode=self.gamemode).first()
         
         if old_data and old_data.id != self.id:
             # Determine change type
-            change_type = 'update'
-            if old_data.overall_tier != self.overall_tier:
-                tier_values = {'D': 1, 'C': 2, 'C+': 3, 'B': 4, 'B+': 5, 'A': 6, 'A+': 7, 'S': 8, 'S+': 9}
-                if tier_values.get(self.overall_tier, 1) > tier_values.get(old_data.overall_tier, 1):
-                    change_type = 'upgrade'
-                else:
-                    change_type = 'downgrade'
+            change_type = ASCENDHistory.get_change_type(old_data.overall_tier, self.overall_tier)
             
             # Create history entry
             history = ASCENDHistory(
@@ -135,21 +354,13 @@ class ASCENDData(db.Model):
                 gamemode=self.gamemode,
                 old_overall_tier=old_data.overall_tier,
                 new_overall_tier=self.overall_tier,
-                old_scores=json.dumps({
-                    'skill1': old_data.skill1_score,
-                    'skill2': old_data.skill2_score,
-                    'skill3': old_data.skill3_score,
-                    'skill4': old_data.skill4_score
-                }),
-                new_scores=json.dumps({
-                    'skill1': self.skill1_score,
-                    'skill2': self.skill2_score,
-                    'skill3': self.skill3_score,
-                    'skill4': self.skill4_score
-                }),
                 change_type=change_type,
                 evaluator_name=self.evaluator_name,
-                comment=self.comment
+                comment=self.comment,
+                **ASCENDHistory.score_columns('old', [old_data.skill1_score, old_data.skill2_score,
+                                                      old_data.skill3_score, old_data.skill4_score]),
+                **ASCENDHistory.score_columns('new', [self.skill1_score, self.skill2_score,
+                                                      self.skill3_score, self.skill4_score])
             )
             db.session.add(history)
 
@@ -166,22 +377,234 @@ class ASCENDData(db.Model):
         
         self.global_rank = higher_count + 1
 
-    def to_dict(self):
-        """Convert to dictionary for API responses"""
+    @classmethod
+    def recalculate_global_ranks(cls, gamemodes):
+        """Recompute global ranks for whole game modes with one SELECT and one batched UPDATE each"""
+        total_score = cls.skill1_score + cls.skill2_score + cls.skill3_score + cls.skill4_score
+        for gamemode in gamemodes:
+            rows = db.session.query(cls.id, total_score, cls.global_rank).filter(
+                cls.gamemode == gamemode
+            ).order_by(total_score.desc()).all()
+
+            # Players with equal scores share a rank, like update_global_rank
+            changed = []
+            rank = 0
+            previous_score = None
+            for position, (row_id, score, current_rank) in enumerate(rows, 1):
+                if score != previous_score:
+                    rank = position
+                    previous_score = score
+                if current_rank != rank:
+                    changed.append({'id': row_id, 'global_rank': rank})
+
+            if changed:
+                db.session.bulk_update_mappings(cls, changed)
+
+    @classmethod
+    def bulk_evaluate(cls, entries, default_evaluator='Elite Squad'):
+        """Validate and upsert a batch of ASCEND evaluations
+
+        Players and existing evaluations are prefetched in two queries, rows are
+        upserted on (player_id, gamemode), history is written in one batch and
+        ranks are recomputed once per touched game mode.
+        Returns (updated, errors) where errors hold per-entry messages.
+        """
+        errors = []
+        parsed = []
+        seen = set()
+
+        for index, entry in enumerate(entries):
+            player_id = entry.get('player_id') if isinstance(entry, dict) else None
+            try:
+                if not isinstance(entry, dict):
+                    raise ValueError('Entry must be an object')
+                player_id = int(entry.get('player_id'))
+                gamemode = str(entry.get('gamemode') or 'bedwars')[:50]
+                if (player_id, gamemode) in seen:
+                    raise ValueError('Duplicate entry for player and gamemode')
+
+                changes = {}
+                for slot, legacy in zip(cls.SKILL_SLOTS, cls.LEGACY_SKILLS):
+                    score = entry.get(f'{slot}_score', entry.get(f'{legacy}_score'))
+                    tier = entry.get(f'{slot}_tier', entry.get(f'{legacy}_tier'))
+                    if score is not None:
+                        changes[f'{slot}_score'] = max(0, min(100, int(score)))
+                    if tier is not None:
+                        if tier not in TIER_VALUES:
+                            raise ValueError(f'Unknown tier {tier}')
+                        changes[f'{slot}_tier'] = tier
+                    elif score is not None:
+                        changes[f'{slot}_tier'] = calculate_tier_from_score(changes[f'{slot}_score'])
+
+                overall_tier = entry.get('overall_tier')
+                if overall_tier is not None and overall_tier not in TIER_VALUES:
+                    raise ValueError(f'Unknown tier {overall_tier}')
+                for field in ('comment', 'evaluator_name'):
+                    if field in entry:
+                        changes[field] = entry[field]
+            except (TypeError, ValueError) as e:
+                errors.append({'index': index, 'player_id': player_id, 'error': str(e)})
+                continue
+
+            seen.add((player_id, gamemode))
+            parsed.append((index, player_id, gamemode, changes, overall_tier))
+
+        if not parsed:
+            return [], errors
+
+        player_ids = {player_id for _, player_id, _, _, _ in parsed}
+        gamemodes = {gamemode for _, _, gamemode, _, _ in parsed}
+
+        known_players = dict(
+            db.session.query(Player.id, Player.nickname).filter(Player.id.in_(player_ids)).all()
+        )
+        existing = {
+            (row['player_id'], row['gamemode']): dict(row)
+            for row in db.session.execute(
+                db.select(cls.__table__).where(
+                    cls.player_id.in_(player_ids),
+                    cls.gamemode.in_(gamemodes)
+                )
+            ).mappings()
+        }
+
+        now = datetime.utcnow()
+        defaults = {
+            column.key: column.default.arg
+            for column in cls.__table__.columns
+            if column.default is not None and column.default.is_scalar
+        }
+
+        rows = []
+        history_rows = []
+        updated = []
+        for index, player_id, gamemode, changes, overall_tier in parsed:
+            if player_id not in known_players:
+                errors.append({'index': index, 'player_id': player_id, 'error': f'Player {player_id} not found'})
+                continue
+
+            old_row = existing.get((player_id, gamemode))
+            if old_row:
+                row = dict(old_row)
+            else:
+                row = dict(defaults, id=None, player_id=player_id, gamemode=gamemode,
+                           comment=None, evaluator_id=None, previous_tier=None,
+                           global_rank=None, created_at=now)
+                skill_names = GameMode.get_skill_names(gamemode)
+                if skill_names:
+                    for slot, name in zip(cls.SKILL_SLOTS, skill_names):
+                        row[f'{slot}_name'] = name
+
+            row.update(changes)
+            if 'evaluator_name' not in changes:
+                row['evaluator_name'] = default_evaluator
+
+            scores = [row[f'{slot}_score'] for slot in cls.SKILL_SLOTS]
+            row['overall_tier'] = overall_tier or calculate_tier_from_score(sum(scores) / 4)
+            row['previous_tier'] = old_row['overall_tier'] if old_row else None
+            row['updated_at'] = now
+
+            # Keep legacy columns in sync with skill1..skill4
+            for slot, legacy in zip(cls.SKILL_SLOTS, cls.LEGACY_SKILLS):
+                row[f'{legacy}_score'] = row[f'{slot}_score']
+                row[f'{legacy}_tier'] = row[f'{slot}_tier']
+
+            change_type = ASCENDHistory.get_change_type(row['previous_tier'], row['overall_tier'])
+            history_rows.append({
+                'player_id': player_id,
+                'gamemode': gamemode,
+                'old_overall_tier': row['previous_tier'],
+                'new_overall_tier': row['overall_tier'],
+                'change_type': change_type,
+                'evaluator_name': row['evaluator_name'],
+                'comment': row['comment'],
+                'created_at': now,
+                **ASCENDHistory.score_columns('old', [
+                    old_row[f'{slot}_score'] for slot in cls.SKILL_SLOTS
+                ] if old_row else None),
+                **ASCENDHistory.score_columns('new', scores)
+            })
+            rows.append(row)
+            updated.append({
+                'index': index,
+                'player_id': player_id,
+                'gamemode': gamemode,
+                'overall_tier': row['overall_tier'],
+                'change_type': change_type
+            })
+
+        if rows:
+            cls._upsert_rows(rows)
+            db.session.bulk_insert_mappings(ASCENDHistory, history_rows)
+            record_events(db.session, [
+                tier_change_event(row['player_id'], known_players[row['player_id']], row['gamemode'],
+                                  row['previous_tier'], row['overall_tier'])
+                for row in rows if row['previous_tier'] != row['overall_tier']
+            ])
+            cls.recalculate_global_ranks({row['gamemode'] for row in rows})
+            db.session.commit()
+
+        errors.sort(key=lambda error: error['index'])
+        return updated, errors
+
+    @classmethod
+    def _upsert_rows(cls, rows):
+        """INSERT ... ON CONFLICT (player_id, gamemode) DO UPDATE for a list of full rows"""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            insert = None
+
+        if insert is None:
+            # No native upsert: rows were prefetched, so split them by primary key
+            db.session.bulk_insert_mappings(cls, [
+                {key: value for key, value in row.items() if key != 'id'} for row in rows if row['id'] is None
+            ])
+            db.session.bulk_update_mappings(cls, [row for row in rows if row['id'] is not None])
+            return
+
+        values = [{key: value for key, value in row.items() if key != 'id'} for row in rows]
+        stmt = insert(cls.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['player_id', 'gamemode'],
+            set_={key: stmt.excluded[key] for key in values[0] if key not in ('player_id', 'gamemode', 'created_at')}
+        )
+        db.session.execute(stmt, values)
+
+    @classmethod
+    def default_dict(cls, player_id, gamemode, skill_names=None):
+        """Build the API payload for a player without an evaluation, without saving anything"""
+        defaults = cls(player_id=player_id, gamemode=gamemode)
+        for column in cls.__table__.columns:
+            if getattr(defaults, column.key) is None and column.default is not None and column.default.is_scalar:
+                setattr(defaults, column.key, column.default.arg)
+        return defaults.to_dict(skill_names=skill_names)
+
+    def to_dict(self, skill_names=None):
+        """Convert to dictionary for API responses
+
+        skill_names overrides the stored skill names (e.g. with the GameMode registry).
+        """
+        skill1_name, skill2_name, skill3_name, skill4_name = skill_names or (
+            self.skill1_name, self.skill2_name, self.skill3_name, self.skill4_name
+        )
         return {
             'id': self.id,
             'player_id': self.player_id,
             'gamemode': self.gamemode,
-            'skill1_name': self.skill1_name,
+            'skill1_name': skill1_name,
             'skill1_tier': self.skill1_tier,
             'skill1_score': self.skill1_score,
-            'skill2_name': self.skill2_name,
+            'skill2_name': skill2_name,
             'skill2_tier': self.skill2_tier,
             'skill2_score': self.skill2_score,
-            'skill3_name': self.skill3_name,
+            'skill3_name': skill3_name,
             'skill3_tier': self.skill3_tier,
             'skill3_score': self.skill3_score,
-            'skill4_name': self.skill4_name,
+            'skill4_name': skill4_name,
             'skill4_tier': self.skill4_tier,
             'skill4_score': self.skill4_score,
             'overall_tier': self.overall_tier,
@@ -266,152 +689,71 @@ class GameMode(db.Model):
             'is_active': self.is_active
         }
     
+    # Immutable {gamemode name: (skill1..skill4 names)} map, shared by every request in the process
+    _skill_registry = None
+    _skill_registry_loaded_at = 0.0
+    _skill_registry_generation = 0
+    SKILL_REGISTRY_TTL = 300  # other workers' admin edits show up within this many seconds
+
     @classmethod
-    def create_default_modes(cls):
-        """Create default game modes with their skill categories"""
-        default_modes = [
-            {
-                'name': 'bedwars',
-                'display_name': 'Bedwars',
-                'description': 'Classic Bedwars gameplay',
-                'icon': 'fas fa-bed',
-                'color': '#e74c3c',
-                'skill1_name': 'PVP',
-                'skill1_description': 'Combat effectiveness and dueling skills',
-                'skill1_icon': 'fas fa-sword',
-                'skill2_name': 'Clutching',
-                'skill2_description': 'Performance under pressure situations',
-                'skill2_icon': 'fas fa-fire',
-                'skill3_name': 'Block Placement',
-                'skill3_description': 'Strategic building and defensive positioning',
-                'skill3_icon': 'fas fa-cube',
-                'skill4_name': 'Gamesense',
-                'skill4_description': 'Game awareness and tactical decision making',
-                'skill4_icon': 'fas fa-brain'
-            },
-            {
-                'name': 'kitpvp',
-                'display_name': 'KitPVP',
-                'description': 'Kit-based PvP combat',
-                'icon': 'fas fa-sword',
-                'color': '#f39c12',
-                'skill1_name': 'Aiming',
-                'skill1_description': 'Accuracy and target acquisition',
-                'skill1_icon': 'fas fa-crosshairs',
-                'skill2_name': 'Healing (soups/pots)',
-                'skill2_description': 'Health management and healing efficiency',
-                'skill2_icon': 'fas fa-heart',
-                'skill3_name': 'Movement',
-                'skill3_description': 'Mobility and positioning',
-                'skill3_icon': 'fas fa-running',
-                'skill4_name': 'Spacing',
-                'skill4_description': 'Distance control and positioning',
-                'skill4_icon': 'fas fa-expand-arrows-alt'
-            },
-            {
-                'name': 'skywars',
-                'display_name': 'SkyWars',
-                'description': 'Sky-based survival combat',
-                'icon': 'fas fa-cloud',
-                'color': '#3498db',
-                'skill1_name': 'Looting',
-                'skill1_description': 'Efficient resource gathering',
-                'skill1_icon': 'fas fa-search',
-                'skill2_name': 'Potting',
-                'skill2_description': 'Potion usage and timing',
-                'skill2_icon': 'fas fa-flask',
-                'skill3_name': 'Pearling',
-                'skill3_description': 'Ender pearl mechanics and timing',
-                'skill3_icon': 'fas fa-circle',
-                'skill4_name': 'Melee',
-                'skill4_description': 'Close combat effectiveness',
-                'skill4_icon': 'fas fa-fist-raised'
-            },
-            {
-                'name': 'bridgefight',
-                'display_name': 'BridgeFight',
-                'description': 'Bridge-based combat scenarios',
-                'icon': 'fas fa-bridge',
-                'color': '#9b59b6',
-                'skill1_name': 'Block Edits',
-                'skill1_description': 'Building and editing proficiency',
-                'skill1_icon': 'fas fa-edit',
-                'skill2_name': 'Bridge Fights',
-                'skill2_description': 'Combat on narrow bridges',
-                'skill2_icon': 'fas fa-bridge',
-                'skill3_name': 'Gamesense',
-                'skill3_description': 'Strategic awareness',
-                'skill3_icon': 'fas fa-brain',
-                'skill4_name': 'PvP',
-                'skill4_description': 'Combat effectiveness',
-                'skill4_icon': 'fas fa-sword'
-            },
-            {
-                'name': 'sumo',
-                'display_name': 'Sumo',
-                'description': 'Knockback-based combat',
-                'icon': 'fas fa-hand-rock',
-                'color': '#e67e22',
-                'skill1_name': 'Gamesense',
-                'skill1_description': 'Strategic thinking and positioning',
-                'skill1_icon': 'fas fa-brain',
-                'skill2_name': 'KB control',
-                'skill2_description': 'Knockback manipulation and resistance',
-                'skill2_icon': 'fas fa-hand-paper',
-                'skill3_name': 'Mechanics',
-                'skill3_description': 'Technical execution and timing',
-                'skill3_icon': 'fas fa-cogs',
-                'skill4_name': 'Movement',
-                'skill4_description': 'Positioning and mobility',
-                'skill4_icon': 'fas fa-running'
-            },
-            {
-                'name': 'fireball_fight',
-                'display_name': 'Fireball Fight',
-                'description': 'Projectile-based combat',
-                'icon': 'fas fa-fire-alt',
-                'color': '#e74c3c',
-                'skill1_name': 'Attack/Defense',
-                'skill1_description': 'Offensive and defensive strategies',
-                'skill1_icon': 'fas fa-shield-alt',
-                'skill2_name': 'Fireball usage',
-                'skill2_description': 'Projectile accuracy and timing',
-                'skill2_icon': 'fas fa-fire-alt',
-                'skill3_name': 'Gamesense',
-                'skill3_description': 'Strategic awareness',
-                'skill3_icon': 'fas fa-brain',
-                'skill4_name': 'PvP',
-                'skill4_description': 'Combat effectiveness',
-                'skill4_icon': 'fas fa-sword'
-            },
-            {
-                'name': 'bridge',
-                'display_name': 'Bridge',
-                'description': 'Classic bridge building and combat',
-                'icon': 'fas fa-bridge',
-                'color': '#27ae60',
-                'skill1_name': 'Bypassing',
-                'skill1_description': 'Efficient bridging techniques',
-                'skill1_icon': 'fas fa-forward',
-                'skill2_name': 'Defense',
-                'skill2_description': 'Defensive positioning and blocking',
-                'skill2_icon': 'fas fa-shield',
-                'skill3_name': 'Gamesense',
-                'skill3_description': 'Strategic awareness',
-                'skill3_icon': 'fas fa-brain',
-                'skill4_name': 'PvP',
-                'skill4_description': 'Combat effectiveness',
-                'skill4_icon': 'fas fa-sword'
+    def get_skill_registry(cls):
+        """Get skill names for every game mode, reloaded after a local commit or the TTL"""
+        registry = cls._skill_registry
+        if registry is None or time.monotonic() - cls._skill_registry_loaded_at > cls.SKILL_REGISTRY_TTL:
+            generation = cls._skill_registry_generation
+            from seeds import load_seed_rows
+            skills = {
+                mode['name']: (mode['skill1_name'], mode['skill2_name'], mode['skill3_name'], mode['skill4_name'])
+                for mode in load_seed_rows('game_mode.json')
             }
-        ]
-        
-        for mode_data in default_modes:
-            existing = cls.query.filter_by(name=mode_data['name']).first()
-            if not existing:
-                mode = cls(**mode_data)
-                db.session.add(mode)
-        
-        db.session.commit()
+            try:
+                rows = db.session.query(
+                    cls.name, cls.skill1_name, cls.skill2_name, cls.skill3_name, cls.skill4_name
+                ).all()
+                for name, *names in rows:
+                    skills[name] = tuple(names)
+            except Exception as e:
+                from app import app
+                app.logger.error(f"Error loading game mode skills: {e}")
+                db.session.rollback()
+            registry = MappingProxyType(skills)
+            if generation == cls._skill_registry_generation:  # not invalidated while loading
+                cls._skill_registry = registry
+                cls._skill_registry_loaded_at = time.monotonic()
+        return registry
+
+    @classmethod
+    def get_skill_names(cls, name):
+        """Get the four skill names for a game mode, or None for unknown modes"""
+        return cls.get_skill_registry().get(name)
+
+    @classmethod
+    def invalidate_skill_registry(cls):
+        """Drop the cached skill registry so the next lookup reloads it"""
+        cls._skill_registry_generation += 1
+        cls._skill_registry = None
+
+
+@event.listens_for(GameMode, 'after_insert')
+@event.listens_for(GameMode, 'after_update')
+@event.listens_for(GameMode, 'after_delete')
+def _mark_game_mode_change(mapper, connection, target):
+    # Invalidated on commit: a reload before then would read the old rows again
+    db_session = object_session(target)
+    if db_session is not None:
+        db_session.info['game_modes_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_game_mode_skills(db_session):
+    if db_session.info.pop('game_modes_changed', False):
+        GameMode.invalidate_skill_registry()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_game_mode_change(db_session):
+    db_session.info.pop('game_modes_changed', None)
+
 
 class Player(db.Model):
     """Enhanced model for storing detailed player Bedwars statistics"""
@@ -425,7 +767,7 @@ class Player(db.Model):
     beds_broken = db.Column(db.Integer, default=0, nullable=False)
     games_played = db.Column(db.Integer, default=0, nullable=False)
     wins = db.Column(db.Integer, default=0, nullable=False)
-    experience = db.Column(db.Integer, default=0, nullable=False)
+    experience = db.column_property(db.Column(db.Integer, default=0, nullable=False), active_history=True)  # old value for the change feed
     role = db.Column(db.String(50), default='Игрок', nullable=False)
     server_ip = db.Column(db.String(100), default='', nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -493,15 +835,25 @@ class Player(db.Model):
 
     # Relationships for quest system
     player_quests = db.relationship('PlayerQuest', backref='player', lazy=True, cascade='all, delete-orphan')
+    quest_submissions = db.relationship('QuestSubmission', backref=db.backref('player', lazy='joined', innerjoin=True),
+                                        lazy=True, cascade='all, delete-orphan')
     player_achievements = db.relationship('PlayerAchievement', backref='player', lazy=True, cascade='all, delete-orphan')
 
     # Economy system fields
     coins = db.Column(db.Integer, default=0, nullable=False)
-    reputation = db.Column(db.Integer, default=0, nullable=False)
+    reputation = db.column_property(db.Column(db.Integer, default=0, nullable=False), active_history=True)  # old value for the change feed
 
     # Karma system fields (NEW)
     karma = db.Column(db.Integer, default=0, nullable=False)
 
+    # Case-insensitive nickname lookups (/api/search, bot commands);
+    # (value, id) keysets for the threshold scans of /api/players/below
+    __table_args__ = (
+        db.Index('ix_player_nickname_lower', func.lower(nickname)),
+        db.Index('ix_player_karma_id', 'karma', 'id'),
+        db.Index('ix_player_reputation_id', 'reputation', 'id'),
+    )
+
     # Custom role system
     custom_role = db.Column(db.String(100), nullable=True)
     custom_role_color = db.Column(db.String(7), nullable=True)
@@ -888,54 +1240,48 @@ class Player(db.Model):
     def __repr__(self):
         return f'<Player {self.nickname}: Level {self.level} ({self.experience} XP)>'
 
+    @staticmethod
+    def ratio(numerator, denominator):
+        """Ratio used for K/D and FK/D: raw numerator when there are no deaths"""
+        if denominator == 0:
+            return numerator if numerator > 0 else 0
+        return round(numerator / denominator, 2)
+
+    @staticmethod
+    def win_rate_for(wins, games_played):
+        """Win rate percentage for raw counters"""
+        if games_played == 0:
+            return 0
+        return round((wins / games_played) * 100, 1)
+
+    @staticmethod
+    def level_for_experience(experience):
+        """Player level for an experience value (Hypixel level system)"""
+        if experience >= LEVEL_THRESHOLDS[-1]:
+            # For levels 100+, each level requires 2500 more XP than the previous
+            additional_levels = (experience - LEVEL_THRESHOLDS[-1]) // 2500
+            return min(1000, 100 + additional_levels)
+        return max(1, bisect_right(LEVEL_THRESHOLDS, experience))
+
     @property
     def kd_ratio(self):
         """Calculate kill/death ratio"""
-        if self.deaths == 0:
-            return self.kills if self.kills > 0 else 0
-        return round(self.kills / self.deaths, 2)
+        return self.ratio(self.kills, self.deaths)
 
     @property
     def fkd_ratio(self):
         """Calculate final kill/death ratio"""
-        if self.final_deaths == 0:
-            return self.final_kills if self.final_kills > 0 else 0
-        return round(self.final_kills / self.final_deaths, 2)
+        return self.ratio(self.final_kills, self.final_deaths)
 
     @property
     def win_rate(self):
         """Calculate win rate percentage"""
-        if self.games_played == 0:
-            return 0
-        return round((self.wins / self.games_played) * 100, 1)
+        return self.win_rate_for(self.wins, self.games_played)
 
     @property
     def level(self):
         """Calculate player level based on Hypixel experience system"""
-        # Hypixel level thresholds
-        level_thresholds = [
-            0, 10000, 22500, 37500, 55000, 75000, 97500, 122500, 150000, 180000,
-            212500, 247500, 285000, 325000, 367500, 412500, 460000, 510000, 562500, 617500,
-            675000, 735000, 797500, 862500, 930000, 1000000, 1072500, 1147500, 1225000, 1305000,
-            1387500, 1472500, 1560000, 1650000, 1742500, 1837500, 1935000, 2035000, 2137500, 2242500,
-            2350000, 2460000, 2572500, 2687500, 2805000, 2925000, 3047500, 3172500, 3300000, 3430000,
-            3562500, 3697500, 3835000, 3975000, 4117500, 4262500, 4410000, 4560000, 4712500, 4867500,
-            5025000, 5185000, 5347500, 5512500, 5680000, 5850000, 6022500, 6197500, 6375000, 6555000,
-            6737500, 6922500, 7110000, 7300000, 7492500, 7687500, 7885000, 8085000, 8287500, 8492500,
-            8700000, 8910000, 9122500, 9337500, 9555000, 9775000, 9997500, 10222500, 10450000, 10680000,
-            10912500, 11147500, 11385000, 11625000, 11867500, 12112500, 12360000, 12610000, 12862500, 13117500
-        ]
-
-        for level, threshold in enumerate(level_thresholds, 1):
-            if self.experience < threshold:
-                return max(1, level - 1)
-
-        # For levels 100+, each level requires 2500 more XP than the previous
-        if self.experience >= 13117500:
-            additional_levels = (self.experience - 13117500) // 2500
-            return min(1000, 100 + additional_levels)
-
-        return 100
+        return self.level_for_experience(self.experience)
 
     @property
     def level_progress(self):
@@ -944,23 +1290,9 @@ class Player(db.Model):
         if current_level >= 1000:
             return 100
 
-        # Hypixel level thresholds
-        level_thresholds = [
-            0, 10000, 22500, 37500, 55000, 75000, 97500, 122500, 150000, 180000,
-            212500, 247500, 285000, 325000, 367500, 412500, 460000, 510000, 562500, 617500,
-            675000, 735000, 797500, 862500, 930000, 1000000, 1072500, 1147500, 1225000, 1305000,
-            1387500, 1472500, 1560000, 1650000, 1742500, 1837500, 1935000, 2035000, 2137500, 2242500,
-            2350000, 2460000, 2572500, 2687500, 2805000, 2925000, 3047500, 3172500, 3300000, 3430000,
-            3562500, 3697500, 3835000, 3975000, 4117500, 4262500, 4410000, 4560000, 4712500, 4867500,
-            5025000, 5185000, 5347500, 5512500, 5680000, 5850000, 6022500, 6197500, 6375000, 6555000,
-            6737500, 6922500, 7110000, 7300000, 7492500, 7687500, 7885000, 8085000, 8287500, 8492500,
-            8700000, 8910000, 9122500, 9337500, 9555000, 9775000, 9997500, 10222500, 10450000, 10680000,
-            10912500, 11147500, 11385000, 11625000, 11867500, 12112500, 12360000, 12610000, 12862500, 13117500
-        ]
-
         if current_level <= 100:
-            current_threshold = level_thresholds[current_level - 1] if current_level > 0 else 0
-            next_threshold = level_thresholds[current_level] if current_level < len(level_thresholds) else level_thresholds[-1] + 2500
+            current_threshold = LEVEL_THRESHOLDS[current_level - 1] if current_level > 0 else 0
+            next_threshold = LEVEL_THRESHOLDS[current_level] if current_level < len(LEVEL_THRESHOLDS) else LEVEL_THRESHOLDS[-1] + 2500
         else:
             # For levels 100+
             current_threshold = 13117500 + (current_level - 100) * 2500
@@ -1073,6 +1405,8 @@ class Player(db.Model):
                 return sorted(all_players, key=lambda p: p.win_rate, reverse=True)[:limit]
             elif sort_by == 'karma': # Added karma sorting
                 return cls.query.order_by(cls.karma.desc()).offset(offset).limit(limit).all()
+            elif sort_by == 'reputation':
+                return cls.query.order_by(cls.reputation.desc()).offset(offset).limit(limit).all()
             else:
                 return cls.query.order_by(cls.experience.desc()).offset(offset).limit(limit).all()
         except Exception as e:
@@ -1101,6 +1435,84 @@ class Player(db.Model):
             app.logger.error(f"Error searching players: {e}")
             return []
 
+    # Compact projection returned by /api/search
+    SEARCH_COLUMNS = ('id', 'nickname', 'experience', 'kills', 'deaths', 'wins', 'games_played',
+                      'beds_broken', 'coins', 'reputation', 'karma')
+
+    @classmethod
+    def _search_select(cls):
+        return db.select(*(getattr(cls, name) for name in cls.SEARCH_COLUMNS))
+
+    @classmethod
+    def _search_row(cls, row):
+        data = dict(row._mapping)
+        data['level'] = cls.level_for_experience(data['experience'])
+        data['kd_ratio'] = cls.ratio(data['kills'], data['deaths'])
+        return data
+
+    @classmethod
+    def search_compact(cls, query, limit=10, exact=False):
+        """Nickname search as compact dicts in one query
+
+        exact=True matches the whole nickname case-insensitively (index lookup).
+        Otherwise substring matches are ranked: exact match, then prefix, then
+        the shortest nicknames.
+        """
+        query = (query or '').strip()[:50].lower()
+        if not query:
+            return []
+        limit = min(max(1, limit), 100)
+        nickname = func.lower(cls.nickname)
+
+        stmt = cls._search_select()
+        if exact:
+            stmt = stmt.where(nickname == query).limit(1)
+        else:
+            pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            stmt = stmt.where(nickname.like(f'%{pattern}%', escape='\\')).order_by(
+                (nickname == query).desc(),
+                nickname.like(f'{pattern}%', escape='\\').desc(),
+                func.length(cls.nickname),
+                cls.nickname
+            ).limit(limit)
+        return [cls._search_row(row) for row in db.session.execute(stmt)]
+
+    @classmethod
+    def lookup_compact(cls, nicknames):
+        """Exact case-insensitive lookup of many nicknames in one query; {lowercased name: dict}"""
+        wanted = {name.strip().lower() for name in nicknames if name and name.strip()}
+        if not wanted:
+            return {}
+        stmt = cls._search_select().where(func.lower(cls.nickname).in_(wanted))
+        return {row.nickname.lower(): cls._search_row(row) for row in db.session.execute(stmt)}
+
+    # Columns /api/players/below can scan with an index
+    THRESHOLD_FIELDS = ('karma', 'reputation')
+
+    @classmethod
+    def below_threshold(cls, field, threshold, after=None, limit=100):
+        """Players with field < threshold, lowest first, one keyset page at a time
+
+        after is the (value, id) of the last row of the previous page. Returns
+        (compact dicts, (value, id) cursor of the next page or None).
+        """
+        if field not in cls.THRESHOLD_FIELDS:
+            raise ValueError(f'Unsupported field {field}')
+        limit = min(max(1, limit), 500)
+        column = getattr(cls, field)
+
+        stmt = cls._search_select().where(column < threshold)
+        if after is not None:
+            stmt = stmt.where(db.tuple_(column, cls.id) > tuple(after))
+        rows = [cls._search_row(row) for row in
+                db.session.execute(stmt.order_by(column, cls.id).limit(limit + 1))]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][field], rows[-1]['id'])
+        return rows, next_cursor
+
     @classmethod
     @lru_cache(maxsize=1)
     def _get_cached_statistics(cls):
@@ -1331,6 +1743,8 @@ class Quest(db.Model):
 
     # Relationship with player quest progress
     player_quests = db.relationship('PlayerQuest', backref='quest', lazy=True, cascade='all, delete-orphan')
+    submissions = db.relationship('QuestSubmission', backref=db.backref('quest', lazy='joined', innerjoin=True),
+                                  lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Quest {self.title}>'
@@ -1408,262 +1822,6 @@ class Quest(db.Model):
 
         db.session.commit()
 
-    @classmethod
-    def create_default_quests(cls):
-        """Create default quests for the game"""
-        # Permanent quests
-        permanent_quests = [
-            {
-                'title': 'Первая кровь',
-                'description': 'Убейте 10 игроков в режиме Bedwars',
-                'type': 'kills',
-                'target_value': 10,
-                'reward_xp': 1000,
-                'reward_coins': 250,
-                'reward_reputation': 10,
-                'reward_title': 'Воин',
-                'icon': 'fas fa-sword',
-                'difficulty': 'easy',
-                'quest_category': 'permanent',
-                'is_repeatable': False
-            },
-            {
-                'title': 'Разрушитель кроватей',
-                'description': 'Сломайте 5 кроватей противников',
-                'type': 'beds_broken',
-                'target_value': 5,
-                'reward_xp': 1500,
-                'reward_coins': 300,
-                'reward_reputation': 15,
-                'reward_title': 'Разрушитель',
-                'icon': 'fas fa-bed',
-                'difficulty': 'easy',
-                'quest_category': 'permanent',
-                'is_repeatable': False
-            },
-        ]
-
-        # Daily quests
-        daily_quests = [
-            {
-                'title': 'Ежедневный воин',
-                'description': 'Убейте 15 игроков сегодня',
-                'type': 'kills',
-                'target_value': 15,
-                'reward_xp': 500,
-                'reward_coins': 100,
-                'reward_reputation': 5,
-                'icon': 'fas fa-sword',
-                'difficulty': 'easy',
-                'quest_category': 'daily'
-            },
-            {
-                'title': 'Ежедневная охота',
-                'description': 'Совершите 5 финальных убийств',
-                'type': 'final_kills',
-                'target_value': 5,
-                'reward_xp': 800,
-                'reward_coins': 150,
-                'reward_reputation': 8,
-                'icon': 'fas fa-crosshairs',
-                'difficulty': 'medium',
-                'quest_category': 'daily'
-            },
-            {
-                'title': 'Ежедневный разрушитель',
-                'description': 'Сломайте 3 кровати',
-                'type': 'beds_broken',
-                'target_value': 3,
-                'reward_xp': 600,
-                'reward_coins': 120,
-                'reward_reputation': 6,
-                'icon': 'fas fa-bed',
-                'difficulty': 'easy',
-                'quest_category': 'daily'
-            },
-            {
-                'title': 'Ежедневный победитель',
-                'description': 'Выиграйте 2 игры',
-                'type': 'wins',
-                'target_value': 2,
-                'reward_xp': 1000,
-                'reward_coins': 200,
-                'reward_reputation': 10,
-                'icon': 'fas fa-trophy',
-                'difficulty': 'medium',
-                'quest_category': 'daily'
-            },
-            {
-                'title': 'Ежедневный майнер',
-                'description': 'Соберите 500 единиц железа',
-                'type': 'iron_collected',
-                'target_value': 500,
-                'reward_xp': 400,
-                'reward_coins': 80,
-                'reward_reputation': 4,
-                'icon': 'fas fa-hammer',
-                'difficulty': 'easy',
-                'quest_category': 'daily'
-            }
-        ]
-
-        # Weekly quests
-        weekly_quests = [
-            {
-                'title': 'Еженедельный воин',
-                'description': 'Убейте 100 игроков за неделю',
-                'type': 'kills',
-                'target_value': 100,
-                'reward_xp': 3000,
-                'reward_coins': 750,
-                'reward_reputation': 30,
-                'icon': 'fas fa-sword',
-                'difficulty': 'hard',
-                'quest_category': 'weekly'
-            },
-            {
-                'title': 'Мастер финальных убийств',
-                'description': 'Совершите 25 финальных убийств',
-                'type': 'final_kills',
-                'target_value': 25,
-                'reward_xp': 4000,
-                'reward_coins': 1000,
-                'reward_reputation': 40,
-                'icon': 'fas fa-skull',
-                'difficulty': 'hard',
-                'quest_category': 'weekly'
-            },
-            {
-                'title': 'Недельный чемпион',
-                'description': 'Выиграйте 15 игр за неделю',
-                'type': 'wins',
-                'target_value': 15,
-                'reward_xp': 5000,
-                'reward_coins': 1250,
-                'reward_reputation': 50,
-                'icon': 'fas fa-crown',
-                'difficulty': 'epic',
-                'quest_category': 'weekly'
-            }
-        ]
-
-        # Monthly quests
-        monthly_quests = [
-            {
-                'title': 'Легенда месяца',
-                'description': 'Убейте 500 игроков за месяц',
-                'type': 'kills',
-                'target_value': 500,
-                'reward_xp': 15000,
-                'reward_coins': 3000,
-                'reward_reputation': 150,
-                'icon': 'fas fa-fire',
-                'difficulty': 'epic',
-                'quest_category': 'monthly'
-            },
-            {
-                'title': 'Разрушитель империй',
-                'description': 'Сломайте 100 кроватей за месяц',
-                'type': 'beds_broken',
-                'target_value': 100,
-                'reward_xp': 12000,
-                'reward_coins': 2500,
-                'reward_reputation': 120,
-                'icon': 'fas fa-meteor',
-                'difficulty': 'epic',
-                'quest_category': 'monthly'
-            },
-            {
-                'title': 'Непобедимый',
-                'description': 'Выиграйте 50 игр за месяц',
-                'type': 'wins',
-                'target_value': 50,
-                'reward_xp': 20000,
-                'reward_coins': 4000,
-                'reward_reputation': 200,
-                'reward_title': 'Непобедимый',
-                'icon': 'fas fa-crown',
-                'difficulty': 'epic',
-                'quest_category': 'monthly'
-            }
-        ]
-
-        # Thematic quests (one-time only)
-        thematic_quests = [
-            {
-                'title': 'Рождественское чудо',
-                'description': 'Выиграйте 25 игр в рождественский сезон',
-                'type': 'wins',
-                'target_value': 25,
-                'reward_xp': 10000,
-                'reward_coins': 2000,
-                'reward_reputation': 100,
-                'reward_role': 'Рождественский герой',
-                'icon': 'fas fa-gifts',
-                'difficulty': 'epic',
-                'quest_category': 'thematic',
-                'is_repeatable': False
-            },
-            {
-                'title': 'Хэллоуинский кошмар',
-                'description': 'Совершите 100 финальных убийств в октябре',
-                'type': 'final_kills',
-                'target_value': 100,
-                'reward_xp': 12000,
-                'reward_coins': 2500,
-                'reward_reputation': 120,
-                'reward_role': 'Призрак Хэллоуина',
-                'icon': 'fas fa-ghost',
-                'difficulty': 'epic',
-                'quest_category': 'thematic',
-                'is_repeatable': False
-            }
-        ]
-
-        # Mythic quests (ultra rare, one-time only)
-        mythic_quests = [
-            {
-                'title': 'Властелин Bedwars',
-                'description': 'Достигните 1000 побед и K/D 5.0',
-                'type': 'wins',
-                'target_value': 1000,
-                'reward_xp': 50000,
-                'reward_coins': 10000,
-                'reward_reputation': 500,
-                'reward_role': 'Властелин Bedwars',
-                'reward_title': 'Властелин',
-                'icon': 'fas fa-dragon',
-                'difficulty': 'mythic',
-                'quest_category': 'mythic',
-                'is_repeatable': False
-            },
-            {
-                'title': 'Божество разрушения',
-                'description': 'Сломайте 2000 кроватей',
-                'type': 'beds_broken',
-                'target_value': 2000,
-                'reward_xp': 75000,
-                'reward_coins': 15000,
-                'reward_reputation': 750,
-                'reward_role': 'Божество разрушения',
-                'reward_title': 'Разрушитель миров',
-                'icon': 'fas fa-meteor',
-                'difficulty': 'mythic',
-                'quest_category': 'mythic',
-                'is_repeatable': False
-            }
-        ]
-
-        all_quests = permanent_quests + daily_quests + weekly_quests + monthly_quests + thematic_quests + mythic_quests
-
-        for quest_data in all_quests:
-            existing = cls.query.filter_by(title=quest_data['title']).first()
-            if not existing:
-                quest = cls(**quest_data)
-                db.session.add(quest)
-
-        db.session.commit()
-
 
 class PlayerQuest(db.Model):
     """Player progress on quests"""
@@ -1733,6 +1891,214 @@ class PlayerQuest(db.Model):
 
         return completed_quests
 
+    @classmethod
+    def award(cls, player, quest, player_quest=None):
+        """Complete a quest for a player and add its rewards (no commit)
+
+        player_quest is the player's existing progress row, None to create one.
+        Returns (player_quest, rewarded); rewarded is False when the quest was
+        already completed and nothing was awarded.
+        """
+        if player_quest is None:
+            player_quest = cls(player_id=player.id, quest_id=quest.id, is_accepted=True,
+                               accepted_at=datetime.utcnow(), baseline_value=getattr(player, quest.type, 0))
+            db.session.add(player_quest)
+        if player_quest.is_completed:
+            return player_quest, False
+
+        player_quest.is_completed = True
+        player_quest.completed_at = datetime.utcnow()
+        player_quest.current_progress = quest.target_value
+        player.experience += quest.reward_xp or 0
+        player.coins += quest.reward_coins or 0
+        player.reputation += quest.reward_reputation or 0
+        return player_quest, True
+
+
+class QuestSubmission(db.Model):
+    """Screenshot sent with /submit_quest, waiting for a moderator in the Discord review channel
+
+    The review state lives here rather than in the bot, so pending reviews survive
+    bot restarts and can be approved or rejected in bulk.
+    """
+
+    STATUSES = ('pending', 'approved', 'rejected')
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
+    quest_id = db.Column(db.Integer, db.ForeignKey('quest.id'), nullable=False)
+    discord_user_id = db.Column(db.String(30), nullable=False)
+    discord_guild_id = db.Column(db.String(30), nullable=True)
+    attachment_url = db.Column(db.String(500), nullable=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)
+    review_channel_id = db.Column(db.String(30), nullable=True)
+    review_message_id = db.Column(db.String(30), nullable=True)
+    reviewed_by = db.Column(db.String(100), nullable=True)
+    reviewed_at = db.Column(db.DateTime, nullable=True)
+    reason = db.Column(db.String(500), nullable=True)
+    rewarded = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_quest_submission_status_id', 'status', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<QuestSubmission {self.id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'player_id': self.player_id,
+            'nickname': self.player.nickname if self.player else None,
+            'quest_id': self.quest_id,
+            'quest_title': self.quest.title if self.quest else None,
+            'discord_user_id': self.discord_user_id,
+            'discord_guild_id': self.discord_guild_id,
+            'attachment_url': self.attachment_url,
+            'status': self.status,
+            'review_channel_id': self.review_channel_id,
+            'review_message_id': self.review_message_id,
+            'reviewed_by': self.reviewed_by,
+            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'reason': self.reason,
+            'rewarded': self.rewarded,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @classmethod
+    def submit(cls, nickname, quest_title, discord_user_id, discord_guild_id=None, attachment_url=None):
+        """Create a pending submission; raises ValueError when the player or quest is unknown"""
+        player = Player.query.filter(func.lower(Player.nickname) == nickname.strip().lower()).first()
+        if not player:
+            raise ValueError(f'Игрок {nickname} не найден')
+        quest = cls.find_quest(quest_title)
+        if not quest:
+            raise ValueError(f'Квест {quest_title} не найден')
+
+        submission = cls(player_id=player.id, quest_id=quest.id, discord_user_id=str(discord_user_id),
+                         discord_guild_id=str(discord_guild_id) if discord_guild_id else None,
+                         attachment_url=attachment_url)
+        db.session.add(submission)
+        db.session.commit()
+        return submission
+
+    @staticmethod
+    def find_quest(title):
+        """Active quest by title: exact match, else case-insensitive
+
+        Case folding happens in Python: SQLite's lower() only folds ASCII and
+        the quest titles are Russian. There are few active quests.
+        """
+        title = title.strip()
+        quest = Quest.query.filter(Quest.title == title, Quest.is_active == True).first()
+        if quest:
+            return quest
+        folded = title.casefold()
+        return next((quest for quest in Quest.query.filter_by(is_active=True)
+                     if quest.title.casefold() == folded), None)
+
+    @classmethod
+    def page(cls, status='pending', guild_id=None, after=None, limit=25):
+        """One keyset page of submissions, oldest first; returns (submissions, next cursor id or None)"""
+        limit = min(max(1, limit), 100)
+        query = cls.query.filter(cls.status == status)
+        if guild_id:
+            query = query.filter(cls.discord_guild_id == str(guild_id))
+        if after:
+            query = query.filter(cls.id > after)
+        submissions = query.order_by(cls.id).limit(limit + 1).all()
+        if len(submissions) > limit:
+            return submissions[:limit], submissions[limit - 1].id
+        return submissions, None
+
+    @classmethod
+    def review(cls, ids, approve, reviewed_by, reason=None):
+        """Approve (applying rewards) or reject pending submissions in one transaction
+
+        Submissions that are missing or already reviewed are skipped. Returns the
+        submissions that were reviewed by this call.
+        """
+        submissions = cls.query.filter(cls.id.in_(ids), cls.status == 'pending') \
+            .order_by(cls.id).with_for_update(of=cls).all()
+        if not submissions:
+            return []
+
+        player_quests = {}
+        if approve:
+            pairs = {(s.player_id, s.quest_id) for s in submissions}
+            for player_quest in PlayerQuest.query.filter(
+                    PlayerQuest.player_id.in_({player_id for player_id, _ in pairs}),
+                    PlayerQuest.quest_id.in_({quest_id for _, quest_id in pairs})):
+                player_quests[(player_quest.player_id, player_quest.quest_id)] = player_quest
+
+        now = datetime.utcnow()
+        for submission in submissions:
+            submission.status = 'approved' if approve else 'rejected'
+            submission.reviewed_by = reviewed_by
+            submission.reviewed_at = now
+            submission.reason = reason
+            if approve:
+                key = (submission.player_id, submission.quest_id)
+                player_quests[key], submission.rewarded = PlayerQuest.award(
+                    submission.player, submission.quest, player_quests.get(key))
+        db.session.commit()
+
+        if approve:
+            Player.clear_statistics_cache()
+        return submissions
+
+
+class BotGuildConfig(db.Model):
+    """Channels a Discord guild chose with /setup_channel
+
+    Kept on the website rather than on the bot's disk, which is wiped on every
+    deploy by hosts such as Railway and Render.
+    """
+
+    CHANNEL_KINDS = ('announce', 'review')
+
+    id = db.Column(db.Integer, primary_key=True)
+    guild_id = db.Column(db.String(30), unique=True, nullable=False)
+    announce_channel_id = db.Column(db.String(30), nullable=True)
+    review_channel_id = db.Column(db.String(30), nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<BotGuildConfig {self.guild_id}>'
+
+    def to_dict(self):
+        return {
+            'guild_id': self.guild_id,
+            'announce_channel_id': self.announce_channel_id,
+            'review_channel_id': self.review_channel_id
+        }
+
+    @classmethod
+    def set_channel(cls, guild_id, kind, channel_id):
+        """Set (or with channel_id=None clear) one channel of a guild; returns the config, None once empty"""
+        if kind not in cls.CHANNEL_KINDS:
+            raise ValueError(f'Unknown channel kind {kind}')
+        config = cls.query.filter_by(guild_id=str(guild_id)).first()
+        if config is None:
+            if channel_id is None:
+                return None
+            config = cls(guild_id=str(guild_id))
+            db.session.add(config)
+        setattr(config, f'{kind}_channel_id', str(channel_id) if channel_id is not None else None)
+        if not (config.announce_channel_id or config.review_channel_id):
+            db.session.delete(config)
+            config = None
+        db.session.commit()
+        return config
+
+    @classmethod
+    def remove(cls, guild_id):
+        """Forget a guild the bot was removed from; returns whether it had a config"""
+        removed = cls.query.filter_by(guild_id=str(guild_id)).delete()
+        db.session.commit()
+        return bool(removed)
+
 
 class ShopItem(db.Model):
     """Shop items for purchase"""
@@ -1942,268 +2308,6 @@ class ShopItem(db.Model):
             app.logger.error(f"Error applying item effect: {e}")
             # Continue execution even if there's an error
 
-    @classmethod
-    def create_default_items(cls):
-        """Create default shop items"""
-        # Titles
-        default_items = [
-            {
-                'name': 'pro_gamer_title',
-                'display_name': 'Про-Геймер',
-                'description': 'Эксклюзивный титул для настоящих профессионалов',
-                'category': 'title',
-                'price_coins': 5000,
-                'price_reputation': 100,
-                'unlock_level': 25,
-                'rarity': 'epic',
-                'icon': 'fas fa-crown',
-                'item_data': '{"title_text": "Про-Геймер", "title_color": "#6f42c1"}'
-            },
-            {
-                'name': 'legend_title',
-                'display_name': 'Легенда',
-                'description': 'Титул для истинных легенд Bedwars',
-                'category': 'title',
-                'price_coins': 15000,
-                'price_reputation': 500,
-                'unlock_level': 50,
-                'rarity': 'legendary',
-                'icon': 'fas fa-dragon',
-                'item_data': '{"title_text": "Легенда", "title_color": "#ff9800", "is_gradient": true, "gradient_colors": "linear-gradient(45deg, #ff9800, #ffc107)"}'
-            },
-            {
-                'name': 'mythic_warrior_title',
-                'display_name': 'Мифический Воин',
-                'description': 'Сверхредкий титул для избранных',
-                'category': 'title',
-                'price_coins': 50000,
-                'price_reputation': 2000,
-                'unlock_level': 75,
-                'rarity': 'mythic',
-                'icon': 'fas fa-bolt',
-                'item_data': '{"title_text": "Мифический Воин", "title_color": "#9400d3", "is_gradient": true, "gradient_colors": "linear-gradient(45deg, #9400d3, #4b0082, #0000ff)"}'
-            },
-
-            # Boosters
-            {
-                'name': 'xp_booster_small',
-                'display_name': 'Малый бустер опыта',
-                'description': 'Получите +1000 опыта мгновенно',
-                'category': 'booster',
-                'price_coins': 1000,
-                'price_reputation': 0,
-                'unlock_level': 1,
-                'rarity': 'common',
-                'item_data': '{"booster_type": "xp", "bonus_amount": 1000}'
-            },
-            {
-                'name': 'xp_booster_large',
-                'display_name': 'Большой бустер опыта',
-                'description': 'Получите +10000 опыта мгновенно',
-                'category': 'booster',
-                'price_coins': 8000,
-                'price_reputation': 0,
-                'unlock_level': 10,
-                'rarity': 'epic',
-                'item_data': '{"booster_type": "xp", "bonus_amount": 10000}'
-            },
-            {
-                'name': 'coin_booster',
-                'display_name': 'Бустер койнов',
-                'description': 'Получите +2500 койнов мгновенно',
-                'category': 'booster',
-                'price_coins': 3000,
-                'price_reputation': 50,
-                'unlock_level': 15,
-                'rarity': 'uncommon',
-                'item_data': '{"booster_type": "coins", "bonus_amount": 2500}'
-            },
-            {
-                'name': 'reputation_booster',
-                'display_name': 'Бустер репутации',
-                'description': 'Получите +200 репутации мгновенно',
-                'category': 'booster',
-                'price_coins': 5000,
-                'price_reputation': 0,
-                'unlock_level': 20,
-                'rarity': 'rare',
-                'item_data': '{"booster_type": "reputation", "bonus_amount": 200}'
-            },
-
-            # Custom Roles
-            {
-                'name': 'basic_custom_role',
-                'display_name': 'Обычная кастомная роль',
-                'description': 'Создайте свою роль со статичным цветом',
-                'category': 'custom_role',
-                'price_coins': 5000,
-                'price_reputation': 0,
-                'unlock_level': 10,
-                'rarity': 'common',
-                'item_data': '{"role_type": "basic", "allows_color": true, "allows_gradient": false, "allows_animation": false, "allows_emoji": false}'
-            },
-            {
-                'name': 'gradient_custom_role',
-                'display_name': 'Особая роль с градиентом',
-                'description': 'Роль с красивым градиентом',
-                'category': 'custom_role',
-                'price_coins': 50000,
-                'price_reputation': 0,
-                'unlock_level': 40,
-                'rarity': 'epic',
-                'item_data': '{"role_type": "gradient", "allows_color": true, "allows_gradient": true, "allows_animation": false, "allows_emoji": false}'
-            },
-            {
-                'name': 'animated_custom_role',
-                'display_name': 'Особая анимированная роль',
-                'description': 'Роль с анимированным градиентом и эмодзи',
-                'category': 'custom_role',
-                'price_coins': 75000,
-                'price_reputation': 0,
-                'unlock_level': 40,
-                'rarity': 'legendary',
-                'item_data': '{"role_type": "animated", "allows_color": true, "allows_gradient": true, "allows_animation": true, "allows_emoji": true}'
-            },
-            {
-                'name': 'premium_animated_custom_role',
-                'display_name': 'Премиум анимированная роль',
-                'description': 'Топовая роль с максимальными возможностями',
-                'category': 'custom_role',
-                'price_coins': 100000,
-                'price_reputation': 0,
-                'unlock_level': 40,
-                'rarity': 'mythic',
-                'item_data': '{"role_type": "premium", "allows_color": true, "allows_gradient": true, "allows_animation": true, "allows_emoji": true}'
-            },
-             {
-                'name': 'emoji_slot_basic',
-                'display_name': 'Слот для эмодзи (базовый)',
-                'description': 'Добавляет 1 слот для кастомного эмодзи к роли',
-                'category': 'emoji_slot',
-                'price_coins': 10000,
-                'price_reputation': 200,
-                'unlock_level': 10,
-                'rarity': 'uncommon',
-                'item_data': '{"emoji_slots": 1}'
-            },
-            {
-                'name': 'emoji_slot_premium',
-                'display_name': 'Слот для эмодзи (премиум)',
-                'description': 'Добавляет 2 слота для кастомного эмодзи к роли',
-                'category': 'emoji_slot',
-                'price_coins': 25000,
-                'price_reputation': 500,
-                'unlock_level': 30,
-                'rarity': 'rare',
-                'item_data': '{"emoji_slots": 2}'
-            },
-            {
-                'name': 'emoji_slot_legendary',
-                'display_name': 'Слот для эмодзи (легендарный)',
-                'description': 'Добавляет 3 слота для кастомного эмодзи к роли',
-                'category': 'emoji_slot',
-                'price_coins': 50000,
-                'price_reputation': 1000,
-                'unlock_level': 50,
-                'rarity': 'legendary',
-                'item_data': '{"emoji_slots": 3}'
-            },
-
-            # Themes
-            {
-                'name': 'neon_theme',
-                'display_name': 'Неоновая тема',
-                'description': 'Яркая неоновая тема оформления',
-                'category': 'theme',
-                'price_coins': 12000,
-                'price_reputation': 300,
-                'unlock_level': 30,
-                'rarity': 'epic',
-                'item_data': '{"theme_colors": {"primary": "#00ffff", "secondary": "#ff00ff"}}'
-            },
-            {
-                'name': 'galaxy_theme',
-                'display_name': 'Галактическая тема',
-                'description': 'Космическая тема с эффектами галактики',
-                'category': 'theme',
-                'price_coins': 25000,
-                'price_reputation': 800,
-                'unlock_level': 60,
-                'rarity': 'legendary',
-                'item_data': '{"theme_colors": {"primary": "#483d8b", "secondary": "#9400d3"}}'
-            },
-
-            # Gradients for customization
-            {
-                'name': 'fire_gradient',
-                'display_name': 'Огненный градиент',
-                'description': 'Яркий огненный градиент для любого элемента',
-                'category': 'gradient',
-                'price_coins': 2500,
-                'price_reputation': 50,
-                'unlock_level': 15,
-                'rarity': 'uncommon',
-                'icon': 'fas fa-fire',
-                'item_data': '{"gradient_css": "linear-gradient(45deg, #ff6b35, #f7931e, #ffaa00)", "is_animated": true}'
-            },
-            {
-                'name': 'ocean_gradient',
-                'display_name': 'Морской градиент',
-                'description': 'Прохладный морской градиент',
-                'category': 'gradient',
-                'price_coins': 2000,
-                'price_reputation': 30,
-                'unlock_level': 10,
-                'rarity': 'common',
-                'icon': 'fas fa-water',
-                'item_data': '{"gradient_css": "linear-gradient(45deg, #1e3c72, #3a7bd5)", "is_animated": false}'
-            },
-            {
-                'name': 'rainbow_gradient',
-                'display_name': 'Радужный градиент',
-                'description': 'Яркий радужный градиент с анимацией',
-                'category': 'gradient',
-                'price_coins': 5000,
-                'price_reputation': 100,
-                'unlock_level': 25,
-                'rarity': 'epic',
-                'icon': 'fas fa-rainbow',
-                'item_data': '{"gradient_css": "linear-gradient(45deg, #ff0000, #ffff00, #00ff00, #0000ff, #8b00ff)", "is_animated": true}'
-            },
-            {
-                'name': 'galaxy_gradient',
-                'display_name': 'Галактический градиент',
-                'description': 'Космический градиент для избранных',
-                'category': 'gradient',
-                'price_coins': 15000,
-                'price_reputation': 300,
-                'unlock_level': 50,
-                'rarity': 'legendary',
-                'icon': 'fas fa-star',
-                'item_data': '{"gradient_css": "linear-gradient(45deg, #2c3e50, #4a6741, #9b59b6, #e74c3c)", "is_animated": true}'
-            },
-            # Custom Roles
-            {
-                'name': 'gradient_custom_role',
-                'display_name': 'Особая роль с градиентом',
-                'description': 'Роль с красивым градиентом',
-                'category': 'custom_role',
-                'price_coins': 50000,
-                'price_reputation': 0,
-                'unlock_level': 40,
-                'rarity': 'epic',
-                'item_data': '{"role_type": "gradient", "allows_color": true, "allows_gradient": true, "allows_animation": false, "allows_emoji": false}'
-            },
-        ]
-
-        for item_data in default_items:
-            existing = cls.query.filter_by(name=item_data['name']).first()
-            if not existing:
-                item = cls(**item_data)
-                db.session.add(item)
-
-        db.session.commit()
-
 
 class ShopPurchase(db.Model):
     """Shop purchase history"""
@@ -2304,273 +2408,6 @@ class Achievement(db.Model):
 
         return new_achievements
 
-    @classmethod
-    def create_default_achievements(cls):
-        """Create default achievements with enhanced reward system"""
-        default_achievements = [
-            # Common achievements (basic rewards)
-            {
-                'title': 'Новичок',
-                'description': 'Сыграйте первую игру',
-                'icon': 'fas fa-baby',
-                'rarity': 'common',
-                'unlock_condition': '{"games_played": 1}',
-                'reward_xp': 500,
-                'reward_coins': 100,
-                'reward_reputation': 5
-            },
-            {
-                'title': 'Первые шаги',
-                'description': 'Убейте 10 игроков',
-                'icon': 'fas fa-sword',
-                'rarity': 'common',
-                'unlock_condition': '{"kills": 10}',
-                'reward_xp': 750,
-                'reward_coins': 150,
-                'reward_reputation': 8
-            },
-            {
-                'title': 'Разрушитель',
-                'description': 'Сломайте 5 кроватей',
-                'icon': 'fas fa-bed',
-                'rarity': 'common',
-                'unlock_condition': '{"beds_broken": 5}',
-                'reward_xp': 800,
-                'reward_coins': 200,
-                'reward_reputation': 10
-            },
-
-            # Uncommon achievements (moderate rewards)
-            {
-                'title': 'Боец',
-                'description': 'Убейте 50 игроков',
-                'icon': 'fas fa-fist-raised',
-                'rarity': 'uncommon',
-                'unlock_condition': '{"kills": 50}',
-                'reward_xp': 1500,
-                'reward_coins': 300,
-                'reward_reputation': 15
-            },
-            {
-                'title': 'Коллекционер',
-                'description': 'Соберите 1000 единиц ресурсов',
-                'icon': 'fas fa-gem',
-                'rarity': 'uncommon',
-                'unlock_condition': '{"total_resources": 1000}',
-                'reward_xp': 1200,
-                'reward_coins': 250,
-                'reward_reputation': 12
-            },
-            {
-                'title': 'Победитель',
-                'description': 'Выиграйте 10 игр',
-                'icon': 'fas fa-trophy',
-                'rarity': 'uncommon',
-                'unlock_condition': '{"wins": 10}',
-                'reward_xp': 2000,
-                'reward_coins': 400,
-                'reward_reputation': 20
-            },
-
-            # Epic achievements (high rewards) - Made more challenging
-            {
-                'title': 'Неудержимый',
-                'description': 'Убейте 500 игроков с K/D > 2.0',
-                'icon': 'fas fa-fire',
-                'rarity': 'epic',
-                'unlock_condition': '{"kills": 500, "kd_ratio": 2.0}',
-                'reward_xp': 8000,
-                'reward_coins': 1500,
-                'reward_reputation': 75,
-                'is_hidden': True
-            },
-            {
-                'title': 'Мастер ресурсов',
-                'description': 'Соберите 25000 единиц ресурсов и выиграйте 75 игр',
-                'icon': 'fas fa-coins',
-                'rarity': 'epic',
-                'unlock_condition': '{"total_resources": 25000, "wins": 75}',
-                'reward_xp': 10000,
-                'reward_coins': 2000,
-                'reward_reputation': 100,
-                'is_hidden': True
-            },
-            {
-                'title': 'Чемпион арены',
-                'description': 'Выиграйте 150 игр с 75%+ винрейтом',
-                'icon': 'fas fa-crown',
-                'rarity': 'epic',
-                'unlock_condition': '{"wins": 150, "win_rate": 75.0}',
-                'reward_xp': 12000,
-                'reward_coins': 2500,
-                'reward_reputation': 125
-            },
-            {
-                'title': 'Разрушитель империй',
-                'description': 'Сломайте 200 кроватей с 60%+ винрейтом',
-                'icon': 'fas fa-hammer',
-                'rarity': 'epic',
-                'unlock_condition': '{"beds_broken": 200, "win_rate": 60.0}',
-                'reward_xp': 9000,
-                'reward_coins': 1800,
-                'reward_reputation': 90,
-                'is_hidden': True
-            },
-
-            # Legendary achievements (very high rewards) - Significantly more challenging
-            {
-                'title': 'Мастер Bedwars',
-                'description': 'Достигните K/D 4.0+ при 200+ играх',
-                'icon': 'fas fa-star',
-                'rarity': 'legendary',
-                'unlock_condition': '{"kd_ratio": 4.0, "games_played": 200}',
-                'reward_xp': 20000,
-                'reward_coins': 4000,
-                'reward_reputation': 200,
-                'reward_title': 'Мастер'
-            },
-            {
-                'title': 'Великий воин',
-                'description': 'Убейте 1500 игроков с 80%+ винрейтом',
-                'icon': 'fas fa-shield',
-                'rarity': 'legendary',
-                'unlock_condition': '{"kills": 1500, "win_rate": 80.0}',
-                'reward_xp': 25000,
-                'reward_coins': 5000,
-                'reward_reputation': 250,
-                'reward_title': 'Великий воин'
-            },
-            {
-                'title': 'Легенда арены',
-                'description': 'Выиграйте 300 игр с 90%+ винрейтом',
-                'icon': 'fas fa-medal',
-                'rarity': 'legendary',
-                'unlock_condition': '{"wins": 300, "win_rate": 90.0}',
-                'reward_xp': 30000,
-                'reward_coins': 6000,
-                'reward_reputation': 300,
-                'reward_title': 'Легенда арены'
-            },
-            {
-                'title': 'Безжалостный убийца',
-                'description': 'Совершите 750 финальных убийств с K/D > 3.5',
-                'icon': 'fas fa-skull-crossbones',
-                'rarity': 'legendary',
-                'unlock_condition': '{"final_kills": 750, "kd_ratio": 3.5}',
-                'reward_xp': 22000,
-                'reward_coins': 4500,
-                'reward_reputation': 220,
-                'reward_title': 'Безжалостный',
-                'is_hidden': True
-            },
-
-            # Mythic achievements (maximum rewards)
-            {
-                'title': 'Божество PVP',
-                'description': 'Достигните K/D соотношения 5.0 и совершите 1000+ убийств',
-                'icon': 'fas fa-bolt',
-                'rarity': 'mythic',
-                'unlock_condition': '{"kd_ratio": 5.0, "kills": 1000, "experience": 450000}',
-                'reward_xp': 25000,
-                'reward_coins': 5000,
-                'reward_reputation': 250,
-                'reward_title': 'Божество PVP',
-                'is_hidden': True
-            },
-            {
-                'title': 'Разрушитель миров',
-                'description': 'Сломайте 500 кроватей противников',
-                'icon': 'fas fa-meteor',
-                'rarity': 'mythic',
-                'unlock_condition': '{"beds_broken": 500}',
-                'reward_xp': 30000,
-                'reward_coins': 6000,
-                'reward_reputation': 300,
-                'reward_title': 'Разрушитель миров',
-                'is_hidden': True
-            },
-            {
-                'title': 'Легенда сервера',
-                'description': 'Достигните 95% процента побед при 100+ играх',
-                'icon': 'fas fa-dragon',
-                'rarity': 'mythic',
-                'unlock_condition': '{"win_rate": 95.0, "games_played": 100}',
-                'reward_xp': 40000,
-                'reward_coins': 8000,
-                'reward_reputation': 400,
-                'reward_title': 'Легенда сервера',
-                'is_hidden': True
-            },
-            {
-                'title': 'Повелитель ресурсов',
-                'description': 'Соберите 100,000 единиц ресурсов',
-                'icon': 'fas fa-gem',
-                'rarity': 'mythic',
-                'unlock_condition': '{"total_resources": 100000}',
-                'reward_xp': 35000,
-                'reward_coins': 7000,
-                'reward_reputation': 350,
-                'reward_title': 'Повелитель ресурсов',
-                'is_hidden': True
-            },
-            {
-                'title': 'Абсолютный чемпион',
-                'description': 'Выиграйте 1000 игр и достигните 98% побед',
-                'icon': 'fas fa-infinity',
-                'rarity': 'mythic',
-                'unlock_condition': '{"wins": 1000, "win_rate": 98.0}',
-                'reward_xp': 50000,
-                'reward_coins': 10000,
-                'reward_reputation': 500,
-                'reward_title': 'Абсолютный чемпион',
-                'is_hidden': True
-            },
-            {
-                'title': 'Всевидящее око',
-                'description': 'Совершите 2000 финальных убийств',
-                'icon': 'fas fa-eye',
-                'rarity': 'mythic',
-                'unlock_condition': '{"final_kills": 2000}',
-                'reward_xp': 45000,
-                'reward_coins': 9000,
-                'reward_reputation': 450,
-                'reward_title': 'Всевидящее око',
-                'is_hidden': True
-            },
-            {
-                'title': 'Архитектор разрушения',
-                'description': 'Сломайте 1000 кроватей',
-                'icon': 'fas fa-hammer',
-                'rarity': 'mythic',
-                'unlock_condition': '{"beds_broken": 1000}',
-                'reward_xp': 55000,
-                'reward_coins': 11000,
-                'reward_reputation': 550,
-                'reward_title': 'Архитектор разрушения',
-                'is_hidden': True
-            },
-            {
-                'title': 'Неуязвимый',
-                'description': 'Достигните уровня 200 с K/D > 4.0',
-                'icon': 'fas fa-shield-alt',
-                'rarity': 'mythic',
-                'unlock_condition': '{"experience": 1500000, "kd_ratio": 4.0}',
-                'reward_xp': 60000,
-                'reward_coins': 12000,
-                'reward_reputation': 600,
-                'reward_title': 'Неуязвимый',
-                'is_hidden': True
-            }
-        ]
-
-        for achievement_data in default_achievements:
-            existing = cls.query.filter_by(title=achievement_data['title']).first()
-            if not existing:
-                achievement = cls(**achievement_data)
-                db.session.add(achievement)
-
-        db.session.commit()
-
 
 class PlayerAchievement(db.Model):
     """Player progress on achievements with baseline tracking"""
@@ -2629,7 +2466,7 @@ class AdminCustomRole(db.Model):
         """Get emoji display HTML"""
         if self.emoji_filename:
             # Use uploaded file
-            emoji_path = f"/static/emojis/{self.emoji_filename}"
+            emoji_path = f"/assets/emojis/{self.emoji_filename}"
             css_class = "emoji animated-emoji" if self.emoji_is_animated else "emoji"
             return f'<img src="{emoji_path}" class="{css_class}" alt="custom emoji">'
         elif self.emoji_url:
@@ -2641,51 +2478,6 @@ class AdminCustomRole(db.Model):
         return ''
 
 
-    @classmethod
-    def create_default_roles(cls):
-        """Create default admin roles"""
-        default_roles = [
-            {
-                'name': 'VIP',
-                'color': '#ffd700',
-                'emoji_class': 'fas fa-star',
-                'has_gradient': False,
-                'is_visible': True
-            },
-            {
-                'name': 'Premium',
-                'color': '#ff6b35',
-                'emoji_class': 'fas fa-crown',
-                'has_gradient': True,
-                'gradient_end_color': '#f7931e',
-                'is_visible': True
-            },
-            {
-                'name': 'Модератор',
-                'color': '#28a745',
-                'emoji_class': 'fas fa-shield',
-                'has_gradient': False,
-                'is_visible': True
-            },
-            {
-                'name': 'Администратор',
-                'color': '#dc3545',
-                'emoji_class': 'fas fa-hammer',
-                'has_gradient': True,
-                'gradient_end_color': '#c82333',
-                'is_visible': True
-            }
-        ]
-
-        for role_data in default_roles:
-            existing = cls.query.filter_by(name=role_data['name']).first()
-            if not existing:
-                role = cls(**role_data)
-                db.session.add(role)
-
-        db.session.commit()
-
-
 class PlayerAdminRole(db.Model):
     """Players assigned admin custom roles"""
 
@@ -2759,79 +2551,6 @@ class Badge(db.Model):
             return self.emoji
         return ''
 
-    @classmethod
-    def create_default_badges(cls):
-        """Create default badges"""
-        default_badges = [
-            {
-                'name': 'first_steps',
-                'display_name': 'Первые шаги',
-                'description': 'Добро пожаловать в Bedwars!',
-                'icon': 'fas fa-baby',
-                'color': '#ffffff',
-                'background_color': '#28a745',
-                'border_color': '#20c997',
-                'rarity': 'common'
-            },
-            {
-                'name': 'veteran',
-                'display_name': 'Ветеран',
-                'description': 'Опытный игрок сервера',
-                'icon': 'fas fa-shield',
-                'color': '#ffffff',
-                'background_color': '#6f42c1',
-                'border_color': '#8e44ad',
-                'rarity': 'rare'
-            },
-            {
-                'name': 'champion',
-                'display_name': 'Чемпион',
-                'description': 'Элитный игрок',
-                'icon': 'fas fa-crown',
-                'color': '#212529',
-                'has_gradient': True,
-                'gradient_start': '#ffd700',
-                'gradient_end': '#ffaa00',
-                'border_color': '#ffd700',
-                'rarity': 'epic',
-                'is_animated': True
-            },
-            {
-                'name': 'legend',
-                'display_name': 'Легенда',
-                'description': 'Легендарный игрок сервера',
-                'icon': 'fas fa-dragon',
-                'color': '#ffffff',
-                'has_gradient': True,
-                'gradient_start': '#ff6b35',
-                'gradient_end': '#f7931e',
-                'border_color': '#ff6b35',
-                'rarity': 'legendary',
-                'is_animated': True
-            },
-            {
-                'name': 'mythic_warrior',
-                'display_name': 'Мифический воин',
-                'description': 'Достигнил невозможного',
-                'icon': 'fas fa-bolt',
-                'color': '#ffffff',
-                'has_gradient': True,
-                'gradient_start': '#9400d3',
-                'gradient_end': '#4b0082',
-                'border_color': '#9400d3',
-                'rarity': 'mythic',
-                'is_animated': True
-            }
-        ]
-
-        for badge_data in default_badges:
-            existing = cls.query.filter_by(name=badge_data['name']).first()
-            if not existing:
-                badge = cls(**badge_data)
-                db.session.add(badge)
-
-        db.session.commit()
-
 
 class PlayerBadge(db.Model):
     """Badges assigned to players"""
@@ -2925,50 +2644,6 @@ class CustomTitle(db.Model):
     def __repr__(self):
         return f'<CustomTitle {self.name}>'
 
-    @classmethod
-    def create_default_titles(cls):
-        """Create default custom titles"""
-        default_titles = [
-            {
-                'name': 'legend',
-                'display_name': '🏆 Легенда',
-                'color': '#ffd700',
-                'glow_color': '#ffaa00'
-            },
-            {
-                'name': 'champion',
-                'display_name': '👑 Чемпион',
-                'color': '#ff6b35',
-                'glow_color': '#ff4444'
-            },
-            {
-                'name': 'elite',
-                'display_name': '⭐ Элита',
-                'color': '#9b59b6',
-                'glow_color': '#8e44ad'
-            },
-            {
-                'name': 'destroyer',
-                'display_name': '💥 Разрушитель',
-                'color': '#e74c3c',
-                'glow_color': '#c0392b'
-            },
-            {
-                'name': 'master',
-                'display_name': '🎯 Мастер',
-                'color': '#3498db',
-                'glow_color': '#2980b9'
-            }
-        ]
-
-        for title_data in default_titles:
-            existing = cls.query.filter_by(name=title_data['name']).first()
-            if not existing:
-                title = cls(**title_data)
-                db.session.add(title)
-
-        db.session.commit()
-
 
 class PlayerTitle(db.Model):
     """Custom titles assigned to players by admins"""
@@ -3081,237 +2756,6 @@ class GradientTheme(db.Model):
             return f"linear-gradient({self.gradient_direction}, {self.color1}, {self.color2}, {self.color3})"
         return f"linear-gradient({self.gradient_direction}, {self.color1}, {self.color2})"
 
-    @classmethod
-    def create_default_themes(cls):
-        """Create default gradient themes"""
-        default_themes = [
-            # Nickname gradients
-            {
-                'name': 'fire_nickname',
-                'display_name': '🔥 Огненный',
-                'element_type': 'nickname',
-                'color1': '#ff6b35',
-                'color2': '#f7931e',
-                'color3': '#ffaa00',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-            {
-                'name': 'ocean_nickname',
-                'display_name': '🌊 Океанский',
-                'element_type': 'nickname',
-                'color1': '#00d2ff',
-                'color2': '#3a7bd5',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'purple_nickname',
-                'display_name': '🔮 Фиолетовый',
-                'element_type': 'nickname',
-                'color1': '#667eea',
-                'color2': '#764ba2',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'rainbow_nickname',
-                'display_name': '🌈 Радужный',
-                'element_type': 'nickname',
-                'color1': '#ff0000',
-                'color2': '#ffff00',
-                'color3': '#00ff00',
-                'gradient_direction': '90deg',
-                'animation_enabled': True
-            },
-
-            # Stats gradients
-            {
-                'name': 'gold_stats',
-                'display_name': '🥇 Золотая статистика',
-                'element_type': 'stats',
-                'color1': '#ffd700',
-                'color2': '#ffed4e',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'emerald_stats',
-                'display_name': '💎 Изумрудная статистика',
-                'element_type': 'stats',
-                'color1': '#50c878',
-                'color2': '#00ff7f',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'blood_stats',
-                'display_name': '🩸 Кровавая статистика',
-                'element_type': 'stats',
-                'color1': '#dc143c',
-                'color2': '#ff1744',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-
-            # Individual stat gradients
-            {
-                'name': 'fire_kills',
-                'display_name': '🔥 Огненные киллы',
-                'element_type': 'kills',
-                'color1': '#ff6b35',
-                'color2': '#f7931e',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-            {
-                'name': 'ice_deaths',
-                'display_name': '❄️ Ледяные смерти',
-                'element_type': 'deaths',
-                'color1': '#74b9ff',
-                'color2': '#0984e3',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'golden_wins',
-                'display_name': '🏆 Золотые победы',
-                'element_type': 'wins',
-                'color1': '#ffd700',
-                'color2': '#ffaa00',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-            {
-                'name': 'diamond_beds',
-                'display_name': '💎 Алмазные кровати',
-                'element_type': 'beds',
-                'color1': '#74b9ff',
-                'color2': '#0984e3',
-                'color3': '#6c5ce7',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-
-            # Title gradients
-            {
-                'name': 'legendary_title',
-                'display_name': '👑 Легендарный титул',
-                'element_type': 'title',
-                'color1': '#ffd700',
-                'color2': '#ff6b35',
-                'color3': '#8e44ad',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-            {
-                'name': 'crystal_title',
-                'display_name': '💎 Кристальный титул',
-                'element_type': 'title',
-                'color1': '#74b9ff',
-                'color2': '#0984e3',
-                'color3': '#6c5ce7',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-
-            # Status gradients (level 20+)
-            {
-                'name': 'sunset_status',
-                'display_name': '🌅 Закатный статус',
-                'element_type': 'status',
-                'color1': '#ff6b35',
-                'color2': '#f7931e',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'ocean_status',
-                'display_name': '🌊 Океанский статус',
-                'element_type': 'status',
-                'color1': '#00d2ff',
-                'color2': '#3a7bd5',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'mystic_status',
-                'display_name': '🔮 Мистический статус',
-                'element_type': 'status',
-                'color1': '#667eea',
-                'color2': '#764ba2',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-
-            # Bio gradients (level 20+)
-            {
-                'name': 'elegant_bio',
-                'display_name': '✨ Элегантное био',
-                'element_type': 'bio',
-                'color1': '#ffd700',
-                'color2': '#ffed4e',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'royal_bio',
-                'display_name': '👑 Королевское био',
-                'element_type': 'bio',
-                'color1': '#8e44ad',
-                'color2': '#3498db',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'cosmic_bio',
-                'display_name': '🌌 Космическое био',
-                'element_type': 'bio',
-                'color1': '#667eea',
-                'color2': '#764ba2',
-                'color3': '#f093fb',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-
-            # Role gradients
-            {
-                'name': 'admin_role',
-                'display_name': '👑 Администраторская роль',
-                'element_type': 'role',
-                'color1': '#ff6b35',
-                'color2': '#f7931e',
-                'gradient_direction': '45deg',
-                'animation_enabled': True
-            },
-            {
-                'name': 'vip_role',
-                'display_name': '💎 VIP роль',
-                'element_type': 'role',
-                'color1': '#8e44ad',
-                'color2': '#3498db',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            },
-            {
-                'name': 'pro_role',
-                'display_name': '⭐ Профессиональная роль',
-                'element_type': 'role',
-                'color1': '#28a745',
-                'color2': '#20c997',
-                'gradient_direction': '45deg',
-                'animation_enabled': False
-            }
-        ]
-
-        for theme_data in default_themes:
-            existing = cls.query.filter_by(name=theme_data['name']).first()
-            if not existing:
-                theme = cls(**theme_data)
-                db.session.add(theme)
-
-        db.session.commit()
-
 
 class PlayerGradientSetting(db.Model):
     """Player's gradient settings"""
@@ -3363,9 +2807,61 @@ class SiteTheme(db.Model):
     is_default = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # id -> theme colors, shared by every request in the process
+    _theme_map = None
+    _theme_map_loaded_at = 0.0
+    _theme_map_generation = 0
+    THEME_MAP_TTL = 300  # other workers' admin edits show up within this many seconds
+
     def __repr__(self):
         return f'<SiteTheme {self.name}>'
 
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'display_name': self.display_name,
+            'description': self.description,
+            'primary_color': self.primary_color,
+            'secondary_color': self.secondary_color,
+            'background_color': self.background_color,
+            'card_background': self.card_background,
+            'text_color': self.text_color,
+            'accent_color': self.accent_color,
+            'is_active': self.is_active,
+            'is_default': self.is_default
+        }
+
+    @classmethod
+    def get_theme_map(cls):
+        """Theme dicts by id, loaded with one query and reused until a local commit or the TTL"""
+        theme_map = cls._theme_map
+        if theme_map is None or time.monotonic() - cls._theme_map_loaded_at > cls.THEME_MAP_TTL:
+            generation = cls._theme_map_generation
+            theme_map = MappingProxyType({theme.id: MappingProxyType(theme.to_dict())
+                                          for theme in cls.query.order_by(cls.id).all()})
+            if generation == cls._theme_map_generation:  # not invalidated while loading
+                cls._theme_map = theme_map
+                cls._theme_map_loaded_at = time.monotonic()
+        return theme_map
+
+    @classmethod
+    def get_theme(cls, theme_id):
+        """Theme dict by id (None when missing)"""
+        return cls.get_theme_map().get(theme_id) if theme_id else None
+
+    @classmethod
+    def get_default_theme(cls):
+        """The default active theme, else the first active one"""
+        active = [theme for theme in cls.get_theme_map().values() if theme['is_active']]
+        return next((theme for theme in active if theme['is_default']), active[0] if active else None)
+
+    @classmethod
+    def invalidate_theme_map(cls):
+        """Drop the cached theme map so the next lookup reloads it"""
+        cls._theme_map_generation += 1
+        cls._theme_map = None
+
     @property
     def css_variables(self):
         """Generate CSS variables for the theme"""
@@ -3378,141 +2874,22 @@ class SiteTheme(db.Model):
             '--accent-color': self.accent_color
         }
 
-    @classmethod
-    def create_default_themes(cls):
-        """Create default site themes"""
-        default_themes = [
-            {
-                'name': 'default_dark',
-                'display_name': 'Классическая тёмная',
-                'description': 'Элегантная тёмная тема с золотыми акцентами',
-                'primary_color': '#ffc107',
-                'secondary_color': '#6c757d',
-                'background_color': '#0d1117',
-                'card_background': '#161b22',
-                'text_color': '#f0f6fc',
-                'accent_color': '#28a745',
-                'is_default': True
-            },
-            {
-                'name': 'cyber_matrix',
-                'display_name': 'Киберматрица',
-                'description': 'Футуристическая тема в стиле "Матрицы"',
-                'primary_color': '#00ff41',
-                'secondary_color': '#008f11',
-                'background_color': '#000000',
-                'card_background': '#001100',
-                'text_color': '#00ff41',
-                'accent_color': '#39ff14'
-            },
-            {
-                'name': 'royal_purple',
-                'display_name': 'Королевский пурпур',
-                'description': 'Роскошная тёмно-фиолетовая тема',
-                'primary_color': '#9146ff',
-                'secondary_color': '#772ce8',
-                'background_color': '#0e0a20',
-                'card_background': '#1f0a3e',
-                'text_color': '#ffffff',
-                'accent_color': '#bf94ff'
-            },
-            {
-                'name': 'ocean_depths',
-                'display_name': 'Морские глубины',
-                'description': 'Глубокая синяя тема океана',
-                'primary_color': '#00b4d8',
-                'secondary_color': '#0077b6',
-                'background_color': '#03045e',
-                'card_background': '#023e8a',
-                'text_color': '#caf0f8',
-                'accent_color': '#90e0ef'
-            },
-            {
-                'name': 'volcano_fire',
-                'display_name': 'Огонь вулкана',
-                'description': 'Страстная красно-оранжевая тема',
-                'primary_color': '#ff4500',
-                'secondary_color': '#dc2626',
-                'background_color': '#1a0000',
-                'card_background': '#330000',
-                'text_color': '#fef2f2',
-                'accent_color': '#fb923c'
-            },
-            {
-                'name': 'midnight_blue',
-                'display_name': 'Полуночный синий',
-                'description': 'Элегантная тёмно-синяя тема',
-                'primary_color': '#60a5fa',
-                'secondary_color': '#3b82f6',
-                'background_color': '#0f172a',
-                'card_background': '#1e293b',
-                'text_color': '#f1f5f9',
-                'accent_color': '#38bdf8'
-            },
-            {
-                'name': 'emerald_forest',
-                'display_name': 'Изумрудный лес',
-                'description': 'Природная зелёная тема',
-                'primary_color': '#10b981',
-                'secondary_color': '#059669',
-                'background_color': '#064e3b',
-                'card_background': '#065f46',
-                'text_color': '#ecfdf5',
-                'accent_color': '#34d399'
-            },
-            {
-                'name': 'sunset_orange',
-                'display_name': 'Закатный оранжевый',
-                'description': 'Тёплая оранжево-красная тема',
-                'primary_color': '#f97316',
-                'secondary_color': '#ea580c',
-                'background_color': '#431407',
-                'card_background': '#7c2d12',
-                'text_color': '#fff7ed',
-                'accent_color': '#fb923c'
-            },
-            {
-                'name': 'pink_neon',
-                'display_name': 'Неоновый розовый',
-                'description': 'Яркая розово-фиолетовая тема',
-                'primary_color': '#ec4899',
-                'secondary_color': '#db2777',
-                'background_color': '#500724',
-                'card_background': '#831843',
-                'text_color': '#fdf2f8',
-                'accent_color': '#f472b6'
-            },
-            {
-                'name': 'golden_luxury',
-                'display_name': 'Золотая роскошь',
-                'description': 'Роскошная золотисто-чёрная тема',
-                'primary_color': '#fbbf24',
-                'secondary_color': '#f59e0b',
-                'background_color': '#1c1917',
-                'card_background': '#292524',
-                'text_color': '#fef3c7',
-                'accent_color': '#fcd34d'
-            },
-            {
-                'name': 'ice_crystal',
-                'display_name': 'Ледяной кристалл',
-                'description': 'Холодная голубо-белая тема',
-                'primary_color': '#0ea5e9',
-                'secondary_color': '#0284c7',
-                'background_color': '#0c4a6e',
-                'card_background': '#075985',
-                'text_color': '#e0f2fe',
-                'accent_color': '#38bdf8'
-            }
-        ]
 
-        for theme_data in default_themes:
-            existing = cls.query.filter_by(name=theme_data['name']).first()
-            if not existing:
-                theme = cls(**theme_data)
-                db.session.add(theme)
+@event.listens_for(SiteTheme, 'after_insert')
+@event.listens_for(SiteTheme, 'after_update')
+@event.listens_for(SiteTheme, 'after_delete')
+def _mark_site_theme_change(mapper, connection, target):
+    # Invalidated on commit (or rollback): a map loaded before then may hold uncommitted rows
+    db_session = object_session(target)
+    if db_session is not None:
+        db_session.info['site_themes_changed'] = True
 
-        db.session.commit()
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_site_themes(db_session):
+    if db_session.info.pop('site_themes_changed', False):
+        SiteTheme.invalidate_theme_map()
 
 
 class CursorTheme(db.Model):
@@ -3536,90 +2913,6 @@ class CursorTheme(db.Model):
     def __repr__(self):
         return f'<CursorTheme {self.name}>'
 
-    @classmethod
-    def create_default_cursors(cls):
-        """Create default cursor themes"""
-        default_cursors = [
-            {
-                'name': 'classic',
-                'display_name': '🎯 Классический',
-                'description': 'Стандартный игровой курсор',
-                'color1': '#ffc107',
-                'color2': '#ffaa00',
-                'animation': 'glow',
-                'price_coins': 0
-            },
-            {
-                'name': 'fire',
-                'display_name': '🔥 Огненный',
-                'description': 'Пылающий курсор для настоящих воинов',
-                'color1': '#ff6b35',
-                'color2': '#f7931e',
-                'animation': 'pulse',
-                'price_coins': 50,
-                'unlock_level': 5
-            },
-            {
-                'name': 'ice',
-                'display_name': '❄️ Ледяной',
-                'description': 'Холодный как лед курсор',
-                'color1': '#74b9ff',
-                'color2': '#0984e3',
-                'animation': 'glow',
-                'price_coins': 75,
-                'unlock_level': 10
-            },
-            {
-                'name': 'lightning',
-                'display_name': '⚡ Молния',
-                'description': 'Быстрый как молния курсор',
-                'color1': '#fdcb6e',
-                'color2': '#e17055',
-                'animation': 'pulse',
-                'shape': 'diamond',
-                'price_coins': 100,
-                'unlock_level': 15,
-                'is_premium': True
-            },
-            {
-                'name': 'rainbow',
-                'display_name': '🌈 Радужный',
-                'description': 'Переливающийся всеми цветами курсор',
-                'color1': '#ff0000',
-                'color2': '#00ff00',
-                'animation': 'rainbow',
-                'price_coins': 200,
-                'unlock_level': 25,
-                'is_premium': True
-            },
-            {
-                'name': 'galaxy',
-                'display_name': '🌌 Галактический',
-                'description': 'Космический курсор для покорителей вселенной',
-                'color1': '#6c5ce7',
-                'color2': '#a29bfe',
-                'animation': 'rotate',
-                'shape': 'star',
-                'price_coins': 500,
-                'unlock_level': 50,
-                'is_premium': True
-            }
-        ]
-
-        for cursor_data in default_cursors:
-            existing = cls.query.filter_by(name=cursor_data['name']).first()
-            if not existing:
-                cursor = cls(**cursor_data)
-                db.session.add(cursor)
-
-        db.session.commit()
-
-    @classmethod
-    def create_default_items(cls):
-        """Create default shop items"""
-        # Этот метод можно оставить пустым или добавить базовые предметы
-        pass
-
 
 class ShopCategory(db.Model):
     """Shop categories for organizing items"""
@@ -3896,4 +3189,134 @@ class TournamentParticipant(db.Model):
     clan = db.relationship('Clan', backref='tournament_participations')
 
     def __repr__(self):
-        return f'<TournamentParticipant {self.player_id}:{self.tournament_id}>'
\ No newline at end of file
+        return f'<TournamentParticipant {self.player_id}:{self.tournament_id}>'
+
+class DatabaseImportJob(db.Model):
+    """Background /admin/import-db run and its progress
+
+    The import runs in a thread of a web worker, which gunicorn may restart or
+    time out mid-run. The thread refreshes updated_at after every batch; a job
+    without a heartbeat for STALE_AFTER seconds is reported as failed.
+    """
+
+    STALE_AFTER = 300
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, completed, failed
+    clear_existing = db.Column(db.Boolean, default=False, nullable=False)
+    backup_version = db.Column(db.Integer, nullable=True)
+    current_table = db.Column(db.String(100), nullable=True)
+    bytes_total = db.Column(db.BigInteger, default=0, nullable=False)
+    bytes_read = db.Column(db.BigInteger, default=0, nullable=False)
+    processed_rows = db.Column(db.Integer, default=0, nullable=False)
+    inserted_rows = db.Column(db.Integer, default=0, nullable=False)
+    skipped_rows = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)  # heartbeat
+
+    def __repr__(self):
+        return f'<DatabaseImportJob {self.id} {self.status}>'
+
+    def expire_if_stale(self, now=None):
+        """Mark the job failed when its worker stopped sending heartbeats; returns whether it did (not committed)"""
+        if self.is_finished:
+            return False
+        now = now or datetime.utcnow()
+        heartbeat = self.updated_at or self.started_at or self.created_at
+        if heartbeat is None or now - heartbeat < timedelta(seconds=self.STALE_AFTER):
+            return False
+        self.status = 'failed'
+        self.error = (f'Импорт прерван: нет прогресса более {self.STALE_AFTER // 60} мин '
+                      f'(рабочий процесс был перезапущен). Запустите импорт заново.')
+        self.finished_at = now
+        return True
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+
+    @property
+    def progress(self):
+        """Percentage of the uploaded file consumed so far"""
+        if self.status == 'completed':
+            return 100
+        if not self.bytes_total:
+            return 0
+        return min(99, int(self.bytes_read * 100 / self.bytes_total))
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'clear_existing': self.clear_existing,
+            'backup_version': self.backup_version,
+            'current_table': self.current_table,
+            'progress': self.progress,
+            'processed_rows': self.processed_rows,
+            'inserted_rows': self.inserted_rows,
+            'skipped_rows': self.skipped_rows,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class SeedVersion(db.Model):
+    """Hash of the seed data last applied by seeds.py"""
+
+    name = db.Column(db.String(50), primary_key=True)
+    version_hash = db.Column(db.String(64), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SeedVersion {self.name} {self.version_hash[:12]}>'
+
+
+class ChangeEvent(db.Model):
+    """Outbox row for the change feed (change_feed.py, /api/changes); id is the cursor"""
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    player_id = db.Column(db.Integer, nullable=True)  # no foreign key: events outlive deleted players
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'player_id': self.player_id,
+            'data': json.loads(self.payload or '{}'),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    @classmethod
+    def make(cls, kind, player_id=None, **data):
+        return cls(kind=kind, player_id=player_id, payload=json.dumps(data, ensure_ascii=False))
+
+    @classmethod
+    def since(cls, cursor, kinds=None, limit=100):
+        """Events after the cursor, oldest first"""
+        query = cls.query.filter(cls.id > cursor)
+        if kinds:
+            query = query.filter(cls.kind.in_(kinds))
+        return query.order_by(cls.id).limit(limit).all()
+
+    @classmethod
+    def latest_id(cls):
+        return db.session.query(func.max(cls.id)).scalar() or 0
+
+    @classmethod
+    def prune(cls, days):
+        """Delete events older than the given number of days; returns the row count"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        deleted = cls.query.filter(cls.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
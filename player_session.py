@@ -0,0 +1,42 @@
+"""
+Current player for the request
+
+The session stores the logged-in player's id; the player row is loaded at most
+once per request (primary-key lookup) and kept on flask.g for the context
+processor and the views.
+"""
+
+from flask import g, session
+
+from app import db
+from models import Player
+
+def get_current_player():
+    """The logged-in player, or None"""
+    if 'current_player' not in g:
+        player_id = session.get('player_id')
+        player = None
+        if player_id is not None:
+            player = db.session.get(Player, player_id)
+        elif session.get('player_nickname'):
+            # Sessions issued before player_id was stored
+            player = Player.query.filter_by(nickname=session.pop('player_nickname')).first()
+            if player:
+                session['player_id'] = player.id
+
+        if player is None:
+            session.pop('player_id', None)
+        g.current_player = player
+    return g.current_player
+
+def login_player(player):
+    """Remember the player in the session"""
+    session.pop('player_nickname', None)
+    session['player_id'] = player.id
+    g.current_player = player
+
+def logout_player():
+    """Forget the logged-in player"""
+    session.pop('player_id', None)
+    session.pop('player_nickname', None)
+    g.pop('current_player', None)
@@ -0,0 +1,184 @@
+"""
+Response and fragment cache for anonymous page views
+
+Pages decorated with @cached_page are rendered once per (path, query,
+language) for visitors without a player or admin session and served from
+memory afterwards, with an ETag / Last-Modified so browsers and a reverse
+proxy can revalidate with a 304. Templates can cache a heavy block for
+everyone (logged-in visitors included) with
+
+    {% call cache_fragment('leaderboard', current_sort, is_admin) %}...{% endcall %}
+
+Entries are tagged with the tables they were built from; committing a write to
+one of those tables drops them. The cache is per process, so RESPONSE_CACHE_TTL
+bounds how long another worker can serve a page that predates a write.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 512))
+
+# Everything drawn next to a player's name: titles, badges, roles, gradients, ASCEND tier
+PLAYER_TAGS = (
+    'player', 'player_title', 'custom_title', 'player_badge', 'badge',
+    'player_admin_role', 'admin_custom_role', 'player_gradient_setting',
+    'gradient_theme', 'ascend_data'
+)
+PROFILE_TAGS = PLAYER_TAGS + (
+    'player_achievement', 'achievement', 'player_quest', 'quest',
+    'clan', 'clan_member', 'ascend_history', 'reputation_log'
+)
+CLAN_TAGS = ('clan', 'clan_member', 'player')
+TOURNAMENT_TAGS = ('tournament', 'tournament_participant', 'player')
+
+class ResponseCache:
+    """Thread-safe LRU of rendered bodies with per-entry tags and expiry"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires_at'] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body, tags, ttl, mimetype=None):
+        entry = {
+            'body': body,
+            'mimetype': mimetype,
+            'tags': frozenset(tags),
+            'etag': hashlib.sha1(body.encode() if isinstance(body, str) else body).hexdigest(),
+            'last_modified': datetime.now(timezone.utc).replace(microsecond=0),
+            'expires_at': time.monotonic() + ttl
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, tags):
+        """Drop every entry built from one of the tags"""
+        tags = set(tags)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry['tags'] & tags]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+response_cache = ResponseCache()
+
+def is_anonymous_request():
+    """No player/admin session and nothing flashed: every such visitor sees the same page"""
+    return not (session.get('is_admin') or session.get('player_id')
+                or session.get('player_nickname') or session.get('_flashes'))
+
+def _request_key(kind):
+    return (kind, request.path, tuple(sorted(request.args.items(multi=True))),
+            session.get('language', 'ru'))
+
+def _conditional_response(entry, cache_status):
+    response = make_response(entry['body'])
+    if entry['mimetype']:
+        response.mimetype = entry['mimetype']
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    response.cache_control.public = True
+    response.cache_control.no_cache = True  # revalidate with the ETag before reuse
+    response.vary.add('Cookie')
+    response.headers['X-Cache'] = cache_status
+    return response.make_conditional(request)
+
+def cached_page(*tags, ttl=None):
+    """Cache a GET view's 200 response for anonymous visitors, tagged with the tables it reads"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or not is_anonymous_request():
+                return f(*args, **kwargs)
+
+            key = _request_key('page')
+            entry = response_cache.get(key)
+            if entry is not None:
+                return _conditional_response(entry, 'HIT')
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            entry = response_cache.set(key, response.get_data(as_text=True), tags,
+                                       RESPONSE_CACHE_TTL if ttl is None else ttl,
+                                       response.mimetype)
+            return _conditional_response(entry, 'MISS')
+        return decorated_function
+    return decorator
+
+def cache_fragment(name, *key, tags=PLAYER_TAGS, ttl=None, caller=None):
+    """Jinja {% call %} helper: render the block once per key and language"""
+    cache_key = ('fragment', name, key, session.get('language', 'ru'))
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        entry = response_cache.set(cache_key, str(caller()), tags,
+                                   RESPONSE_CACHE_TTL if ttl is None else ttl)
+    return Markup(entry['body'])
+
+def register_response_cache(app):
+    """Expose cache_fragment to templates"""
+    app.add_template_global(cache_fragment, 'cache_fragment')
+
+# Tag invalidation: collect the tables written in a transaction, drop their entries on commit
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(db_session, flush_context):
+    tables = db_session.info.setdefault('written_tables', set())
+    for instance in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted):
+        table = getattr(instance, '__tablename__', None)
+        if table:
+            tables.add(table)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_statement_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault('written_tables', set()).add(table.name)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_written_tables(db_session):
+    tables = db_session.info.pop('written_tables', None)
+    if tables:
+        response_cache.invalidate(tables)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_written_tables(db_session):
+    db_session.info.pop('written_tables', None)
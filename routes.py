@@ -1,16 +1,18 @@
-from flask import render_template, request, redirect, url_for, flash, session, jsonify, make_response
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, make_response, Response, stream_with_context
 from app import app, db
-from models import Player, Quest, PlayerQuest, Achievement, PlayerAchievement, CustomTitle, PlayerTitle, GradientTheme, PlayerGradientSetting, SiteTheme, ShopItem, ShopPurchase, Clan, ClanMember, Tournament, TournamentParticipant, PlayerActiveBooster, AdminCustomRole, PlayerAdminRole, Badge, PlayerBadge, ReputationLog, ASCENDData
+from db_routing import replica_safe
+from assets import EMOJI_DIR, store_emoji
+from response_cache import cached_page, PLAYER_TAGS, PROFILE_TAGS, CLAN_TAGS, TOURNAMENT_TAGS
+from player_session import get_current_player, login_player, logout_player
+from models import Player, Quest, PlayerQuest, Achievement, PlayerAchievement, CustomTitle, PlayerTitle, GradientTheme, PlayerGradientSetting, SiteTheme, ShopItem, ShopPurchase, Clan, ClanMember, Tournament, TournamentParticipant, PlayerActiveBooster, AdminCustomRole, PlayerAdminRole, Badge, PlayerBadge, ReputationLog, ASCENDData, DatabaseImportJob
 import os
 import csv
 import io
+import tempfile
+import zlib
 from datetime import datetime, date
 import json
 
-# Import routes first
-import routes
-import api_routes
-
 # Admin password
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
 
@@ -29,18 +31,18 @@ def admin_required(f):
 @app.context_processor
 def inject_current_player():
     """Inject current player data into all templates"""
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
+    current_theme = SiteTheme.get_theme(current_player.selected_theme_id) if current_player else None
 
     # Set default language if not set
     if 'language' not in session:
         session['language'] = 'ru'
 
-    return dict(current_player=current_player, current_language=session.get('language', 'ru'))
+    return dict(current_player=current_player, current_theme=current_theme, current_language=session.get('language', 'ru'))
 
 @app.route('/')
+@replica_safe
+@cached_page(*PLAYER_TAGS)
 def index():
     """Display the enhanced leaderboard"""
     sort_by = request.args.get('sort', 'experience')
@@ -57,25 +59,6 @@ def index():
     is_admin = session.get('is_admin', False)
     stats = Player.get_statistics()
 
-    # Initialize theme in session if not set
-    if 'current_theme' not in session:
-        player_nickname = session.get('player_nickname')
-        if player_nickname:
-            player = Player.query.filter_by(nickname=player_nickname).first()
-            if player and player.selected_theme:
-                theme = player.selected_theme
-                session['current_theme'] = {
-                    'id': theme.id,
-                    'name': theme.name,
-                    'display_name': theme.display_name,
-                    'primary_color': theme.primary_color,
-                    'secondary_color': theme.secondary_color,
-                    'background_color': theme.background_color,
-                    'card_background': theme.card_background,
-                    'text_color': theme.text_color,
-                    'accent_color': theme.accent_color
-                }
-
     return render_template('index.html',
                          players=players,
                          current_sort=sort_by,
@@ -85,17 +68,16 @@ def index():
                          limit=limit)
 
 @app.route('/player/<int:player_id>')
+@replica_safe
 def player_profile(player_id):
     """Display detailed player profile (admin view)"""
     player = Player.query.get_or_404(player_id)
     is_admin = session.get('is_admin', False)
-    current_player = None
 
     # Check if current user is the player owner
-    player_nickname = session.get('player_nickname')
+    current_player = get_current_player()
     is_owner = False
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    if current_player:
         is_owner = current_player and current_player.id == player.id
 
     # Get player's badges
@@ -118,11 +100,11 @@ def player_profile(player_id):
                 'is_animated': badge.is_animated
             })
 
-    # Get player skill rating
+    # Get player skill rating (read-only: a GET never creates one, it may be served by the replica)
     skill_rating = None
     try:
         from models import PlayerSkillRating
-        skill_rating = PlayerSkillRating.get_or_create_rating(player.id)
+        skill_rating = PlayerSkillRating.query.filter_by(player_id=player.id).first()
     except Exception as e:
         app.logger.error(f"Error getting skill rating: {e}")
 
@@ -134,10 +116,11 @@ def player_profile(player_id):
                          skill_rating=skill_rating)
 
 @app.route('/public/<int:player_id>')
+@replica_safe
+@cached_page(*PROFILE_TAGS)
 def public_profile(player_id):
     """Display public player profile (read-only view)"""
     player = Player.query.get_or_404(player_id)
-    current_player = None
 
     # Check if profile is public
     if not player.profile_is_public:
@@ -145,10 +128,9 @@ def public_profile(player_id):
         return redirect(url_for('index'))
 
     # Check if current user is the player owner
-    player_nickname = session.get('player_nickname')
+    current_player = get_current_player()
     is_owner = False
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    if current_player:
         is_owner = current_player and current_player.id == player.id
 
     # Get player's visible badges
@@ -183,6 +165,7 @@ def compare_players():
     return render_template('compare.html', players=players)
 
 @app.route('/api/compare/<int:player1_id>/<int:player2_id>')
+@replica_safe
 def api_compare_players(player1_id, player2_id):
     """API endpoint for player comparison"""
     try:
@@ -233,6 +216,8 @@ def api_compare_players(player1_id, player2_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/statistics')
+@replica_safe
+@cached_page(*PLAYER_TAGS)
 def statistics():
     """Display detailed statistics page"""
     stats = Player.get_statistics()
@@ -290,58 +275,17 @@ def logout():
 def themes():
     """Theme selection page"""
     try:
-        # Initialize default themes if none exist
-        try:
-            if SiteTheme.query.count() == 0:
-                SiteTheme.create_default_themes()
-        except Exception as e:
-            app.logger.error(f"Error checking/creating themes: {e}")
-            # Create minimal default theme
-            try:
-                db.create_all()
-                default_theme = SiteTheme(
-                    name='default_dark',
-                    display_name='Классическая тёмная',
-                    description='Элегантная тёмная тема с золотыми акцентами',
-                    primary_color='#ffc107',
-                    secondary_color='#6c757d',
-                    background_color='#0d1117',
-                    card_background='#161b22',
-                    text_color='#f0f6fc',
-                    accent_color='#28a745',
-                    is_default=True
-                )
-                db.session.add(default_theme)
-                db.session.commit()
-            except Exception as create_error:
-                app.logger.error(f"Failed to create default theme: {create_error}")
-
         try:
-            themes = SiteTheme.query.filter_by(is_active=True).all()
+            themes = [theme for theme in SiteTheme.get_theme_map().values() if theme['is_active']]
         except Exception as e:
             app.logger.error(f"Error querying themes: {e}")
             themes = []
 
-        current_theme = None
-
-        # Get current player's theme if logged in
-        player_nickname = session.get('player_nickname')
-        if player_nickname:
-            try:
-                player = Player.query.filter_by(nickname=player_nickname).first()
-                if player and player.selected_theme:
-                    current_theme = player.selected_theme
-            except Exception as e:
-                app.logger.error(f"Error getting player theme: {e}")
-
-        # If no current theme, get default
+        # Current player's theme if logged in, else the default
+        player = get_current_player()
+        current_theme = SiteTheme.get_theme(player.selected_theme_id) if player else None
         if not current_theme:
-            try:
-                current_theme = SiteTheme.query.filter_by(is_default=True).first()
-                if not current_theme and themes:
-                    current_theme = themes[0]
-            except Exception as e:
-                app.logger.error(f"Error getting default theme: {e}")
+            current_theme = SiteTheme.get_default_theme()
 
         return render_template('themes.html',
                              themes=themes,
@@ -355,32 +299,21 @@ def themes():
 @app.route('/select-theme/<int:theme_id>', methods=['POST'])
 def select_theme(theme_id):
     """Select a theme for current player"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему для выбора темы!', 'error')
         return redirect(url_for('player_login'))
 
     try:
-        player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-        theme = SiteTheme.query.get_or_404(theme_id)
+        theme = SiteTheme.get_theme(theme_id)
+        if not theme:
+            flash('Тема не найдена!', 'error')
+            return redirect(url_for('themes'))
 
         player.selected_theme_id = theme_id
         db.session.commit()
 
-        # Store theme in session for immediate application
-        session['current_theme'] = {
-            'id': theme.id,
-            'name': theme.name,
-            'display_name': theme.display_name,
-            'primary_color': theme.primary_color,
-            'secondary_color': theme.secondary_color,
-            'background_color': theme.background_color,
-            'card_background': theme.card_background,
-            'text_color': theme.text_color,
-            'accent_color': theme.accent_color
-        }
-
-        flash(f'Тема "{theme.display_name}" выбрана!', 'success')
+        flash(f'Тема "{theme["display_name"]}" выбрана!', 'success')
 
     except Exception as e:
         app.logger.error(f"Error selecting theme: {e}")
@@ -404,7 +337,7 @@ def player_login():
                         import hashlib
                         password_hash = hashlib.sha256(password.encode()).hexdigest()
                         if player.password_hash == password_hash:
-                            session['player_nickname'] = nickname
+                            login_player(player)
                             flash(f'Добро пожаловать, {nickname}!', 'success')
                             return redirect(url_for('quests'))
                         else:
@@ -419,7 +352,7 @@ def player_login():
                         player.password_hash = password_hash
                         player.has_password = True
                         db.session.commit()
-                        session['player_nickname'] = nickname
+                        login_player(player)
                         flash(f'Пароль установлен! Добро пожаловать, {nickname}!', 'success')
                         return redirect(url_for('quests'))
                     else:
@@ -434,13 +367,11 @@ def player_login():
 @app.route('/my_profile')
 def my_profile():
     """Current player's profile page"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     # Get player's badges
     player_badges = PlayerBadge.query.filter_by(player_id=player.id, is_visible=True).all()
     badges_data = []
@@ -469,8 +400,9 @@ def my_profile():
 @app.route('/player_logout')
 def player_logout():
     """Player logout"""
-    player_name = session.get('player_nickname', '')
-    session.pop('player_nickname', None)
+    player = get_current_player()
+    player_name = player.nickname if player else ''
+    logout_player()
     flash(f'До свидания, {player_name}!', 'success')
     return redirect(url_for('index'))
 
@@ -795,14 +727,75 @@ def clear_leaderboard():
 
     return redirect(url_for('admin'))
 
+# Streaming CSV export settings
+EXPORT_BATCH_SIZE = 1000
+EXPORT_SORT_FIELDS = {
+    'experience', 'kills', 'final_kills', 'deaths', 'beds_broken', 'wins', 'games_played',
+    'coins', 'reputation', 'karma', 'nickname', 'created_at', 'last_updated'
+}
+EXPORT_COLUMNS = (
+    'nickname', 'experience', 'kills', 'final_kills', 'deaths', 'final_deaths', 'beds_broken',
+    'games_played', 'wins', 'role', 'server_ip', 'iron_collected', 'gold_collected',
+    'diamond_collected', 'emerald_collected', 'items_purchased', 'created_at', 'last_updated'
+)
+
+def _export_rows(rows):
+    """Convert a batch of projected player rows into CSV rows"""
+    for row in rows:
+        yield [
+            row.nickname, Player.level_for_experience(row.experience), row.experience,
+            row.kills, row.final_kills, row.deaths,
+            Player.ratio(row.kills, row.deaths), Player.ratio(row.final_kills, row.final_deaths),
+            row.beds_broken, row.games_played, row.wins, Player.win_rate_for(row.wins, row.games_played),
+            row.role, row.server_ip, row.iron_collected,
+            row.gold_collected, row.diamond_collected,
+            row.emerald_collected, row.items_purchased,
+            row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else '',
+            row.last_updated.strftime('%Y-%m-%d %H:%M:%S') if row.last_updated else ''
+        ]
+
 @app.route('/export')
 def export_leaderboard():
-    """Export leaderboard data as CSV"""
+    """Export leaderboard data as a streamed CSV (optionally gzip-compressed)
+
+    Query parameters: sort, order (asc/desc), search, role, min_experience, gzip=1.
+    """
     try:
-        players = Player.query.order_by(Player.experience.desc()).all()
+        sort_by = request.args.get('sort', 'experience')
+        if sort_by not in EXPORT_SORT_FIELDS:
+            sort_by = 'experience'
+        sort_column = getattr(Player, sort_by)
+        sort_column = sort_column.asc() if request.args.get('order') == 'asc' else sort_column.desc()
+
+        stmt = db.select(*[getattr(Player, column) for column in EXPORT_COLUMNS])
+
+        search = request.args.get('search', '').strip()[:50]
+        if search:
+            stmt = stmt.where(Player.nickname.ilike(f'%{search}%'))
+        role = request.args.get('role', '').strip()
+        if role:
+            stmt = stmt.where(Player.role == role)
+        min_experience = request.args.get('min_experience', type=int)
+        if min_experience:
+            stmt = stmt.where(Player.experience >= min_experience)
+
+        stmt = stmt.order_by(sort_column, Player.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        use_gzip = request.args.get('gzip') == '1'
+    except Exception as e:
+        app.logger.error(f"Error exporting data: {e}")
+        flash('Произошла ошибка при экспорте данных!', 'error')
+        return redirect(url_for('index'))
 
+    def generate():
         output = io.StringIO()
         writer = csv.writer(output)
+        compressor = zlib.compressobj(wbits=31) if use_gzip else None
+
+        def flush():
+            chunk = output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate(0)
+            return compressor.compress(chunk) if compressor else chunk
 
         # Header
         writer.writerow([
@@ -811,336 +804,128 @@ def export_leaderboard():
             'Роль', 'Сервер', 'Железо', 'Золото', 'Алмазы', 'Изумруды',
             'Покупки', 'Дата создания', 'Последнее обновление'
         ])
+        yield flush()
 
-        # Data
-        for player in players:
-            writer.writerow([
-                player.nickname, player.level, player.experience,
-                player.kills, player.final_kills, player.deaths,
-                player.kd_ratio, player.fkd_ratio, player.beds_broken,
-                player.games_played, player.wins, player.win_rate,
-                player.role, player.server_ip, player.iron_collected,
-                player.gold_collected, player.diamond_collected,
-                player.emerald_collected, player.items_purchased,
-                player.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                player.last_updated.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-        output.seek(0)
-
-        response = make_response(output.getvalue())
-        response.headers['Content-Type'] = 'text/csv'
-        response.headers['Content-Disposition'] = f'attachment; filename=bedwars_leaderboard_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-
-        return response
+        # Data, one server-side batch at a time
+        try:
+            result = db.session.execute(stmt)
+            for rows in result.partitions():
+                writer.writerows(_export_rows(rows))
+                yield flush()
+        except Exception as e:
+            app.logger.error(f"Error exporting data: {e}")
+            # Mark the file as incomplete and abort the stream: no gzip trailer, no clean end
+            writer.writerow(['ОШИБКА ЭКСПОРТА: файл неполный'])
+            yield flush()
+            raise
 
-    except Exception as e:
-        app.logger.error(f"Error exporting data: {e}")
-        flash('Произошла ошибка при экспорте данных!', 'error')
-        return redirect(url_for('index'))
+        if compressor:
+            yield compressor.flush()
+
+    filename = f'bedwars_leaderboard_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    if use_gzip:
+        filename += '.gz'
+
+    response = Response(stream_with_context(generate()),
+                        mimetype='application/gzip' if use_gzip else 'text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
 
 @app.route('/admin/export-db')
 def export_database():
-    """Export full database as JSON (admin only)"""
+    """Export full database as a streamed NDJSON backup (admin only)"""
     if not session.get('is_admin', False):
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
-    try:
-        import json
-
-        # Export all data
-        data = {
-            'players': [],
-            'quests': [],
-            'achievements': [],
-            'custom_titles': [],
-            'gradient_themes': [],
-            'player_quests': [],
-            'player_achievements': [],
-            'player_titles': [],
-            'player_gradient_settings': [],
-            'shop_items': [],
-            'shop_purchases': []
-        }
-
-        # Export players
-        for player in Player.query.all():
-            player_data = {
-                'nickname': player.nickname,
-                'kills': player.kills,
-                'final_kills': player.final_kills,
-                'deaths': player.deaths,
-                'beds_broken': player.beds_broken,
-                'games_played': player.games_played,
-                'wins': player.wins,
-                'experience': player.experience,
-                'role': player.role,
-                'server_ip': player.server_ip,
-                'iron_collected': player.iron_collected,
-                'gold_collected': player.gold_collected,
-                'diamond_collected': player.diamond_collected,
-                'emerald_collected': player.emerald_collected,
-                'items_purchased': player.items_purchased,
-                'skin_url': player.skin_url,
-                'skin_type': player.skin_type,
-                'is_premium': player.is_premium,
-                'real_name': player.real_name,
-                'bio': player.bio,
-                'discord_tag': player.discord_tag,
-                'youtube_channel': player.youtube_channel,
-                'twitch_channel': player.twitch_channel,
-                'favorite_server': player.favorite_server,
-                'favorite_map': player.favorite_map,
-                'preferred_gamemode': player.preferred_gamemode,
-                'profile_banner_color': player.profile_banner_color,
-                'profile_is_public': player.profile_is_public,
-                'custom_status': player.custom_status,
-                'location': player.location,
-                'birthday': player.birthday.isoformat() if player.birthday else None,
-                'custom_avatar_url': player.custom_avatar_url,
-                'custom_banner_url': player.custom_banner_url,
-                'banner_is_animated': player.banner_is_animated,
-                'social_networks': player.social_networks,
-                'stats_section_color': player.stats_section_color,
-                'info_section_color': player.info_section_color,
-                'social_section_color': player.social_section_color,
-                'prefs_section_color': player.prefs_section_color,
-                'password_hash': player.password_hash,
-                'has_password': player.has_password,
-                'leaderboard_name_color': player.leaderboard_name_color,
-                'leaderboard_stats_color': player.leaderboard_stats_color,
-                'leaderboard_use_gradient': player.leaderboard_use_gradient,
-                'leaderboard_gradient_start': player.leaderboard_gradient_start,
-                'leaderboard_gradient_end': player.leaderboard_gradient_end,
-                'leaderboard_gradient_animated': player.leaderboard_gradient_animated,
-                'created_at': player.created_at.isoformat(),
-                'last_updated': player.last_updated.isoformat(),
-                'karma': player.karma # Include karma here
-            }
-            data['players'].append(player_data)
-
-        # Export other tables (simplified)
-        for quest in Quest.query.all():
-            data['quests'].append({
-                'title': quest.title,
-                'description': quest.description,
-                'type': quest.type,
-                'target_value': quest.target_value,
-                'reward_xp': quest.reward_xp,
-                'reward_title': quest.reward_title,
-                'icon': quest.icon,
-                'difficulty': quest.difficulty,
-                'is_active': quest.is_active
-            })
-
-        for achievement in Achievement.query.all():
-            data['achievements'].append({
-                'title': achievement.title,
-                'description': achievement.description,
-                'icon': achievement.icon,
-                'rarity': achievement.rarity,
-                'unlock_condition': achievement.unlock_condition,
-                'reward_xp': achievement.reward_xp,
-                'reward_title': achievement.reward_title,
-                'is_hidden': achievement.is_hidden
-            })
+    from backup import generate_backup, gzip_stream
 
-        for shop_item in ShopItem.query.all():
-            data['shop_items'].append({
-                'name': shop_item.name,
-                'display_name': shop_item.display_name,
-                'description': shop_item.description,
-                'category': shop_item.category,
-                'price_coins': shop_item.price_coins,
-                'price_reputation': shop_item.price_reputation,
-                'unlock_level': shop_item.unlock_level,
-                'rarity': shop_item.rarity,
-                'icon': shop_item.icon,
-                'item_data': shop_item.item_data,
-                'is_limited_time': shop_item.is_limited_time,
-                'is_active': shop_item.is_active
-            })
+    use_gzip = request.args.get('gzip', '1') != '0'
+    chunks = generate_backup()
+    if use_gzip:
+        chunks = gzip_stream(chunks)
 
-        # Create JSON file
-        json_output = json.dumps(data, ensure_ascii=False, indent=2, default=str)
+    filename = f'bedwars_database_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.ndjson'
+    if use_gzip:
+        filename += '.gz'
 
-        response = make_response(json_output)
-        response.headers['Content-Type'] = 'application/json'
-        response.headers['Content-Disposition'] = f'attachment; filename=bedwars_database_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    response = Response(stream_with_context(chunks),
+                        mimetype='application/gzip' if use_gzip else 'application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
 
-        return response
-
-    except Exception as e:
-        app.logger.error(f"Error exporting database: {e}")
-        flash('Произошла ошибка при экспорте базы данных!', 'error')
-        return redirect(url_for('admin'))
+IMPORT_EXTENSIONS = ('.json', '.ndjson', '.json.gz', '.ndjson.gz')
 
 @app.route('/admin/import-db', methods=['GET', 'POST'])
 def import_database():
-    """Import database from JSON file (admin only)"""
+    """Import a database backup in a background job (admin only)"""
     if not session.get('is_admin', False):
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
     if request.method == 'POST':
-        try:
-            import json
-            from datetime import datetime, date
-
-            if 'database_file' not in request.files:
-                flash('Файл не выбран!', 'error')
-                return redirect(url_for('import_database'))
-
-            file = request.files['database_file']
-            if file.filename == '':
-                flash('Файл не выбран!', 'error')
-                return redirect(url_for('import_database'))
-
-            if not file.filename.endswith('.json'):
-                flash('Неверный формат файла! Требуется JSON.', 'error')
-                return redirect(url_for('import_database'))
-
-            # Read and parse JSON
-            content = file.read().decode('utf-8')
-            data = json.loads(content)
-
-            # Clear existing data (optional - ask user)
-            clear_existing = request.form.get('clear_existing') == 'on'
-            if clear_existing:
-                # Clear all tables
-                ShopPurchase.query.delete()
-                ShopItem.query.delete()
-                PlayerGradientSetting.query.delete()
-                PlayerTitle.query.delete()
-                PlayerAchievement.query.delete()
-                PlayerQuest.query.delete()
-                GradientTheme.query.delete()
-                CustomTitle.query.delete()
-                Achievement.query.delete()
-                Quest.query.delete()
-                Player.query.delete()
-                db.session.commit()
+        if 'database_file' not in request.files:
+            flash('Файл не выбран!', 'error')
+            return redirect(url_for('import_database'))
 
-            # Import players
-            for player_data in data.get('players', []):
-                existing = Player.query.filter_by(nickname=player_data['nickname']).first()
-                if not existing:
-                    player = Player(
-                        nickname=player_data['nickname'],
-                        kills=player_data.get('kills', 0),
-                        final_kills=player_data.get('final_kills', 0),
-                        deaths=player_data.get('deaths', 0),
-                        beds_broken=player_data.get('beds_broken', 0),
-                        games_played=player_data.get('games_played', 0),
-                        wins=player_data.get('wins', 0),
-                        experience=player_data.get('experience', 0),
-                        role=player_data.get('role', 'Игрок'),
-                        server_ip=player_data.get('server_ip', ''),
-                        iron_collected=player_data.get('iron_collected', 0),
-                        gold_collected=player_data.get('gold_collected', 0),
-                        diamond_collected=player_data.get('diamond_collected', 0),
-                        emerald_collected=player_data.get('emerald_collected', 0),
-                        items_purchased=player_data.get('items_purchased', 0),
-                        skin_url=player_data.get('skin_url'),
-                        skin_type=player_data.get('skin_type', 'auto'),
-                        is_premium=player_data.get('is_premium', False),
-                        real_name=player_data.get('real_name'),
-                        bio=player_data.get('bio'),
-                        discord_tag=player_data.get('discord_tag'),
-                        youtube_channel=player_data.get('youtube_channel'),
-                        twitch_channel=player_data.get('twitch_channel'),
-                        favorite_server=player_data.get('favorite_server'),
-                        favorite_map=player_data.get('favorite_map'),
-                        preferred_gamemode=player_data.get('preferred_gamemode'),
-                        profile_banner_color=player_data.get('profile_banner_color', '#3498db'),
-                        profile_is_public=player_data.get('profile_is_public', True),
-                        custom_status=player_data.get('custom_status'),
-                        location=player_data.get('location'),
-                        custom_avatar_url=player_data.get('custom_avatar_url'),
-                        custom_banner_url=player_data.get('custom_banner_url'),
-                        banner_is_animated=player_data.get('banner_is_animated', False),
-                        social_networks=player_data.get('social_networks'),
-                        stats_section_color=player_data.get('stats_section_color', '#343a40'),
-                        info_section_color=player_data.get('info_section_color', '#343a40'),
-                        social_section_color=player_data.get('social_section_color', '#343a40'),
-                        prefs_section_color=player_data.get('prefs_section_color', '#343a40'),
-                        password_hash=player_data.get('password_hash'),
-                        has_password=player_data.get('has_password', False),
-                        leaderboard_name_color=player_data.get('leaderboard_name_color', '#ffffff'),
-                        leaderboard_stats_color=player_data.get('leaderboard_stats_color', '#ffffff'),
-                        leaderboard_use_gradient=player_data.get('leaderboard_use_gradient', False),
-                        leaderboard_gradient_start=player_data.get('leaderboard_gradient_start', '#ff6b35'),
-                        leaderboard_gradient_end=player_data.get('leaderboard_gradient_end', '#f7931e'),
-                        leaderboard_gradient_animated=player_data.get('leaderboard_gradient_animated', False),
-                        karma=player_data.get('karma', 0) # Add karma here
-                    )
-
-                    # Handle birthday
-                    if player_data.get('birthday'):
-                        try:
-                            player.birthday = datetime.fromisoformat(player_data['birthday']).date()
-                        except:
-                            pass
-
-                    # Handle timestamps
-                    if player_data.get('created_at'):
-                        try:
-                            player.created_at = datetime.fromisoformat(player_data['created_at'])
-                        except:
-                            pass
-
-                    if player_data.get('last_updated'):
-                        try:
-                            player.last_updated = datetime.fromisoformat(player_data['last_updated'])
-                        except:
-                            pass
-
-                    db.session.add(player)
-
-            # Import quests
-            for quest_data in data.get('quests', []):
-                existing = Quest.query.filter_by(title=quest_data['title']).first()
-                if not existing:
-                    quest = Quest(**quest_data)
-                    db.session.add(quest)
-
-            # Import achievements
-            for achievement_data in data.get('achievements', []):
-                existing = Achievement.query.filter_by(title=achievement_data['title']).first()
-                if not existing:
-                    achievement = Achievement(**achievement_data)
-                    db.session.add(achievement)
-
-            # Import shop items
-            for item_data in data.get('shop_items', []):
-                existing = ShopItem.query.filter_by(name=item_data['name']).first()
-                if not existing:
-                    shop_item = ShopItem(**item_data)
-                    db.session.add(shop_item)
+        file = request.files['database_file']
+        if file.filename == '':
+            flash('Файл не выбран!', 'error')
+            return redirect(url_for('import_database'))
 
+        if not file.filename.endswith(IMPORT_EXTENSIONS):
+            flash('Неверный формат файла! Требуется JSON или NDJSON резервная копия.', 'error')
+            return redirect(url_for('import_database'))
 
+        try:
+            from backup import start_import_job
+
+            # Spool the upload to disk; the job streams it from there
+            fd, path = tempfile.mkstemp(prefix='import-db-', suffix=os.path.basename(file.filename))
+            os.close(fd)
+            file.save(path)
+
+            job = DatabaseImportJob(
+                filename=file.filename,
+                clear_existing=request.form.get('clear_existing') == 'on',
+                bytes_total=os.path.getsize(path)
+            )
+            db.session.add(job)
             db.session.commit()
-            # Очистка кэша статистики
-            Player.clear_statistics_cache()
-            flash('База данных успешно импортирована!', 'success')
+
+            start_import_job(job, path)
+            flash('Импорт запущен. Прогресс отображается ниже.', 'info')
+            return redirect(url_for('import_database', job=job.id))
 
         except Exception as e:
             db.session.rollback()
             app.logger.error(f"Error importing database: {e}")
             flash(f'Ошибка при импорте базы данных: {e}', 'error')
+            return redirect(url_for('import_database'))
 
-        return redirect(url_for('admin'))
+    job_id = request.args.get('job', type=int)
+    if job_id:
+        job = db.session.get(DatabaseImportJob, job_id)
+    else:
+        job = DatabaseImportJob.query.order_by(DatabaseImportJob.created_at.desc()).first()
+    if job and job.expire_if_stale():
+        db.session.commit()
 
-    return render_template('admin_import_db.html')
+    return render_template('admin_import_db.html', job=job)
 
-# Helper function to get current player, used in some routes
-def get_current_player():
-    """Helper function to get the current logged-in player"""
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        return Player.query.filter_by(nickname=player_nickname).first()
-    return None
+@app.route('/admin/import-db/status/<int:job_id>')
+def import_database_status(job_id):
+    """Progress of a database import job for polling (admin only)"""
+    if not session.get('is_admin', False):
+        return jsonify({'success': False, 'error': 'Доступ запрещен'}), 403
+
+    job = db.session.get(DatabaseImportJob, job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Задача импорта не найдена'}), 404
+    if job.expire_if_stale():
+        db.session.commit()
+
+    return jsonify({'success': True, 'job': job.to_dict()})
 
 @app.route('/admin/modify-stats', methods=['POST'])
 def admin_modify_stats():
@@ -1214,17 +999,14 @@ def admin_modify_stats():
 @app.route('/quests')
 def quests():
     """Display quest system with categories"""
-    player_nickname = session.get('player_nickname')
-    current_player = None
+    current_player = get_current_player()
     player_progress = {}
 
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
-        if current_player:
-            # Get player quest progress
-            player_quests = PlayerQuest.query.filter_by(player_id=current_player.id).all()
-            for pq in player_quests:
-                player_progress[pq.quest_id] = pq
+    if current_player:
+        # Get player quest progress
+        player_quests = PlayerQuest.query.filter_by(player_id=current_player.id).all()
+        for pq in player_quests:
+            player_progress[pq.quest_id] = pq
 
     # Refresh timed quests
     Quest.refresh_timed_quests()
@@ -1252,19 +1034,13 @@ def quests():
                          is_admin=is_admin)
 
 @app.route('/achievements')
+@replica_safe
 def achievements():
     """Display achievements page"""
     is_admin = session.get('is_admin', False)
-    current_player = None
 
     # Check if player is logged in
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
-
-    # Initialize default achievements if none exist
-    if Achievement.query.count() == 0:
-        Achievement.create_default_achievements()
+    current_player = get_current_player()
 
     all_achievements = Achievement.query.all()
 
@@ -1289,13 +1065,12 @@ def achievements():
 @app.route('/quest/<int:quest_id>/accept', methods=['POST'])
 def accept_quest(quest_id):
     """Accept a quest (player must be logged in)"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему для принятия квестов!', 'error')
         return redirect(url_for('player_login'))
 
     try:
-        player = Player.query.filter_by(nickname=player_nickname).first_or_404()
         quest = Quest.query.get_or_404(quest_id)
 
         # Check if quest already accepted
@@ -1429,8 +1204,9 @@ def init_demo():
         return redirect(url_for('login'))
 
     try:
-        # Force recreate achievements to ensure mythic ones exist
-        Achievement.create_default_achievements()
+        # Make sure the default catalog (quests, achievements, titles, themes, shop items, game modes) exists
+        from seeds import apply_seeds
+        apply_seeds(force=True)
 
         # Create demo players if they don't exist
         demo_players = [
@@ -1489,23 +1265,11 @@ def init_demo():
             if not existing:
                 Player.add_player(**player_data)
 
-        # Initialize quests and achievements
-        Quest.create_default_quests()
-        Achievement.create_default_achievements()
-        CustomTitle.create_default_titles()
-        GradientTheme.create_default_themes()
-        ShopItem.create_default_items() # Initialize default shop items
-
         # Initialize achievement tracking for existing players
         players = Player.query.all()
         for player in players:
             Achievement.initialize_player_achievement_tracking(player)
 
-        # Initialize game modes for ASCEND system
-        from models import GameMode
-        if GameMode.query.count() == 0:
-            GameMode.create_default_modes()
-
         # Update quest progress for all players
         for player in players:
             PlayerQuest.update_player_quest_progress(player)
@@ -1754,16 +1518,9 @@ def remove_all_titles():
 def shop():
     """Shop page for purchasing items"""
     is_admin = session.get('is_admin', False)
-    current_player = None
 
     # Check if player is logged in
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
-
-    # Initialize default shop items if none exist
-    if ShopItem.query.count() == 0:
-        ShopItem.create_default_items()
+    current_player = get_current_player()
 
     # Get all active shop items grouped by category
     categories = {
@@ -1812,8 +1569,8 @@ def shop():
 @app.route('/shop/purchase', methods=['POST'])
 def purchase_item():
     """Purchase an item from the shop"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         return jsonify({'success': False, 'error': 'Необходимо войти в систему'}), 401
 
     try:
@@ -1823,10 +1580,6 @@ def purchase_item():
         if not item_id:
             return jsonify({'success': False, 'error': 'Не указан ID товара'}), 400
 
-        player = Player.query.filter_by(nickname=player_nickname).first()
-        if not player:
-            return jsonify({'success': False, 'error': 'Игрок не найден'}), 404
-
         item = ShopItem.query.get(item_id)
         if not item or not item.is_active:
             return jsonify({'success': False, 'error': 'Товар не найден или недоступен'}), 404
@@ -2135,29 +1888,20 @@ def admin_update_reputation():
 @app.route('/reputation-guide')
 def reputation_guide():
     """Reputation earning guide"""
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
 
     return render_template('reputation_guide.html', current_player=current_player)
 
 @app.route('/karma-guide')
 def karma_guide():
     """Show karma FAQ page"""
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
     return render_template('karma_guide.html', current_player=current_player)
 
 @app.route('/coins-guide')
 def coins_guide():
     """Coins earning guide"""
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
 
     return render_template('coins_guide.html', current_player=current_player)
 
@@ -2208,10 +1952,6 @@ def admin_gradients():
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
-    # Initialize default themes if none exist
-    if GradientTheme.query.count() == 0:
-        GradientTheme.create_default_themes()
-
     themes = GradientTheme.query.all()
     players = Player.query.all()
 
@@ -2351,15 +2091,18 @@ def remove_gradient(player_id, element_type):
 
 
 @app.route('/profile/<nickname>')
+@replica_safe
+@cached_page(*PROFILE_TAGS)
 def public_profile_by_nickname(nickname):
     """Display public player profile by nickname"""
     player = Player.query.filter_by(nickname=nickname).first_or_404()
 
-    if not player.profile_is_public and session.get('player_nickname') != nickname:
+    current_player = get_current_player()
+    is_owner = current_player is not None and current_player.id == player.id
+    if not player.profile_is_public and not is_owner:
         flash('Профиль этого игрока приватный!', 'error')
         return redirect(url_for('index'))
 
-    is_owner = session.get('player_nickname') == nickname
     is_admin = session.get('is_admin', False)
 
     # Get player's visible badges
@@ -2384,8 +2127,6 @@ def public_profile_by_nickname(nickname):
 
     # Get game modes for ASCEND card
     from models import GameMode
-    if GameMode.query.count() == 0:
-        GameMode.create_default_modes()
     game_modes_query = GameMode.query.filter_by(is_active=True).all()
     game_modes = [
         {
@@ -2410,13 +2151,11 @@ def public_profile_by_nickname(nickname):
 @app.route('/update-profile', methods=['POST'])
 def update_profile():
     """Update current player's profile"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         # Update personal information
         player.real_name = request.form.get('real_name', '').strip() or None
@@ -2487,13 +2226,11 @@ def update_profile():
 @app.route('/apply-gradient', methods=['POST'])
 def apply_gradient():
     """Apply gradient to player's elements"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         element_type = request.form.get('element_type')
         gradient_theme_id = request.form.get('gradient_theme_id', type=int)
@@ -2530,13 +2267,11 @@ def apply_gradient():
 @app.route('/set-player-role', methods=['POST'])
 def set_player_role():
     """Set player's current role (only if reputation >= 500)"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     if not player.can_set_free_custom_role:
         flash('Для установки произвольной роли требуется 500+ репутации!', 'error')
         return redirect(url_for('my_profile'))
@@ -2561,13 +2296,11 @@ def set_player_role():
 @app.route('/set-custom-role', methods=['POST'])
 def set_custom_role():
     """Set player's purchased custom role"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     if not player.custom_role_purchased:
         flash('Сначала приобретите кастомную роль в магазине!', 'error')
         return redirect(url_for('my_profile'))
@@ -2612,13 +2345,11 @@ def set_custom_role():
 @app.route('/deactivate-all-titles', methods=['POST'])
 def deactivate_all_titles():
     """Deactivate all custom titles for player"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         # Deactivate all titles for this player
         PlayerTitle.query.filter_by(player_id=player.id, is_active=True).update({'is_active': False})
@@ -2634,13 +2365,11 @@ def deactivate_all_titles():
 @app.route('/update-leaderboard-style', methods=['POST'])
 def update_leaderboard_style():
     """Update player's leaderboard styling"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     if not player.can_customize_colors:
         flash('Кастомизация лидерборда доступна с 20 уровня!', 'error')
         return redirect(url_for('my_profile'))
@@ -2670,13 +2399,11 @@ def update_leaderboard_style():
 @app.route('/activate-player-title', methods=['POST'])
 def activate_player_title():
     """Activate a specific title for player"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         title_id = request.form.get('title_id', type=int)
 
@@ -2702,13 +2429,11 @@ def activate_player_title():
 @app.route('/activate-admin-role', methods=['POST'])
 def activate_admin_role():
     """Activate a specific admin role for player"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         role_id = request.form.get('role_id', type=int)
 
@@ -2734,13 +2459,11 @@ def activate_admin_role():
 @app.route('/deactivate-admin-role', methods=['POST'])
 def deactivate_admin_role():
     """Deactivate all admin roles for player"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         # Deactivate all admin roles for this player
         PlayerAdminRole.query.filter_by(player_id=player.id, is_active=True).update({'is_active': False})
@@ -2760,10 +2483,6 @@ def admin_achievements():
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
-    # Initialize default achievements if none exist
-    if Achievement.query.count() == 0:
-        Achievement.create_default_achievements()
-
     badges = Badge.query.order_by(Badge.created_at.desc()).all() # Changed to badges, assuming this was intended
     players = Player.query.order_by(Player.nickname).all()
 
@@ -2994,10 +2713,6 @@ def admin_themes():
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
-    # Initialize default themes if none exist
-    if SiteTheme.query.count() == 0:
-        SiteTheme.create_default_themes()
-
     themes = SiteTheme.query.all()
 
     return render_template('admin_themes.html',
@@ -3086,10 +2801,6 @@ def admin_badges():
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
-    # Initialize default badges if none exist
-    if Badge.query.count() == 0:
-        Badge.create_default_badges()
-
     badges = Badge.query.order_by(Badge.created_at.desc()).all()
     players = Player.query.order_by(Player.nickname).all()
 
@@ -3262,13 +2973,11 @@ def toggle_badge_visibility():
 @app.route('/update-badge-visibility', methods=['POST'])
 def update_badge_visibility():
     """Update badge visibility settings (player)"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    player = get_current_player()
+    if not player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     try:
         for key, value in request.form.items():
             if key.startswith('badge_visible_'):
@@ -3299,10 +3008,6 @@ def admin_roles():
         flash('Доступ запрещен!', 'error')
         return redirect(url_for('login'))
 
-    # Initialize default roles if none exist
-    if AdminCustomRole.query.count() == 0:
-        AdminCustomRole.create_default_roles()
-
     custom_roles = AdminCustomRole.query.filter_by(is_active=True).all()
     players = Player.query.order_by(Player.nickname).all()
     players_with_roles = PlayerAdminRole.query.filter_by(is_active=True).all()
@@ -3346,36 +3051,13 @@ def admin_create_custom_role():
         if 'emoji_file' in request.files:
             emoji_file = request.files['emoji_file']
             if emoji_file.filename and emoji_file.filename != '':
-                # Validate file
-                allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'avif'}
-                file_ext = emoji_file.filename.rsplit('.', 1)[1].lower() if '.' in emoji_file.filename else ''
-
-                if file_ext not in allowed_extensions:
-                    flash('Неподдерживаемый формат файла! Разрешены: PNG, JPG, GIF, WEBP, AVIF', 'error')
+                # Resized, re-encoded and named by content hash
+                try:
+                    emoji_filename, emoji_is_animated = store_emoji(emoji_file)
+                except ValueError as e:
+                    flash(str(e), 'error')
                     return redirect(url_for('admin_roles'))
 
-                # Check file size (256KB max)
-                emoji_file.seek(0, os.SEEK_END)
-                file_size = emoji_file.tell()
-                emoji_file.seek(0)
-
-                if file_size > 256 * 1024:  # 256KB
-                    flash('Файл слишком большой! Максимум 256KB', 'error')
-                    return redirect(url_for('admin_roles'))
-
-                # Check if animated (GIF)
-                emoji_is_animated = file_ext == 'gif'
-
-                # Generate unique filename
-                import uuid
-                unique_id = str(uuid.uuid4()).replace('-', '')
-                emoji_filename = f"{unique_id}.{file_ext}"
-
-                # Save file
-                upload_dir = os.path.join('static', 'emojis')
-                os.makedirs(upload_dir, exist_ok=True)
-                emoji_file.save(os.path.join(upload_dir, emoji_filename))
-
         role = AdminCustomRole(
             name=name,
             color=color,
@@ -3457,10 +3139,12 @@ def admin_delete_custom_role(role_id):
     try:
         role = AdminCustomRole.query.get_or_404(role_id)
 
-        # Remove emoji file if exists
-        if role.emoji_filename:
+        # Remove emoji file unless another role uses the same image
+        shared = AdminCustomRole.query.filter(AdminCustomRole.emoji_filename == role.emoji_filename,
+                                              AdminCustomRole.id != role.id).count() if role.emoji_filename else 0
+        if role.emoji_filename and not shared:
             try:
-                emoji_path = os.path.join('static', 'emojis', role.emoji_filename)
+                emoji_path = os.path.join(EMOJI_DIR, role.emoji_filename)
                 if os.path.exists(emoji_path):
                     os.remove(emoji_path)
             except Exception as e:
@@ -3503,11 +3187,10 @@ def admin_remove_player_role(player_id):
 @app.route('/inventory')
 def inventory():
     """Display player inventory"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    current_player = get_current_player()
+    if not current_player:
         return render_template('inventory.html', current_player=None)
 
-    current_player = Player.query.filter_by(nickname=player_nickname).first()
     return render_template('inventory.html', current_player=current_player)
 
 @app.route('/admin/give_coins', methods=['POST'])
@@ -3551,12 +3234,11 @@ def admin_give_coins():
 
 # Clan system routes
 @app.route('/clans')
+@replica_safe
+@cached_page(*CLAN_TAGS)
 def clans():
     """Display clans page"""
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
 
     # Get filter parameters
     sort_by = request.args.get('sort', 'rating')
@@ -3592,13 +3274,11 @@ def clans():
                          is_admin=session.get('is_admin', False))
 
 @app.route('/clan/<int:clan_id>')
+@replica_safe
 def clan_detail(clan_id):
     """Display clan details"""
     clan = Clan.query.get_or_404(clan_id)
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
 
     # Get clan members
     members = ClanMember.query.filter_by(clan_id=clan_id, is_active=True).all()
@@ -3627,13 +3307,11 @@ def clan_detail(clan_id):
 @app.route('/create_clan', methods=['GET', 'POST'])
 def create_clan():
     """Create new clan"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    current_player = get_current_player()
+    if not current_player:
         flash('Необходимо войти в систему для создания клана!', 'error')
         return redirect(url_for('player_login'))
 
-    current_player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     # Check level requirement
     if current_player.level < 100:
         flash('Для создания клана требуется минимум 100 уровень!', 'error')
@@ -3720,12 +3398,11 @@ def create_clan():
 @app.route('/join_clan/<int:clan_id>', methods=['POST'])
 def join_clan(clan_id):
     """Join a clan"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    current_player = get_current_player()
+    if not current_player:
         flash('Необходимо войти в систему для создания клана!', 'error')
         return redirect(url_for('player_login'))
 
-    current_player = Player.query.filter_by(nickname=player_nickname).first_or_404()
     clan = Clan.query.get_or_404(clan_id)
 
     try:
@@ -3760,12 +3437,11 @@ def join_clan(clan_id):
 @app.route('/leave_clan/<int:clan_id>', methods=['POST'])
 def leave_clan(clan_id):
     """Leave a clan"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    current_player = get_current_player()
+    if not current_player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    current_player = Player.query.filter_by(nickname=player_nickname).first_or_404()
     clan = Clan.query.get_or_404(clan_id)
 
     try:
@@ -3799,12 +3475,11 @@ def leave_clan(clan_id):
 
 # Tournament system routes
 @app.route('/tournaments')
+@replica_safe
+@cached_page(*TOURNAMENT_TAGS)
 def tournaments():
     """Display tournaments page"""
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
 
     # Get filter parameters
     status_filter = request.args.get('status', 'all')
@@ -3825,13 +3500,11 @@ def tournaments():
                          is_admin=session.get('is_admin', False))
 
 @app.route('/tournament/<int:tournament_id>')
+@replica_safe
 def tournament_detail(tournament_id):
     """Display tournament details"""
     tournament = Tournament.query.get_or_404(tournament_id)
-    current_player = None
-    player_nickname = session.get('player_nickname')
-    if player_nickname:
-        current_player = Player.query.filter_by(nickname=player_nickname).first()
+    current_player = get_current_player()
 
     # Get tournament participants
     participants = TournamentParticipant.query.filter_by(tournament_id=tournament_id, is_active=True).all()
@@ -3855,13 +3528,11 @@ def tournament_detail(tournament_id):
 @app.route('/create_tournament', methods=['GET', 'POST'])
 def create_tournament():
     """Create new tournament"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    current_player = get_current_player()
+    if not current_player:
         flash('Необходимо войти в систему для создания турниров!', 'error')
         return redirect(url_for('player_login'))
 
-    current_player = Player.query.filter_by(nickname=player_nickname).first_or_404()
-
     # Check level requirement and special roles
     allowed_roles = ['Организатор', 'Клан-лидер', 'admin']
     has_special_role = any(role in current_player.role for role in allowed_roles)
@@ -3964,12 +3635,11 @@ def create_tournament():
 @app.route('/join_tournament/<int:tournament_id>', methods=['POST'])
 def join_tournament(tournament_id):
     """Join a tournament"""
-    player_nickname = session.get('player_nickname')
-    if not player_nickname:
+    current_player = get_current_player()
+    if not current_player:
         flash('Необходимо войти в систему!', 'error')
         return redirect(url_for('player_login'))
 
-    current_player = Player.query.filter_by(nickname=player_nickname).first_or_404()
     tournament = Tournament.query.get_or_404(tournament_id)
 
     try:
@@ -4074,9 +3744,6 @@ def internal_error(error):
     return render_template('base.html', error_message="Внутренняя ошибка сервера"), 500
 
 # Helper functions for boosters
-def get_current_player():
-    return Player.query.get(session.get('player_id')) if session.get('player_id') else None
-
 def apply_coins_with_booster(player, amount):
     """Apply coins with active booster multiplier"""
     multiplier = PlayerActiveBooster.get_coins_multiplier(player.id)
@@ -4092,27 +3759,6 @@ def apply_reputation_with_booster(player, amount):
     return final_amount, multiplier
 
 # ASCEND System API Routes
-@app.route('/api/player/<int:player_id>/ascend-data')
-def get_ascend_data(player_id):
-    """Get ASCEND data for a player"""
-    try:
-        # Check if player exists
-        player = Player.query.get_or_404(player_id)
-
-        # Get or create ASCEND data
-        ascend_data = ASCENDData.get_or_create(player_id)
-
-        return jsonify({
-            'success': True,
-            'ascend': ascend_data.to_dict()
-        })
-    except Exception as e:
-        app.logger.error(f"Error getting ASCEND data: {e}")
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
-
 @app.route('/api/ascend/update', methods=['POST'])
 def update_ascend_data():
     """Update ASCEND data for a player (admin only)"""
@@ -4175,7 +3821,7 @@ def update_ascend_data():
         db.session.commit()
 
         # Log the update
-        app.logger.info(f"ASCEND data updated for player {player.nickname} by admin {session.get('player_nickname', 'Unknown')}")
+        app.logger.info(f"ASCEND data updated for player {player.nickname} by admin {getattr(get_current_player(), 'nickname', 'Unknown')}")
 
         return jsonify({
             'success': True,
@@ -4245,7 +3891,7 @@ def reset_ascend_data(player_id):
 
 @app.route('/api/ascend/bulk-update', methods=['POST'])
 def bulk_update_ascend():
-    """Bulk update ASCEND data for multiple players (admin only)"""
+    """Bulk evaluate ASCEND data for many players, e.g. a clan or tournament bracket (admin only)"""
     if not session.get('is_admin', False):
         return jsonify({
             'success': False,
@@ -4253,59 +3899,31 @@ def bulk_update_ascend():
         }), 403
 
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         updates = data.get('updates', [])
 
-        if not updates:
+        if not updates or not isinstance(updates, list):
             return jsonify({
                 'success': False,
                 'error': 'Список обновлений пуст'
             }), 400
 
-        updated_count = 0
-        errors = []
-
-        for update in updates:
-            try:
-                player_id = update.get('player_id')
-                if not player_id:
-                    continue
-
-                player = Player.query.get(player_id)
-                if not player:
-                    errors.append(f"Игрок с ID {player_id} не найден")
-                    continue
-
-                ascend_data = ASCENDData.get_or_create(player_id)
-
-                # Update fields
-                for field in ['pvp_tier', 'clutching_tier', 'block_placement_tier', 'gamesense_tier', 'overall_tier']:
-                    if field in update:
-                        setattr(ascend_data, field, update[field])
-
-                for field in ['pvp_score', 'clutching_score', 'block_placement_score', 'gamesense_score']:
-                    if field in update:
-                        score = max(0, min(100, update[field]))
-                        setattr(ascend_data, field, score)
-
-                if 'comment' in update:
-                    ascend_data.comment = update['comment']
-
-                if 'evaluator_name' in update:
-                    ascend_data.evaluator_name = update['evaluator_name']
-
-                ascend_data.updated_at = datetime.utcnow()
-                updated_count += 1
-
-            except Exception as e:
-                errors.append(f"Ошибка обновления игрока {player_id}: {str(e)}")
+        if len(updates) > ASCENDData.MAX_BULK_ENTRIES:
+            return jsonify({
+                'success': False,
+                'error': f'Слишком много обновлений (максимум {ASCENDData.MAX_BULK_ENTRIES})'
+            }), 400
 
-        db.session.commit()
+        updated, errors = ASCENDData.bulk_evaluate(
+            updates,
+            default_evaluator=data.get('evaluator_name', 'Elite Squad')
+        )
 
         return jsonify({
             'success': True,
-            'message': f'Обновлено {updated_count} игроков',
-            'updated_count': updated_count,
+            'message': f'Обновлено {len(updated)} игроков',
+            'updated_count': len(updated),
+            'updated': updated,
             'errors': errors
         })
 
@@ -4316,6 +3934,7 @@ def bulk_update_ascend():
             'success': False,
             'error': f'Ошибка при массовом обновлении: {str(e)}'
         }), 500
+
 @app.route('/admin/create_booster_items', methods=['POST'])
 def create_booster_items():
     """Create booster shop items (admin only)"""
@@ -4423,64 +4042,3 @@ def create_booster_items():
         flash('Ошибка при создании бустеров!', 'error')
 
     return redirect(url_for('admin'))
-
-# Function to initialize shop items, including boosters
-def initialize_shop_items():
-    """Initialize default shop items if they don't exist"""
-    try:
-        # Create boosters if they don't exist
-        if ShopItem.query.filter_by(category='booster').count() == 0:
-
-            # Import json at the top if not already imported
-            import json
-
-            boosters = [
-                {
-                    'name': 'coin_booster_1h',
-                    'display_name': '🪙 Бустер койнов (1ч)',
-                    'description': '+50% к получаемым койнам на 1 час',
-                    'category': 'booster',
-                    'price_coins': 100,
-                    'price_reputation': 0,
-                    'unlock_level': 1,
-                    'rarity': 'common',
-                    'icon': 'fas fa-coins',
-                    'item_data': json.dumps({
-                        'type': 'coin_multiplier',
-                        'multiplier': 1.5,
-                        'duration_hours': 1
-                    }),
-                    'is_active': True
-                },
-                {
-                    'name': 'rep_booster_1h',
-                    'display_name': '⭐ Бустер репутации (1ч)',
-                    'description': '+50% к получаемой репутации на 1 час',
-                    'category': 'booster',
-                    'price_coins': 150,
-                    'price_reputation': 0,
-                    'unlock_level': 1,
-                    'rarity': 'common',
-                    'icon': 'fas fa-star',
-                    'item_data': json.dumps({
-                        'type': 'reputation_multiplier',
-                        'multiplier': 1.5,
-                        'duration_hours': 1
-                    }),
-                    'is_active': True
-                }
-            ]
-
-            for booster_data in boosters:
-                booster = ShopItem(**booster_data)
-                db.session.add(booster)
-
-            db.session.commit()
-            app.logger.info("Default boosters created")
-
-    except Exception as e:
-        app.logger.error(f"Error initializing shop items: {e}")
-
-# Call this function after app initialization
-with app.app_context():
-    initialize_shop_items()
\ No newline at end of file
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Default catalog data: site themes, game modes, quests, achievements, shop items...
+
+The data lives in seeds/<table>.json. SEED_REGISTRY says which model each file
+feeds and which column identifies a row. All seeds are applied in one
+transaction: existing natural keys are prefetched once per table and only the
+missing rows are bulk inserted (--update also rewrites the seeded columns of
+existing rows). A hash of the registry and the data files is stored in
+seed_version, so an unchanged catalog costs a single SELECT.
+
+Runs as a release step after `python migrate.py`, never while serving requests:
+    python seeds.py [--force] [--update] [--check]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from engine_config import use_offline_settings
+
+if __name__ == '__main__':
+    use_offline_settings()  # long batch statements; the request timeout does not apply
+
+from app import app, db
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'seeds')
+SEED_NAME = 'catalog'
+
+# (model, data file in seeds/, natural key column), applied in this order
+SEED_REGISTRY = (
+    ('SiteTheme', 'site_theme.json', 'name'),
+    ('GameMode', 'game_mode.json', 'name'),
+    ('Quest', 'quest.json', 'title'),
+    ('Achievement', 'achievement.json', 'title'),
+    ('CustomTitle', 'custom_title.json', 'name'),
+    ('GradientTheme', 'gradient_theme.json', 'name'),
+    ('CursorTheme', 'cursor_theme.json', 'name'),
+    ('ShopItem', 'shop_item.json', 'name'),
+    ('Badge', 'badge.json', 'name'),
+    ('AdminCustomRole', 'admin_custom_role.json', 'name')
+)
+
+@lru_cache(maxsize=None)
+def _read_seed_file(filename):
+    with open(os.path.join(SEED_DIR, filename), 'rb') as seed_file:
+        return seed_file.read()
+
+def load_seed_rows(filename):
+    """Rows of a seed data file, as a fresh list of dicts"""
+    return json.loads(_read_seed_file(filename))
+
+def seed_version():
+    """Hash of the registry and every data file it references"""
+    digest = hashlib.sha256()
+    for model_name, filename, key in SEED_REGISTRY:
+        digest.update(f'{model_name}:{filename}:{key}\n'.encode('utf-8'))
+        digest.update(_read_seed_file(filename))
+    return digest.hexdigest()
+
+def apply_seeds(force=False, update=False):
+    """Apply every seed in one transaction; needs an application context
+
+    Returns {table: inserted rows}, or None when the stored version is current.
+    """
+    import models
+    from models import SeedVersion, GameMode, SiteTheme
+
+    version = seed_version()
+    state = db.session.get(SeedVersion, SEED_NAME)
+    if state is not None and state.version_hash == version and not (force or update):
+        return None
+
+    inserted = {}
+    try:
+        for model_name, filename, key in SEED_REGISTRY:
+            model = getattr(models, model_name)
+            column = getattr(model, key)
+            rows = load_seed_rows(filename)
+
+            existing = dict(db.session.query(column, model.id).filter(column.in_([row[key] for row in rows])).all())
+            new_rows = [row for row in rows if row[key] not in existing]
+            if new_rows:
+                db.session.bulk_insert_mappings(model, new_rows)
+            if update:
+                db.session.bulk_update_mappings(model, [
+                    dict(row, id=existing[row[key]]) for row in rows if row[key] in existing
+                ])
+            inserted[model.__table__.name] = len(new_rows)
+
+        if state is None:
+            state = SeedVersion(name=SEED_NAME)
+            db.session.add(state)
+        state.version_hash = version
+        state.applied_at = datetime.utcnow()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Bulk writes bypass the mapper events that normally invalidate these
+    GameMode.invalidate_skill_registry()
+    SiteTheme.invalidate_theme_map()
+    return inserted
+
+def seed_database(force=False, update=False):
+    """Apply seeds and report what changed"""
+    with app.app_context():
+        inserted = apply_seeds(force=force, update=update)
+
+    if inserted is None:
+        print("✅ Seed data is up to date")
+        return
+    for table, count in inserted.items():
+        if count:
+            print(f"🌱 {table}: {count} new rows")
+    print(f"✅ Seed data applied ({sum(inserted.values())} new rows)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load default catalog data')
+    parser.add_argument('--force', action='store_true', help='apply even if the stored seed version is current')
+    parser.add_argument('--update', action='store_true', help='also overwrite seeded columns of existing rows')
+    parser.add_argument('--check', action='store_true', help='exit with status 1 if the seeds need applying')
+    args = parser.parse_args()
+
+    if args.check:
+        with app.app_context():
+            from models import SeedVersion
+            state = db.session.get(SeedVersion, SEED_NAME)
+            current = state is not None and state.version_hash == seed_version()
+        print("✅ Seed data is up to date" if current else "⚠️ Seed data needs applying")
+        sys.exit(0 if current else 1)
+
+    seed_database(force=args.force, update=args.update)
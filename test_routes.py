@@ -2,12 +2,14 @@
 import pytest
 import sys
 import os
+import time
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import app, db
 from models import Player
+from response_cache import response_cache
 
 @pytest.fixture
 def client():
@@ -20,6 +22,7 @@ def client():
             db.create_all()
             yield client
             db.drop_all()
+            response_cache.clear()  # drop_all bypasses the write tags
 
 @pytest.fixture
 def sample_player():
@@ -110,6 +113,9 @@ def test_player_profile_exists(client, sample_player):
     assert response.status_code == 200
     assert sample_player.nickname.encode() in response.data
 
+    from models import PlayerSkillRating
+    assert PlayerSkillRating.query.filter_by(player_id=sample_player.id).count() == 0  # a GET never writes
+
 def test_login_page(client):
     """Test admin login page loads"""
     response = client.get('/login')
@@ -130,6 +136,762 @@ def test_api_stats(client):
     assert 'stats' in data
     assert 'charts' in data
 
+def test_api_ascend_data_is_read_only(client, sample_player):
+    """Test ASCEND data GET returns defaults without creating records"""
+    from models import ASCENDData
+    response = client.get(f'/api/player/{sample_player.id}/ascend-data?gamemode=kitpvp')
+    assert response.status_code == 200
+
+    data = response.get_json()
+    assert data['success'] == True
+    assert data['ascend']['skill1_name'] == 'Aiming'
+    assert data['ascend']['overall_tier'] == 'D'
+    assert ASCENDData.query.count() == 0
+
+def test_api_ascend_data_not_found(client):
+    """Test ASCEND data GET for non-existent player"""
+    response = client.get('/api/player/9999/ascend-data')
+    assert response.status_code == 404
+
+def test_api_ascend_data_conditional(client, sample_player):
+    """Test ASCEND data GET answers 304 for a matching ETag"""
+    response = client.get(f'/api/player/{sample_player.id}/ascend-data')
+    etag = response.headers['ETag']
+
+    response = client.get(f'/api/player/{sample_player.id}/ascend-data',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+def test_api_ascend_bulk_update(client, sample_player):
+    """Test bulk ASCEND evaluation upserts rows, writes history and reports errors"""
+    from models import ASCENDData, ASCENDHistory
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+
+    payload = {'updates': [
+        {'player_id': sample_player.id, 'gamemode': 'bedwars', 'skill1_score': 90, 'pvp_score': 10,
+         'skill2_score': 80, 'skill3_score': 70, 'skill4_score': 60},
+        {'player_id': 9999, 'skill1_score': 50},
+        {'player_id': sample_player.id, 'gamemode': 'bedwars', 'skill1_score': 10},
+    ]}
+    response = client.post('/api/ascend/bulk-update', json=payload)
+    data = response.get_json()
+    assert data['success'] == True
+    assert data['updated_count'] == 1
+    assert [error['index'] for error in data['errors']] == [1, 2]
+
+    ascend = ASCENDData.query.filter_by(player_id=sample_player.id, gamemode='bedwars').one()
+    assert ascend.skill1_score == 90
+    assert ascend.pvp_score == 90
+    assert ascend.skill1_tier == 'S'
+    assert ascend.overall_tier == 'B+'
+    assert ascend.global_rank == 1
+
+    response = client.post('/api/ascend/bulk-update', json={'updates': [
+        {'player_id': sample_player.id, 'skill4_score': 100}
+    ]})
+    assert response.get_json()['updated'][0]['change_type'] == 'upgrade'
+    assert ASCENDData.query.count() == 1
+    assert ASCENDHistory.query.count() == 2
+
+def test_ascend_history_compaction(client, sample_player):
+    """Test old ASCEND history is rolled up into monthly summaries"""
+    from datetime import datetime, timedelta
+    from models import ASCENDHistory, ASCENDHistorySummary
+
+    old_date = datetime.utcnow() - timedelta(days=400)
+    for tier, change_type in (('C', 'upgrade'), ('B', 'upgrade')):
+        db.session.add(ASCENDHistory(
+            player_id=sample_player.id, gamemode='bedwars', old_overall_tier='D',
+            new_overall_tier=tier, change_type=change_type, evaluator_name='Test',
+            created_at=old_date, **ASCENDHistory.score_columns('new', [60, 70, 80, 90])
+        ))
+    db.session.add(ASCENDHistory(
+        player_id=sample_player.id, gamemode='bedwars', new_overall_tier='A',
+        evaluator_name='Test', **ASCENDHistory.score_columns('new', [80, 80, 80, 80])
+    ))
+    db.session.commit()
+
+    assert ASCENDHistory.compact_older_than(6) == (2, 1)
+    assert ASCENDHistory.query.count() == 1
+
+    response = client.get(f'/api/player/{sample_player.id}/ascend-history?include_summaries=1')
+    data = response.get_json()
+    assert data['history'][0]['new_scores'] == {'skill1': 80, 'skill2': 80, 'skill3': 80, 'skill4': 80}
+    summary = data['summaries'][0]
+    assert summary['evaluation_count'] == 2
+    assert summary['upgrade_count'] == 2
+    assert summary['last_overall_tier'] == 'B'
+    assert summary['average_scores']['skill4'] == 90
+
+def test_export_streams_csv(client, sample_player):
+    """Test CSV export streams header and player rows"""
+    response = client.get('/export?sort=kills&search=Test')
+    assert response.status_code == 200
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 2
+    assert lines[1].startswith('TestPlayer,1,5000,100,')
+
+def test_export_gzip(client, sample_player):
+    """Test gzip-compressed CSV export"""
+    import gzip
+    response = client.get('/export?gzip=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    assert 'TestPlayer' in gzip.decompress(response.get_data()).decode('utf-8')
+
+def test_export_failure_is_not_a_complete_file(client, sample_player, monkeypatch):
+    """Test an error while streaming aborts the export instead of ending it cleanly"""
+    import routes
+
+    def broken_rows(rows):
+        raise RuntimeError('connection lost')
+    monkeypatch.setattr(routes, '_export_rows', broken_rows)
+
+    for query in ('', '?gzip=1'):
+        response = client.get(f'/export{query}')
+        with pytest.raises(RuntimeError):
+            response.get_data()
+
+def test_export_database_backup(client, sample_player):
+    """Test database backup streams a versioned NDJSON archive covering all tables"""
+    import json
+    from backup import BACKUP_VERSION
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+
+    response = client.get('/admin/export-db?gzip=0')
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert records[0]['type'] == 'header'
+    assert records[0]['version'] == BACKUP_VERSION
+    assert {'player', 'clan', 'tournament', 'badge', 'ascend_data', 'ascend_history', 'shop_purchase'} <= set(records[0]['tables'])
+    assert records[-1]['counts']['player'] == 1
+
+    player_table = next(r for r in records if r['type'] == 'table' and r['name'] == 'player')
+    player_rows = next(r for r in records if r['type'] == 'rows' and r['table'] == 'player')
+    assert dict(zip(player_table['columns'], player_rows['rows'][0]))['nickname'] == 'TestPlayer'
+
+def test_skill_registry_invalidated_on_commit(client):
+    """Test the skill name cache reloads after a commit or its TTL, not at flush"""
+    from models import GameMode
+    mode = GameMode(name='duels', display_name='Duels', skill1_name='Aim', skill2_name='Combo',
+                    skill3_name='Rod', skill4_name='Sense')
+    db.session.add(mode)
+    db.session.commit()
+    assert GameMode.get_skill_names('duels') == ('Aim', 'Combo', 'Rod', 'Sense')
+
+    mode.skill1_name = 'Aiming'
+    db.session.flush()
+    assert GameMode.get_skill_names('duels')[0] == 'Aim'  # cached until the commit
+    db.session.commit()
+    assert GameMode.get_skill_names('duels')[0] == 'Aiming'
+
+    # Another worker's edit: seen once the TTL expires
+    db.session.execute(db.text("UPDATE game_mode SET skill1_name = 'Precision' WHERE name = 'duels'"))
+    db.session.commit()
+    assert GameMode.get_skill_names('duels')[0] == 'Aiming'
+    GameMode._skill_registry_loaded_at -= GameMode.SKILL_REGISTRY_TTL + 1
+    assert GameMode.get_skill_names('duels')[0] == 'Precision'
+
+def test_theme_map_invalidated_on_commit(client):
+    """Test the theme map drops flushed changes only once they are committed or rolled back"""
+    from models import SiteTheme
+    theme = SiteTheme(name='dusk', display_name='Dusk')
+    db.session.add(theme)
+    db.session.commit()
+    theme_id = theme.id
+    assert SiteTheme.get_theme(theme_id)['display_name'] == 'Dusk'
+
+    theme.display_name = 'Dawn'
+    db.session.flush()
+    assert SiteTheme.get_theme(theme_id)['display_name'] == 'Dusk'  # cached until the commit
+    db.session.commit()
+    assert SiteTheme.get_theme(theme_id)['display_name'] == 'Dawn'
+
+    # A map loaded inside the transaction sees the uncommitted row: the rollback drops it
+    db.session.get(SiteTheme, theme_id).display_name = 'Noon'
+    db.session.flush()
+    SiteTheme.invalidate_theme_map()
+    assert SiteTheme.get_theme(theme_id)['display_name'] == 'Noon'
+    db.session.rollback()
+    assert SiteTheme.get_theme(theme_id)['display_name'] == 'Dawn'
+
+def test_import_backup_remaps_ids(client, sample_player, tmp_path, monkeypatch):
+    """Test importing an NDJSON backup skips existing rows and remaps foreign keys"""
+    from models import ASCENDHistory, Badge, Clan, PlayerBadge, ReputationLog
+    from backup import generate_backup, import_backup
+    db.session.add(Clan(name='Testers', tag='TST', leader_id=sample_player.id))
+    badge = Badge(name='veteran', display_name='Veteran')
+    db.session.add(badge)
+    db.session.flush()
+    db.session.add(PlayerBadge(player_id=sample_player.id, badge_id=badge.id))
+    db.session.add(ReputationLog(player_id=sample_player.id, change_amount=5, reason='test', given_by='admin'))
+    db.session.add(ASCENDHistory(player_id=sample_player.id, gamemode='bedwars', new_overall_tier='B',
+                                 evaluator_name='Test', **ASCENDHistory.score_columns('new', [60, 70, 80, 90])))
+    db.session.commit()
+
+    path = tmp_path / 'backup.ndjson'
+    path.write_bytes(b''.join(generate_backup()))
+
+    Clan.query.delete()
+    Player.query.delete()
+    db.session.expunge_all()
+    db.session.add(Player(nickname='Other'))
+    db.session.commit()
+
+    inserted, skipped = import_backup(str(path))
+    assert inserted >= 2
+    player = Player.query.filter_by(nickname='TestPlayer').first()
+    assert player.kills == 100
+    assert Clan.query.filter_by(tag='TST').first().leader_id == player.id
+
+    # A second run only finds rows that already exist, composite and configured keys included
+    counts = lambda: [model.query.filter_by(player_id=player.id).count()
+                      for model in (ASCENDHistory, ReputationLog, PlayerBadge)]
+    assert counts() == [1, 1, 1]
+    assert import_backup(str(path))[0] == 0
+    assert counts() == [1, 1, 1]
+
+    # Rows written after the prefetch conflict on unique constraints: skipped, not fatal
+    from backup import BackupImporter
+    monkeypatch.setattr(BackupImporter, '_existing',
+                        lambda self, table, pk, keys: self.existing_keys.setdefault(table.name, {key: {} for key in keys}))
+    import_backup(str(path))
+    assert (Player.query.count(), Clan.query.count(), PlayerBadge.query.filter_by(player_id=player.id).count()) == (2, 1, 1)
+
+def test_import_legacy_json_job(client):
+    """Test the admin import runs as a background job that can be polled"""
+    import io
+    import json
+    import time
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+
+    legacy = {
+        'players': [{'nickname': 'LegacyPlayer', 'kills': 7, 'created_at': '2024-01-01T12:00:00'}],
+        'quests': [], 'achievements': [], 'shop_items': []
+    }
+    response = client.post('/admin/import-db', data={
+        'database_file': (io.BytesIO(json.dumps(legacy).encode('utf-8')), 'backup.json')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    job_id = int(response.headers['Location'].split('job=')[1])
+
+    for _ in range(50):
+        job = client.get(f'/admin/import-db/status/{job_id}').get_json()['job']
+        if job['status'] in ('completed', 'failed'):
+            break
+        time.sleep(0.1)
+
+    assert job['status'] == 'completed', job['error']
+    assert job['inserted_rows'] == 1
+    db.session.expire_all()
+    assert Player.query.filter_by(nickname='LegacyPlayer').first().kills == 7
+
+def test_import_job_without_heartbeat_fails(client):
+    """Test a running import whose worker died is reported as failed instead of polling forever"""
+    from datetime import datetime, timedelta
+    from models import DatabaseImportJob
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+
+    now = datetime.utcnow()
+    alive = DatabaseImportJob(filename='a.ndjson', status='running', started_at=now - timedelta(hours=1),
+                              updated_at=now - timedelta(seconds=30))
+    dead = DatabaseImportJob(filename='b.ndjson', status='running', started_at=now - timedelta(hours=1),
+                             updated_at=now - timedelta(seconds=DatabaseImportJob.STALE_AFTER + 1))
+    db.session.add_all([alive, dead])
+    db.session.commit()
+
+    assert client.get(f'/admin/import-db/status/{alive.id}').get_json()['job']['status'] == 'running'
+    job = client.get(f'/admin/import-db/status/{dead.id}').get_json()['job']
+    assert job['status'] == 'failed' and 'Импорт прерван' in job['error'] and job['finished_at']
+    db.session.expire_all()
+    assert db.session.get(DatabaseImportJob, dead.id).status == 'failed'
+
+def test_migrations_match_models(tmp_path):
+    """Test upgrading an empty database to head yields exactly the model schema"""
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from sqlalchemy import create_engine
+    from migrate import alembic_config
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), 'head')
+        assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+
+def test_migrations_upgrade_legacy_database(tmp_path):
+    """Test a database created before migrations (no alembic_version, no ASCEND unique key) reaches the model schema"""
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from sqlalchemy import create_engine, text
+    from migrate import alembic_config
+    from models import ASCENDData
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), '0001')
+        with Operations.context(MigrationContext.configure(connection)) as op:
+            with op.batch_alter_table('ascend_data') as batch_op:
+                batch_op.drop_constraint('uq_ascend_data_player_gamemode', type_='unique')
+            op.drop_table('alembic_version')
+
+        connection.execute(Player.__table__.insert().values(id=1, nickname='Legacy'))
+        for tier in ('C', 'B'):
+            connection.execute(ASCENDData.__table__.insert().values(player_id=1, gamemode='bedwars', overall_tier=tier))
+
+    with engine.begin() as connection:
+        command.upgrade(alembic_config(connection), 'head')
+        assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+        assert connection.execute(text('SELECT overall_tier FROM ascend_data')).scalars().all() == ['B']
+
+def test_apply_seeds_is_idempotent(client):
+    """Test the seed registry inserts the catalog once and skips unchanged seeds"""
+    from models import GameMode, ShopItem, SeedVersion
+    from seeds import SEED_REGISTRY, apply_seeds, load_seed_rows, seed_version
+
+    for model_name, filename, key in SEED_REGISTRY:
+        names = [row[key] for row in load_seed_rows(filename)]
+        assert len(names) == len(set(names)), filename
+
+    inserted = apply_seeds()
+    assert inserted['shop_item'] == len(load_seed_rows('shop_item.json'))
+    assert GameMode.query.filter_by(name='bedwars').count() == 1
+    assert db.session.get(SeedVersion, 'catalog').version_hash == seed_version()
+
+    assert apply_seeds() is None
+    assert apply_seeds(force=True)['shop_item'] == 0
+    assert ShopItem.query.count() == len(load_seed_rows('shop_item.json'))
+
+def test_engine_config_pool_and_pragmas(client):
+    """Test pool sizing follows the worker class and SQLite gets its pragmas"""
+    from engine_config import engine_options, pool_settings, use_offline_settings
+
+    assert pool_settings({})['pool_size'] == 2
+    assert pool_settings({'GUNICORN_WORKER_CLASS': 'gthread', 'GUNICORN_THREADS': '8'})['pool_size'] == 8
+    assert pool_settings({'DB_POOL_SIZE': '5'})['pool_size'] == 5
+    options = engine_options('postgresql://u@h/db', {'DB_STATEMENT_TIMEOUT_MS': '3000'})
+    assert options['connect_args']['options'] == '-c statement_timeout=3000'
+    environ = {'DB_STATEMENT_TIMEOUT_MS': '3000'}
+    use_offline_settings(environ)
+    assert engine_options('postgresql://u@h/db', environ)['connect_args']['options'] == '-c statement_timeout=0'
+
+    with db.engine.connect() as connection:
+        assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    data = client.get('/api/admin/db-pool').get_json()
+    assert data['success'] and data['pools']['default']['checkouts'] >= 1
+
+def test_replica_routing_reads_your_writes(client, tmp_path):
+    """Test replica-safe reads use the replica until the client writes"""
+    import time
+    from flask import g, session
+    from sqlalchemy import create_engine
+    from db_routing import REPLICA_BIND, replica_safe
+
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(replica)
+    with replica.begin() as connection:
+        connection.execute(Player.__table__.insert(), [{'nickname': 'OnReplica', 'final_deaths': 0}])
+    db.engines[REPLICA_BIND] = replica
+    try:
+        with app.test_request_context('/'):
+            assert replica_safe(lambda: g.db_replica)() is True
+            assert Player.query.filter_by(nickname='OnReplica').count() == 1
+
+            db.session.add(Player(nickname='OnPrimary'))
+            db.session.commit()
+            assert session['read_primary_until'] > time.time()
+            assert Player.query.filter_by(nickname='OnPrimary').count() == 1
+            assert replica_safe(lambda: g.db_replica)() is False
+            db.session.remove()
+    finally:
+        del db.engines[REPLICA_BIND]
+        replica.dispose()
+
+def test_current_player_loaded_once_per_request(client, sample_player):
+    """Test the logged-in player is looked up once per request by id"""
+    from flask import g
+    from sqlalchemy import event
+    from models import SiteTheme
+
+    theme = SiteTheme(name='night', display_name='Night', primary_color='#123456')
+    db.session.add(theme)
+    db.session.flush()
+    sample_player.selected_theme_id = theme.id
+    db.session.commit()
+
+    with client.session_transaction() as sess:
+        sess['player_nickname'] = sample_player.nickname  # session issued before player_id
+    client.get('/shop')
+    with client.session_transaction() as sess:
+        assert sess['player_id'] == sample_player.id
+        assert 'player_nickname' not in sess
+
+    player_queries = []
+    def count_player_queries(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('SELECT') and 'FROM player ' in statement + ' ':
+            player_queries.append(statement)
+
+    g.pop('current_player', None)  # the fixture's app context (and g) outlives each test request
+    db.session.expunge_all()
+    event.listen(db.engine, 'before_cursor_execute', count_player_queries)
+    try:
+        response = client.get('/shop')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_player_queries)
+    assert response.status_code == 200
+    assert b'#123456' in response.data
+    assert len(player_queries) == 1
+
+def test_anonymous_page_cache_and_invalidation(client, sample_player):
+    """Test anonymous pages are cached with an ETag and dropped when a player changes"""
+    first = client.get('/statistics')
+    assert first.headers['X-Cache'] == 'MISS' and first.headers['ETag']
+
+    cached = client.get('/statistics')
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert client.get('/statistics', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    sample_player.kills += 1
+    db.session.commit()
+    assert client.get('/statistics').headers['X-Cache'] == 'MISS'
+
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    assert 'X-Cache' not in client.get('/statistics').headers
+
+def test_translation_filter_follows_session_language(client):
+    """Test |t resolves per request (never folded into the compiled template)"""
+    from flask import render_template_string, session
+    from translations import CATALOGS, get_translation
+
+    assert set(CATALOGS['en'][0]) >= set(CATALOGS['ru'][0])
+    assert get_translation('missing_key', 'en') == 'missing_key'
+
+    for language, expected in (('ru', 'Лидеры'), ('en', 'Leaders'), ('xx', 'Лидеры')):
+        with app.test_request_context('/'):
+            session['language'] = language
+            assert render_template_string("{{ 'leaders'|t }}") == expected
+
+def test_asset_build_and_emoji_dedupe(client, tmp_path):
+    """Test fingerprinted bundles are served precompressed and emojis are stored once"""
+    import gzip
+    import io
+    import assets
+    from werkzeug.datastructures import FileStorage
+
+    manifest = assets.build_assets(dist_dir=str(tmp_path), sources=('css/style.css',))
+    hashed = manifest['css/style.css']
+    assert hashed.startswith('css/style.') and (tmp_path / (hashed + '.gz')).exists()
+
+    original_dist = assets.DIST_DIR
+    assets.DIST_DIR = str(tmp_path)
+    try:
+        response = client.get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    finally:
+        assets.DIST_DIR = original_dist
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.mimetype == 'text/css'
+    assert gzip.decompress(response.data) == (tmp_path / hashed).read_bytes()
+
+    from PIL import Image
+    upload = io.BytesIO()
+    Image.new('RGBA', (512, 256), (255, 0, 0, 255)).save(upload, format='PNG')
+    stored = [assets.store_emoji(FileStorage(io.BytesIO(upload.getvalue()), filename=name), str(tmp_path))
+              for name in ('a.png', 'b.PNG')]
+    assert stored[0] == stored[1] and stored[0][1] is False
+    with Image.open(tmp_path / stored[0][0]) as image:
+        assert max(image.size) == assets.EMOJI_MAX_SIZE
+
+def test_ascend_card_png(client, sample_player, tmp_path, monkeypatch):
+    """Test the card PNG is stored once under its content hash and revalidates with a 304"""
+    import ascend_card
+    monkeypatch.setattr(ascend_card, 'ASCEND_CARD_DIR', str(tmp_path))
+
+    url = f'/api/player/{sample_player.id}/ascend-card.png'
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png' and response.data.startswith(b'\x89PNG')
+    etag = response.headers['ETag']
+    assert [p.name for p in tmp_path.iterdir()] == [etag.strip('"') + '.png']
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'{url}?gamemode=kitpvp').headers['ETag'] != etag
+    assert client.get('/api/player/99999/ascend-card.png').status_code == 404
+
+    profile = client.get(f'/profile/{sample_player.nickname}')
+    assert b'ascend-card.png' in profile.data
+
+def test_ascend_card_dir_pruned(tmp_path, monkeypatch):
+    """Test stored cards beyond the limit are pruned least recently used first"""
+    import ascend_card
+    monkeypatch.setattr(ascend_card, 'render_card_png', lambda nickname, ascend: b'png')
+    monkeypatch.setattr(ascend_card, 'ASCEND_CARD_DIR_MAX', 3)
+
+    paths = [ascend_card.card_file(f'Player{i}', {}, card_dir=str(tmp_path))[1] for i in range(3)]
+    for age, path in zip((300, 200, 100), paths):
+        os.utime(path, (time.time() - ascend_card.CARD_TOUCH_INTERVAL - age,) * 2)
+    ascend_card.card_file('Player0', {}, card_dir=str(tmp_path))  # served again: moves to the front
+
+    _, newest = ascend_card.card_file('Player3', {}, card_dir=str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in (paths[0], paths[2], newest))
+    os.utime(newest, (time.time() + 60,) * 2)
+    assert ascend_card.prune_card_dir(str(tmp_path), max_files=1) == 2
+    assert os.listdir(tmp_path) == [os.path.basename(newest)]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_bot_cache_single_flight_and_stale(monkeypatch):
+    """Test the bot cache coalesces fetches, serves stale values while refreshing and skips failures"""
+    import asyncio
+    import bot_api
+    clock = FakeClock()
+    monkeypatch.setattr(bot_api, 'time', clock)
+
+    async def scenario():
+        cache = bot_api.AsyncTTLCache(max_entries=2)
+        calls = []
+
+        def fetcher(value):
+            async def fetch():
+                calls.append(value)
+                await asyncio.sleep(0.01)
+                return value
+            return fetch
+
+        results = await asyncio.gather(*(cache.get('a', fetcher(1), ttl=10, stale_ttl=20) for _ in range(5)))
+        assert results == [1] * 5 and calls == [1]
+        assert (cache.misses, cache.coalesced) == (1, 4)
+
+        clock.now += 15  # stale: the old value now, a refresh in the background
+        assert await cache.get('a', fetcher(2), ttl=10, stale_ttl=20) == 1
+        await asyncio.sleep(0.02)
+        assert await cache.get('a', fetcher(3), ttl=10, stale_ttl=20) == 2
+        assert calls == [1, 2] and cache.stale_hits == 1
+
+        clock.now += 31  # past stale_until: fetched again before answering
+        assert await cache.get('a', fetcher(4), ttl=10, stale_ttl=20) == 4
+
+        assert await cache.get('b', fetcher(None), ttl=10) is None
+        assert await cache.get('b', fetcher(5), ttl=10) == 5  # the failure was not cached
+
+        await cache.get('c', fetcher(6), ttl=10)  # evicts 'a', the least recently used
+        assert list(cache._entries) == ['b', 'c']
+        await cache.close()
+
+    asyncio.run(scenario())
+
+def test_bot_cache_cancellation_and_invalidate():
+    """Test a cancelled caller does not cancel the shared fetch and invalidate drops fetches in flight"""
+    import asyncio
+    from bot_api import AsyncTTLCache
+
+    async def scenario():
+        cache = AsyncTTLCache()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(len(calls))
+            await release.wait()
+            return f'v{len(calls)}'
+
+        first = asyncio.ensure_future(cache.get('quests', fetch, ttl=60))
+        second = asyncio.ensure_future(cache.get('quests', fetch, ttl=60))
+        await asyncio.sleep(0)
+        first.cancel()
+        cache.invalidate(lambda key: key == 'quests')  # e.g. a review just changed the quests
+        release.set()
+        assert await second == 'v1'
+        assert first.cancelled()
+
+        assert 'quests' not in cache._entries and calls == [0]
+        assert await cache.get('quests', fetch, ttl=60) == 'v2'
+        assert await cache.get('quests', fetch, ttl=60) == 'v2' and len(calls) == 2
+        await cache.close()
+
+    asyncio.run(scenario())
+
+def test_api_search(client):
+    """Test nickname search ranks exact and prefix matches first and batches exact lookups"""
+    for nickname in ('Alex_Pro', 'alex', 'TheAlex', 'Alexander', 'a%b'):
+        db.session.add(Player(nickname=nickname, kills=10, deaths=4, experience=15000))
+    db.session.commit()
+
+    data = client.get('/api/search?q=ALEX').get_json()
+    assert [p['nickname'] for p in data['players']] == ['alex', 'Alex_Pro', 'Alexander', 'TheAlex']
+    assert data['players'][0]['kd_ratio'] == 2.5 and data['players'][0]['level'] == 2
+    assert set(data['players'][0]) >= {'id', 'coins', 'reputation', 'karma', 'wins', 'games_played'}
+
+    assert [p['nickname'] for p in client.get('/api/search?q=alex_pro&exact=1').get_json()['players']] == ['Alex_Pro']
+    assert client.get('/api/search?q=x_p&exact=1').get_json()['players'] == []
+    assert [p['nickname'] for p in client.get('/api/search?q=%25').get_json()['players']] == ['a%b']
+    assert client.get('/api/search').status_code == 400
+
+    data = client.get('/api/search?nicknames=THEALEX,nobody,alex').get_json()
+    assert [p['nickname'] for p in data['players']] == ['TheAlex', 'alex']
+    assert data['missing'] == ['nobody']
+
+def test_change_feed(client, sample_player):
+    """Test flushes write outbox events and /api/changes returns them after a cursor"""
+    from models import ASCENDData
+
+    cursor = client.get('/api/changes').get_json()['cursor']
+    assert cursor >= 1  # sample_player's player_count event
+
+    sample_player.reputation = 30
+    db.session.commit()
+    rival = Player(nickname='Rival', experience=1000)
+    db.session.add(rival)
+    db.session.commit()
+
+    sample_player.reputation = 5
+    rival.experience = 9000  # overtakes TestPlayer (5000 XP) for first place
+    db.session.add(ASCENDData(player_id=sample_player.id, gamemode='bedwars', overall_tier='B'))
+    db.session.commit()
+
+    data = client.get(f'/api/changes?since={cursor}').get_json()
+    events = {event['kind']: event for event in data['events']}
+    assert sorted(events) == ['low_karma', 'player_count', 'rank_change', 'tier_change']
+    assert events['low_karma']['data'] == {'nickname': 'TestPlayer', 'reputation': 5}
+    assert events['rank_change']['data']['old_rank'] == 2 and events['rank_change']['data']['new_rank'] == 1
+    assert events['tier_change']['data']['new_tier'] == 'B' and events['tier_change']['data']['nickname'] == 'TestPlayer'
+    assert data['cursor'] == data['events'][-1]['id']
+
+    data = client.get(f"/api/changes?since={cursor}&kinds=low_karma,bogus").get_json()
+    assert [event['kind'] for event in data['events']] == ['low_karma']
+    assert client.get(f"/api/changes?since={data['cursor'] + 100}").get_json()['events'] == []
+
+def test_api_players_below_keyset(client):
+    """Test the threshold scan covers every matching player across keyset pages"""
+    for i, karma in enumerate((5, 19, 20, 3, 5, 100, -2)):
+        db.session.add(Player(nickname=f'K{i}', karma=karma, reputation=karma))
+    db.session.commit()
+
+    seen, after = [], ''
+    while True:
+        data = client.get(f'/api/players/below?field=karma&lt=20&limit=2&after={after}').get_json()
+        seen += [(p['karma'], p['nickname']) for p in data['players']]
+        after = data['next_cursor']
+        if not after:
+            break
+    assert seen == [(-2, 'K6'), (3, 'K3'), (5, 'K0'), (5, 'K4'), (19, 'K1')]
+
+    assert client.get('/api/players/below?field=kills&lt=5').status_code == 400
+    assert client.get('/api/players/below?field=karma&lt=5&after=x').status_code == 400
+    top = client.get('/api/leaderboard?sort=reputation&limit=1').get_json()['players'][0]
+    assert top['reputation'] == 100
+
+def test_quest_submission_review_queue(client, sample_player):
+    """Test the bot queues submissions and a bulk approve rewards each quest once"""
+    from models import PlayerQuest, Quest
+
+    quest = Quest(title='Первая кровь', description='Win 10 games', type='wins', target_value=10,
+                  reward_xp=100, reward_coins=50, reward_reputation=5)
+    db.session.add(quest)
+    db.session.commit()
+
+    payload = {'nickname': 'testplayer', 'quest': 'ПЕРВАЯ КРОВЬ', 'discord_user_id': 42, 'discord_guild_id': 7}
+    assert client.post('/api/quest-submissions', json=payload).status_code == 403
+
+    app.config['BOT_API_TOKEN'] = 'secret'
+    headers = {'Authorization': 'Bearer secret'}
+    try:
+        ids = [client.post('/api/quest-submissions', json=payload, headers=headers).get_json()['submission']['id']
+               for _ in range(3)]
+        assert client.post('/api/quest-submissions', json={**payload, 'quest': 'nope'},
+                           headers=headers).status_code == 404
+        exact = client.post('/api/quest-submissions', json={**payload, 'quest': ' Первая кровь '}, headers=headers)
+        assert exact.get_json()['submission']['quest_title'] == 'Первая кровь'
+        client.post('/api/quest-submissions/review', headers=headers, json={
+            'ids': [exact.get_json()['submission']['id']], 'action': 'reject'})
+
+        data = client.get('/api/quest-submissions?guild_id=7&limit=2', headers=headers).get_json()
+        assert [s['id'] for s in data['submissions']] == ids[:2] and data['next_cursor'] == ids[1]
+        data = client.get(f"/api/quest-submissions?guild_id=7&after={data['next_cursor']}", headers=headers).get_json()
+        assert [s['id'] for s in data['submissions']] == ids[2:] and data['next_cursor'] is None
+
+        reviewed = client.post('/api/quest-submissions/review', headers=headers, json={
+            'ids': ids[:2], 'action': 'approve', 'reviewed_by': 'mod'}).get_json()['reviewed']
+        assert [(s['status'], s['rewarded']) for s in reviewed] == [('approved', True), ('approved', False)]
+        reviewed = client.post('/api/quest-submissions/review', headers=headers, json={
+            'ids': ids, 'action': 'reject', 'reason': 'дубликат'}).get_json()['reviewed']
+        assert [(s['id'], s['status'], s['reason']) for s in reviewed] == [(ids[2], 'rejected', 'дубликат')]
+    finally:
+        app.config['BOT_API_TOKEN'] = None
+
+    db.session.refresh(sample_player)
+    assert (sample_player.experience, sample_player.coins, sample_player.reputation) == (5100, 50, 5)
+    assert PlayerQuest.query.filter_by(player_id=sample_player.id, quest_id=quest.id, is_completed=True).count() == 1
+
+def test_bot_guild_config_stored_on_website(client, tmp_path):
+    """Test /setup_channel settings are saved on the website and survive losing the bot's local file"""
+    import asyncio
+    from bot_guilds import GuildConfigStore
+
+    assert client.get('/api/bot/guilds').status_code == 403
+
+    app.config['BOT_API_TOKEN'] = 'secret'
+    headers = {'Authorization': 'Bearer secret'}
+    website = app.test_client()  # unlike the fixture, keeps no request context across the event loop
+
+    class WebsiteAPI:
+        """BotAPIClient's guild methods, answered by the test client"""
+        async def guild_configs(self):
+            return website.get('/api/bot/guilds', headers=headers).get_json()
+
+        async def set_guild_channel(self, guild_id, kind, channel_id):
+            response = website.post(f'/api/bot/guilds/{guild_id}/channels', headers=headers,
+                                    json={'kind': kind, 'channel_id': str(channel_id) if channel_id else None})
+            return response.status_code, response.get_json()
+
+        async def remove_guild(self, guild_id):
+            response = website.post(f'/api/bot/guilds/{guild_id}/remove', headers=headers)
+            return response.status_code, response.get_json()
+
+    async def scenario():
+        legacy = GuildConfigStore(path=str(tmp_path / 'old.json'))  # a bot from before: local file only
+        await legacy.set_channel(111, 'announce', 900)
+
+        store = await GuildConfigStore(WebsiteAPI(), path=str(tmp_path / 'old.json')).load()  # uploads it
+        await store.set_channel(222, 'review', 901)
+        await store.set_channel(222, 'announce', 902)
+        await store.set_channel(222, 'review', None)
+        with pytest.raises(ValueError):
+            await store.set_channel(333, 'nope', 1)
+
+        fresh = await GuildConfigStore(WebsiteAPI(), path=str(tmp_path / 'new.json')).load()  # a new deploy
+        assert sorted(fresh.channel_ids('announce')) == [900, 902] and fresh.channel_ids('review') == []
+        assert fresh.channel_id(222, 'announce') == 902
+
+        await fresh.remove_guild(111)
+        return (await GuildConfigStore(WebsiteAPI(), path=str(tmp_path / 'other.json')).load()).channel_ids('announce')
+
+    try:
+        assert asyncio.run(scenario()) == [902]
+        assert client.post('/api/bot/guilds/1/channels', headers=headers,
+                           json={'kind': 'announce', 'channel_id': 'x'}).status_code == 400
+        assert client.get('/api/bot/guilds', headers=headers).get_json()['guilds'] == [
+            {'guild_id': '222', 'announce_channel_id': '902', 'review_channel_id': None}]
+    finally:
+        app.config['BOT_API_TOKEN'] = None
+
 # Performance test
 def test_index_page_performance(client):
     """Test that main page loads reasonably fast"""
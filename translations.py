@@ -1,26 +1,21 @@
+"""
+Translation system for the Bedwars Leaderboard
 
-def get_translation(key, lang='ru', **kwargs):
-    """Get translation for key in specified language"""
-    translation = translations.get(lang, {}).get(key, translations['ru'].get(key, key))
-    if kwargs:
-        try:
-            return translation.format(**kwargs)
-        except (KeyError, ValueError):
-            return translation
-    return translation
+TRANSLATIONS is the source. At import it is compiled into one flat, read-only
+catalog per language (Russian fallbacks already merged in) plus prebound
+str.format methods for entries with placeholders. Each render resolves the
+session's language once (context processor) and the |t filter reuses that
+bound translator, so a call costs one dict lookup.
+"""
 
-def register_translation_filter(app):
-    """Register translation filter for Jinja2"""
-    @app.template_filter('t')
-    def translate_filter(key, **kwargs):
-        from flask import session
-        lang = session.get('language', 'ru')
-        return get_translation(key, lang, **kwargs)
+from functools import lru_cache
+from string import Formatter
+from types import MappingProxyType
 
-    return translate_filter
+from flask import has_request_context, session
+from jinja2 import pass_context
 
-# Translation system for the Bedwars Leaderboard
-from flask import session
+DEFAULT_LANGUAGE = 'ru'
 
 # Translation dictionaries
 TRANSLATIONS = {
@@ -269,24 +264,61 @@ TRANSLATIONS = {
     }
 }
 
-def get_translation(key, language=None):
-    """Get translation for a key in the specified language"""
-    if language is None:
-        language = session.get('language', 'ru')
+def _has_placeholders(text):
+    return any(field is not None for _, field, _, _ in Formatter().parse(text))
+
+def compile_catalogs(translations):
+    """{language: (read-only catalog, {key: bound str.format})} with the default language as fallback"""
+    default = translations[DEFAULT_LANGUAGE]
+    compiled = {}
+    for language, entries in translations.items():
+        catalog = dict(default)
+        catalog.update(entries)
+        formats = {key: text.format for key, text in catalog.items() if _has_placeholders(text)}
+        compiled[language] = (MappingProxyType(catalog), MappingProxyType(formats))
+    return MappingProxyType(compiled)
+
+CATALOGS = compile_catalogs(TRANSLATIONS)
 
-    if language not in TRANSLATIONS:
-        language = 'ru'  # fallback to Russian
+@lru_cache(maxsize=None)
+def get_translator(language):
+    """Translate function bound to one language's catalog"""
+    catalog, formats = CATALOGS.get(language) or CATALOGS[DEFAULT_LANGUAGE]
+    lookup = catalog.get
 
-    return TRANSLATIONS[language].get(key, key)
+    def translate(key, **kwargs):
+        if kwargs and key in formats:
+            try:
+                return formats[key](**kwargs)
+            except (KeyError, IndexError, ValueError):
+                return catalog[key]
+        return lookup(key, key)
+
+    return translate
+
+def current_translator():
+    """Translator for the session's language"""
+    if not has_request_context():
+        return get_translator(DEFAULT_LANGUAGE)
+    return get_translator(session.get('language', DEFAULT_LANGUAGE))
+
+def get_translation(key, language=None, **kwargs):
+    """Get translation for a key in the given language (default: the session's)"""
+    translate = current_translator() if language is None else get_translator(language)
+    return translate(key, **kwargs)
 
 def register_translation_filter(app):
     """Register the translation filter with Flask app"""
+    @app.context_processor
+    def inject_translator():
+        # Resolved once per render; every |t call in the template reuses it
+        return {'translate': current_translator()}
+
     @app.template_filter('t')
-    def translate_filter(key):
+    @pass_context  # never constant-folded at compile time: the language is per request
+    def translate_filter(context, key, **kwargs):
         """Translation filter for Jinja2 templates"""
-        return get_translation(key)
+        translate = context.get('translate') or current_translator()
+        return translate(key, **kwargs)
 
     return translate_filter
-
-# Globals for backward compatibility
-translations = TRANSLATIONS